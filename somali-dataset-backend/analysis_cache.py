@@ -0,0 +1,194 @@
+"""
+Persistent Analysis Cache
+Serialized enterprise analyses keyed by normalized text hash and engine version
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import logging
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DB = os.environ.get('SOMALI_ANALYSIS_CACHE_DB', 'somali_dataset.db')
+CACHE_ENABLED = os.environ.get('SOMALI_ANALYSIS_CACHE', '1') == '1'
+
+# Writes are buffered and committed together once either limit is reached
+FLUSH_ROWS = 256
+FLUSH_SECONDS = 2.0
+
+# Hashes per SELECT (SQLite's default host parameter limit is 999)
+LOOKUP_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form that is hashed and analyzed"""
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def text_hash(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    """A cached row; analysis is None for rows written by the scoring-only mode"""
+
+    __slots__ = ('analysis', 'scores')
+
+    def __init__(self, analysis: Optional[Dict], scores: Dict):
+        self.analysis = analysis
+        self.scores = scores
+
+
+class AnalysisCache:
+    """Read-through store of analyses in the analysis_cache table
+
+    Rows are keyed by (text hash, engine version). The version changes with
+    the analyzer code, the lexicon bundle and the dialect model, so stale rows
+    are never read; the first lookup under a new version deletes them.
+    Each thread keeps its own connection, since opening one per lookup would
+    cost as much as analyzing a short sentence.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_DB):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (hash, version) -> (analysis json or None, scores json) awaiting commit
+        self._pending: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
+        self._pending_since = 0.0
+        self._pruned_version: Optional[str] = None
+        atexit.register(self.flush)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    text_hash TEXT NOT NULL,
+                    engine_version TEXT NOT NULL,
+                    analysis TEXT,
+                    scores TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (text_hash, engine_version)
+                )
+            ''')
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def _prune(self, version: str) -> None:
+        """Drop rows written under any other engine version"""
+
+        with self._lock:
+            if self._pruned_version == version:
+                return
+            self._pruned_version = version
+            self._pending = {key: row for key, row in self._pending.items() if key[1] == version}
+
+        try:
+            conn = self._connection()
+            removed = conn.execute('DELETE FROM analysis_cache WHERE engine_version != ?', (version,)).rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            # Stale rows are never read, so they can wait for the next version change
+            logger.warning(f"Analysis cache prune failed: {e}")
+            return
+        if removed:
+            logger.info(f"Invalidated {removed} cached analyses for engine version {version}")
+
+    def get_many(self, hashes: Sequence[str], version: str) -> Dict[str, CacheEntry]:
+        """Cached entries by hash; missing hashes are absent from the result"""
+
+        if self._pruned_version != version:
+            self._prune(version)
+
+        found: Dict[str, CacheEntry] = {}
+        remaining = []
+        for key in set(hashes):
+            pending = self._pending.get((key, version))
+            if pending is not None:
+                found[key] = CacheEntry(json.loads(pending[0]) if pending[0] else None, json.loads(pending[1]))
+            else:
+                remaining.append(key)
+
+        try:
+            conn = self._connection()
+            for start in range(0, len(remaining), LOOKUP_BATCH):
+                batch = remaining[start:start + LOOKUP_BATCH]
+                rows = conn.execute(f'''
+                    SELECT text_hash, analysis, scores FROM analysis_cache
+                    WHERE engine_version = ? AND text_hash IN ({','.join('?' * len(batch))})
+                ''', (version, *batch))
+                for key, analysis, scores in rows:
+                    found[key] = CacheEntry(json.loads(analysis) if analysis else None, json.loads(scores))
+        except sqlite3.Error as e:
+            # A busy or broken cache must not fail the analysis; unread hashes are misses
+            logger.warning(f"Analysis cache lookup failed: {e}")
+
+        hits = sum(1 for key in hashes if key in found)
+        self.hits += hits
+        self.misses += len(hashes) - hits
+        return found
+
+    def put_many(self, version: str, rows: Iterable[Tuple[str, Optional[Dict], Dict]]) -> None:
+        """Buffer (hash, analysis or None, scores) rows for the next commit"""
+
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            for key, analysis, scores in rows:
+                previous = self._pending.get((key, version))
+                analysis_json = json.dumps(analysis) if analysis is not None else None
+                # A scores-only row never replaces a buffered full analysis
+                if analysis_json is None and previous is not None:
+                    analysis_json = previous[0]
+                self._pending[(key, version)] = (analysis_json, json.dumps(scores))
+            due = (len(self._pending) >= FLUSH_ROWS or
+                   time.monotonic() - self._pending_since >= FLUSH_SECONDS)
+
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Commit buffered rows; returns the number written"""
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            conn = self._connection()
+            conn.executemany('''
+                INSERT INTO analysis_cache (text_hash, engine_version, analysis, scores)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (text_hash, engine_version) DO UPDATE SET
+                    analysis = COALESCE(excluded.analysis, analysis_cache.analysis),
+                    scores = excluded.scores
+            ''', [(key, version, analysis, scores) for (key, version), (analysis, scores) in pending.items()])
+            conn.commit()
+        except sqlite3.Error as e:
+            # Losing cache rows only costs a recomputation
+            logger.warning(f"Analysis cache flush failed: {e}")
+            return 0
+        return len(pending)
+
+    def stats(self) -> Dict:
+        self.flush()
+        rows = self._connection().execute('SELECT COUNT(*) FROM analysis_cache').fetchone()[0]
+        return {
+            "rows": rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "engine_version": self._pruned_version
+        }
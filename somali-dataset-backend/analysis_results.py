@@ -0,0 +1,369 @@
+"""
+Compact Analysis Result Objects
+Slot-based containers for enterprise analysis sections, serialized on demand
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+
+# Top-level sections a caller may request, in serialization order
+ANALYSIS_FIELDS = (
+    'timestamp',
+    'text_length',
+    'word_count',
+    'enterprise_metrics',
+    'grammar_analysis',
+    'vocabulary_analysis',
+    'dialect_analysis',
+    'cultural_analysis',
+    'readability_analysis',
+    'professional_score',
+)
+
+# Sections produced by the analyzers (everything else is cheap metadata)
+ANALYZER_SECTIONS = (
+    'grammar_analysis',
+    'vocabulary_analysis',
+    'dialect_analysis',
+    'cultural_analysis',
+    'readability_analysis',
+    'professional_score',
+)
+
+
+def normalize_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Validate a field selection and return it in serialization order"""
+
+    if fields is None:
+        return ANALYSIS_FIELDS
+
+    requested = set(fields)
+    unknown = requested.difference(ANALYSIS_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown analysis fields: {', '.join(sorted(unknown))}. "
+            f"Valid fields: {', '.join(ANALYSIS_FIELDS)}"
+        )
+
+    return tuple(field for field in ANALYSIS_FIELDS if field in requested)
+
+
+def select_fields(analysis: Dict, fields: Tuple[str, ...]) -> Dict:
+    """Project a serialized analysis onto normalized fields"""
+    return {field: analysis[field] for field in fields}
+
+
+class GrammarAnalysis:
+    """Grammar section; issue strings are derived only when serialized"""
+
+    __slots__ = ('grammar_score', 'svo_matches', 'particles_found', 'punctuation_proper',
+                 'word_forms', 'sentence_count', 'average_sentence_length')
+
+    def __init__(self, grammar_score: int, svo_matches: int, particles_found: int,
+                 punctuation_proper: bool, word_forms: Dict[str, int], sentence_count: int,
+                 average_sentence_length: float):
+        self.grammar_score = grammar_score
+        self.svo_matches = svo_matches
+        self.particles_found = particles_found
+        self.punctuation_proper = punctuation_proper
+        # Tokens per word formation class (plural, feminine, masculine, diminutive)
+        self.word_forms = word_forms
+        self.sentence_count = sentence_count
+        self.average_sentence_length = average_sentence_length
+
+    @property
+    def issue_count(self) -> int:
+        """Number of grammar issues without building the messages"""
+        count = 0
+        if self.svo_matches == 0:
+            count += 1
+        if self.particles_found == 0:
+            count += 1
+        if not self.punctuation_proper:
+            count += 1
+        if not 8 <= self.average_sentence_length <= 20:
+            count += 1
+        return count
+
+    @property
+    def issues(self) -> List[str]:
+        issues = []
+        if self.svo_matches == 0:
+            issues.append("No clear Subject-Verb-Object structure detected")
+        if self.particles_found == 0:
+            issues.append("Missing grammatical particles (waa, baa, ayaa)")
+        if not self.punctuation_proper:
+            issues.append("Missing proper sentence punctuation")
+        if self.average_sentence_length < 8:
+            issues.append("Sentences too short for professional writing")
+        elif self.average_sentence_length > 20:
+            issues.append("Sentences too long, may affect readability")
+        return issues
+
+    def to_dict(self) -> Dict:
+        return {
+            'grammar_score': self.grammar_score,
+            'issues': self.issues,
+            'sentence_count': self.sentence_count,
+            'average_sentence_length': round(self.average_sentence_length, 1),
+            'particles_usage': self.particles_found,
+            'punctuation_proper': self.punctuation_proper,
+            'word_forms': dict(self.word_forms)
+        }
+
+
+class VocabularyAnalysis:
+    """Vocabulary section; category hits are kept as (category, words, count) tuples"""
+
+    __slots__ = ('vocabulary_score', 'category_hits', 'unique_words', 'total_words',
+                 'average_word_length', 'complex_words')
+
+    def __init__(self, vocabulary_score: int, category_hits: List[Tuple[str, List[str], int]],
+                 unique_words: int, total_words: int, average_word_length: float,
+                 complex_words: int):
+        self.vocabulary_score = vocabulary_score
+        self.category_hits = category_hits
+        self.unique_words = unique_words
+        self.total_words = total_words
+        self.average_word_length = average_word_length
+        self.complex_words = complex_words
+
+    def to_dict(self) -> Dict:
+        total_words = self.total_words
+        return {
+            'vocabulary_score': self.vocabulary_score,
+            'professional_categories': [
+                {'category': category, 'words_found': words, 'count': count}
+                for category, words, count in self.category_hits
+            ],
+            'diversity_ratio': round(self.unique_words / total_words, 3) if total_words > 0 else 0,
+            'unique_words': self.unique_words,
+            'total_words': total_words,
+            'average_word_length': round(self.average_word_length, 1),
+            'complex_words': self.complex_words,
+            'complexity_ratio': round(self.complex_words / total_words, 3) if total_words > 0 else 0
+        }
+
+
+class DialectAnalysis:
+    """Dialect section; breakdown maps dialect -> (score, indicators)"""
+
+    __slots__ = ('primary_dialect', 'confidence', 'breakdown', 'method')
+
+    def __init__(self, primary_dialect: str, confidence: float,
+                 breakdown: Dict[str, Tuple[float, List[str]]], method: str = 'lexicon_indicators'):
+        self.primary_dialect = primary_dialect
+        self.confidence = confidence
+        self.breakdown = breakdown
+        self.method = method
+
+    @property
+    def is_standard_somali(self) -> bool:
+        return self.primary_dialect == 'standard'
+
+    def to_dict(self) -> Dict:
+        return {
+            'primary_dialect': self.primary_dialect,
+            'confidence': round(self.confidence, 1),
+            'dialect_breakdown': {
+                dialect: {
+                    'score': score,
+                    'indicators': indicators,
+                    'confidence': min(score * 10, 100)
+                }
+                for dialect, (score, indicators) in self.breakdown.items()
+            },
+            'is_standard_somali': self.is_standard_somali,
+            'detection_method': self.method
+        }
+
+
+class CulturalAnalysis:
+    """Cultural and religious context section"""
+
+    __slots__ = ('cultural_score', 'islamic_terms_found', 'respectful_terms', 'cultural_sensitivity')
+
+    def __init__(self, cultural_score: int, islamic_terms_found: List[str],
+                 respectful_terms: List[str], cultural_sensitivity: int = 100):
+        self.cultural_score = cultural_score
+        self.islamic_terms_found = islamic_terms_found
+        self.respectful_terms = respectful_terms
+        self.cultural_sensitivity = cultural_sensitivity
+
+    @property
+    def is_culturally_appropriate(self) -> bool:
+        return self.cultural_sensitivity >= 80
+
+    def to_dict(self) -> Dict:
+        return {
+            'cultural_score': self.cultural_score,
+            'islamic_terms_found': self.islamic_terms_found,
+            'respectful_terms': self.respectful_terms,
+            'cultural_sensitivity': self.cultural_sensitivity,
+            'is_culturally_appropriate': self.is_culturally_appropriate
+        }
+
+
+class ReadabilityAnalysis:
+    """Readability section; an empty text serializes to the short form"""
+
+    __slots__ = ('readability_score', 'grade_level', 'avg_sentence_length', 'avg_word_length', 'is_empty')
+
+    def __init__(self, readability_score: float, grade_level: str, avg_sentence_length: float = 0.0,
+                 avg_word_length: float = 0.0, is_empty: bool = False):
+        self.readability_score = readability_score
+        self.grade_level = grade_level
+        self.avg_sentence_length = avg_sentence_length
+        self.avg_word_length = avg_word_length
+        self.is_empty = is_empty
+
+    def to_dict(self) -> Dict:
+        if self.is_empty:
+            return {'readability_score': 0, 'grade_level': 'Unknown'}
+
+        avg_word_length = self.avg_word_length
+        return {
+            'readability_score': self.readability_score,
+            'grade_level': self.grade_level,
+            'avg_sentence_length': round(self.avg_sentence_length, 1),
+            'avg_word_length': round(avg_word_length, 1),
+            'complexity_level': 'High' if avg_word_length > 6 else 'Medium' if avg_word_length > 4 else 'Low'
+        }
+
+
+class ProfessionalScore:
+    """Professional writing section"""
+
+    __slots__ = ('professional_score', 'formal_language_count', 'has_citations')
+
+    def __init__(self, professional_score: int, formal_language_count: int, has_citations: bool):
+        self.professional_score = professional_score
+        self.formal_language_count = formal_language_count
+        self.has_citations = has_citations
+
+    @property
+    def is_professional_level(self) -> bool:
+        return self.professional_score >= 70
+
+    def to_dict(self) -> Dict:
+        return {
+            'professional_score': self.professional_score,
+            'formal_language_count': self.formal_language_count,
+            'has_citations': self.has_citations,
+            'is_professional_level': self.is_professional_level
+        }
+
+
+class EnterpriseMetrics:
+    """Aggregated enterprise scores"""
+
+    __slots__ = ('accuracy_score', 'professionalism_score', 'cultural_appropriateness',
+                 'business_readiness', 'overall_enterprise_score')
+
+    def __init__(self, accuracy_score: float = 0, professionalism_score: float = 0,
+                 cultural_appropriateness: float = 0, business_readiness: float = 0,
+                 overall_enterprise_score: float = 0):
+        self.accuracy_score = accuracy_score
+        self.professionalism_score = professionalism_score
+        self.cultural_appropriateness = cultural_appropriateness
+        self.business_readiness = business_readiness
+        self.overall_enterprise_score = overall_enterprise_score
+
+    def to_dict(self) -> Dict:
+        return {
+            'accuracy_score': self.accuracy_score,
+            'professionalism_score': self.professionalism_score,
+            'cultural_appropriateness': self.cultural_appropriateness,
+            'business_readiness': self.business_readiness,
+            'overall_enterprise_score': self.overall_enterprise_score
+        }
+
+
+class EnterpriseScores(EnterpriseMetrics):
+    """Numeric scores from the scoring-only engine mode"""
+
+    __slots__ = ('primary_dialect',)
+
+    def __init__(self, metrics: EnterpriseMetrics, primary_dialect: str):
+        super().__init__(
+            metrics.accuracy_score,
+            metrics.professionalism_score,
+            metrics.cultural_appropriateness,
+            metrics.business_readiness,
+            metrics.overall_enterprise_score
+        )
+        self.primary_dialect = primary_dialect
+
+    @classmethod
+    def from_analysis(cls, analysis: 'EnterpriseAnalysis') -> 'EnterpriseScores':
+        return cls(analysis.enterprise_metrics, analysis.dialect_analysis.primary_dialect)
+
+    @classmethod
+    def from_analysis_dict(cls, analysis: Dict) -> 'EnterpriseScores':
+        """Scores of a serialized full analysis"""
+        return cls(EnterpriseMetrics(**analysis['enterprise_metrics']), analysis['dialect_analysis']['primary_dialect'])
+
+    @classmethod
+    def from_record(cls, record: Dict) -> 'EnterpriseScores':
+        metrics = {key: value for key, value in record.items() if key != 'primary_dialect'}
+        return cls(EnterpriseMetrics(**metrics), record['primary_dialect'])
+
+    def to_record(self) -> Dict:
+        """Metrics plus primary dialect, as stored by the analysis cache"""
+        return {**self.to_dict(), 'primary_dialect': self.primary_dialect}
+
+
+class EnterpriseAnalysis:
+    """Result of an enterprise analysis; only the computed sections are populated"""
+
+    __slots__ = ('created_at', 'text_length', 'word_count', 'fields') + ('enterprise_metrics',) + ANALYZER_SECTIONS
+
+    def __init__(self, text_length: int, word_count: int, fields: Tuple[str, ...] = ANALYSIS_FIELDS):
+        self.created_at = datetime.now()
+        self.text_length = text_length
+        self.word_count = word_count
+        self.fields = fields
+        self.enterprise_metrics = None
+        self.grammar_analysis = None
+        self.vocabulary_analysis = None
+        self.dialect_analysis = None
+        self.cultural_analysis = None
+        self.readability_analysis = None
+        self.professional_score = None
+
+    @property
+    def timestamp(self) -> str:
+        return self.created_at.isoformat()
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict:
+        """Serialize the requested fields (defaults to the fields computed)"""
+
+        selected = self.fields if fields is None else normalize_fields(fields)
+        result = {}
+
+        for field in selected:
+            value = getattr(self, field)
+            if value is None:
+                raise ValueError(f"Field '{field}' was not computed for this analysis")
+            result[field] = value.to_dict() if hasattr(value, 'to_dict') else value
+
+        return result
+
+
+class DocumentAnalysis(EnterpriseAnalysis):
+    """Enterprise analysis of a streamed document plus streaming statistics"""
+
+    __slots__ = ('segment_count', 'unique_words_exact')
+
+    def __init__(self, text_length: int, word_count: int, fields: Tuple[str, ...] = ANALYSIS_FIELDS):
+        super().__init__(text_length, word_count, fields)
+        self.segment_count = 0
+        self.unique_words_exact = True
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict:
+        result = super().to_dict(fields)
+        result['document_stats'] = {
+            'segments_analyzed': self.segment_count,
+            'unique_words_exact': self.unique_words_exact
+        }
+        return result
@@ -4,6 +4,7 @@ Build Real Somali Dataset
 Generate 10,000+ high-quality Somali sentences
 """
 
+import argparse
 import sqlite3
 import json
 import random
@@ -14,6 +15,13 @@ import os
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from scoring_pipeline import get_pipeline
+from sentence_writer import SentenceWriter
+from template_engine import TemplateSpace, sample_sharded, si_kastaba, unchanged, waa_run, waxaa_la_yidhi
+
+# Optional opener, closer and quotation around each generated sentence
+BUILDER_VARIATIONS = ((unchanged, si_kastaba), (unchanged, waa_run), (unchanged, waxaa_la_yidhi))
+
 def init_database():
     """Initialize the database with required tables"""
     conn = sqlite3.connect('somali_dataset.db')
@@ -39,8 +47,11 @@ def init_database():
     conn.close()
     print("✅ Database initialized")
 
-def generate_comprehensive_dataset():
-    """Generate comprehensive Somali dataset"""
+def generate_comprehensive_dataset(per_template=10, seed=None, processes=None):
+    """Generate comprehensive Somali dataset, about per_template distinct sentences per template
+    
+    The same seed always gives the same sentences, whatever the number of processes
+    """
     
     # High-quality sentence templates organized by category
     categories = {
@@ -236,42 +247,30 @@ def generate_comprehensive_dataset():
     }
     
     generated_sentences = []
+    # Each category's seed comes from the run seed and its name alone, so adding
+    # or reordering categories leaves the others' sentences unchanged
+    seed = seed if seed is not None else random.randrange(2 ** 32)
     
     print("🚀 Generating comprehensive Somali dataset...")
     
     for category, data in categories.items():
-        print(f"📝 Generating {category} sentences...")
+        # Every template × word × variation combination, sampled without replacement
+        space = TemplateSpace.from_banks(data["templates"], data.get("words", {}), BUILDER_VARIATIONS,
+                                         category=category)
+        print(f"📝 Generating {category} sentences from {space.size} combinations...")
         category_sentences = []
+        category_seed = random.Random(f"{seed}/{category}").getrandbits(32)
         
-        for template in data["templates"]:
-            # Generate variations of each template
-            for _ in range(random.randint(5, 15)):  # 5-15 variations per template
-                sentence = template
-                
-                # Replace placeholders with random words
-                if "words" in data:
-                    for placeholder, word_list in data["words"].items():
-                        if f"{{{placeholder}}}" in sentence:
-                            sentence = sentence.replace(f"{{{placeholder}}}", random.choice(word_list))
-                
-                # Add some natural variations
-                if random.random() < 0.2:  # 20% chance
-                    sentence = f"Si kastaba, {sentence.lower()}"
-                
-                if random.random() < 0.15:  # 15% chance
-                    sentence = f"{sentence}. Waa run."
-                
-                if random.random() < 0.1:  # 10% chance
-                    sentence = f"Waxaa la yidhi: '{sentence}'"
-                
-                # Basic quality check
-                if len(sentence.split()) >= 4 and len(sentence) > 20:
-                    category_sentences.append({
-                        "text": sentence,
-                        "category": category,
-                        "source": "generated",
-                        "dialect": "Standard Somali"
-                    })
+        for _, sentence in sample_sharded(space, per_template * len(data["templates"]), category_seed,
+                                          processes=processes):
+            # Basic quality check
+            if len(sentence.split()) >= 4 and len(sentence) > 20:
+                category_sentences.append({
+                    "text": sentence,
+                    "category": category,
+                    "source": "generated",
+                    "dialect": "Standard Somali"
+                })
         
         generated_sentences.extend(category_sentences)
         print(f"✅ Generated {len(category_sentences)} {category} sentences")
@@ -315,49 +314,23 @@ def generate_comprehensive_dataset():
 
 def save_to_database(sentences):
     """Save generated sentences to database"""
-    conn = sqlite3.connect('somali_dataset.db')
-    cursor = conn.cursor()
-    
-    success_count = 0
+    # Score the whole batch with the configured pipeline profile
+    scored = get_pipeline().score_batch([sentence_data["text"] for sentence_data in sentences])
     
-    for sentence_data in sentences:
-        try:
-            # Calculate a basic quality score
-            text = sentence_data["text"]
-            words = text.split()
-            
-            # Basic quality scoring
-            length_score = min(len(words) / 10, 1.0) * 30
-            char_score = min(len(text) / 50, 1.0) * 20
-            structure_score = 25 if any(p in text for p in '.!?') else 15
-            somali_score = 25 if any(word in text.lower() for word in ['waa', 'baa', 'ayaa', 'oo', 'iyo']) else 10
-            
-            quality_score = length_score + char_score + structure_score + somali_score
-            
-            cursor.execute('''
-                INSERT OR IGNORE INTO somali_sentences 
-                (text, dialect, quality_score, source, validated, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                text,
-                sentence_data["dialect"],
-                quality_score,
-                sentence_data["source"],
-                True,
-                json.dumps({"category": sentence_data["category"]})
-            ))
-            
-            if cursor.rowcount > 0:
-                success_count += 1
-                
-        except sqlite3.IntegrityError:
-            continue  # Skip duplicates
-    
-    conn.commit()
-    conn.close()
+    totals = SentenceWriter('somali_dataset.db').write(
+        {
+            "text": sentence_data["text"],
+            "dialect": sentence_data["dialect"],
+            "quality_score": result.quality_score,
+            "source": sentence_data["source"],
+            "validated": True,
+            "metadata": {"category": sentence_data["category"]}
+        }
+        for sentence_data, result in zip(sentences, scored) if result.error is None
+    )
     
-    print(f"✅ Successfully saved {success_count} sentences to database")
-    return success_count
+    print(f"✅ Successfully saved {totals['written']} sentences to database ({totals['duplicates']} duplicates skipped)")
+    return totals['written']
 
 def get_dataset_stats():
     """Get current dataset statistics"""
@@ -391,13 +364,19 @@ def get_dataset_stats():
 
 def main():
     """Main function to build the dataset"""
+    parser = argparse.ArgumentParser(description="Build the Somali sentence dataset")
+    parser.add_argument("--seed", type=int, help="Seed for a reproducible dataset")
+    parser.add_argument("--per-template", type=int, default=10, help="Sentences per template")
+    parser.add_argument("--processes", type=int, help="Generation processes (default: one per core)")
+    args = parser.parse_args()
+    
     print("🎯 Building Real Somali Dataset...")
     
     # Initialize database
     init_database()
     
     # Generate comprehensive dataset
-    sentences = generate_comprehensive_dataset()
+    sentences = generate_comprehensive_dataset(args.per_template, args.seed, args.processes)
     
     # Save to database
     saved_count = save_to_database(sentences)
@@ -0,0 +1,347 @@
+"""
+Collection Filter Cascade
+Cost-ordered filter stages between sentence extraction and storage; every
+stage drops what it rejects before the next, more expensive one runs
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from analysis_cache import normalize_text
+from analysis_results import EnterpriseAnalysis, EnterpriseScores
+from enterprise_nlp import SomaliNLPEngine, nlp_engine
+from language_id import LanguageGate, language_gate
+from stage_pipeline import QUEUE_SIZE, pipelined
+from text_features import TextFeatures
+
+# Word count range of a collectable sentence
+MIN_WORDS = 5
+MAX_WORDS = 50
+
+# Somali is written in the Latin alphabet; other scripts, markup and symbol
+# runs are noise. Apostrophes mark glottal stops (ba'an) and stay.
+FOREIGN_CHARACTERS = re.compile(r"[^A-Za-z0-9\s'’.,;:!?()\"%/-]")
+NON_LETTERS = re.compile(r"[^A-Za-z]")
+MAX_FOREIGN_FRACTION = 0.05
+MIN_LETTER_FRACTION = 0.6
+
+# Minimum overall enterprise score of a collected sentence
+QUALITY_THRESHOLD = 70
+
+# Texts per corpus lookup of the duplicate filter
+DEDUP_BATCH = 500
+
+
+class Candidate:
+    """A sentence moving through the cascade; scoring stages attach their results"""
+
+    __slots__ = ('text', 'source', 'features', 'partial', 'scores')
+
+    def __init__(self, text: str, source: Optional[str] = None):
+        self.text = text
+        self.source = source
+        self.features: Optional[TextFeatures] = None
+        # Scoring sections computed by the score bound, reused by the analysis
+        self.partial: Optional[EnterpriseAnalysis] = None
+        self.scores: Optional[EnterpriseScores] = None
+
+
+class FilterStage:
+    """One cascade step
+
+    cost is the rough time per text in microseconds; the cascade runs stages
+    cheapest first. filter() returns the survivors and rejection counts by
+    reason.
+    """
+
+    name = 'stage'
+    cost = 0.0
+
+    def filter(self, candidates: List[Candidate]) -> Tuple[List[Candidate], Dict[str, int]]:
+        raise NotImplementedError
+
+
+def _reject(reasons: Dict[str, int], reason: str) -> None:
+    reasons[reason] = reasons.get(reason, 0) + 1
+
+
+class LengthFilter(FilterStage):
+    name = 'length'
+    cost = 0.5
+
+    def __init__(self, min_words: int = MIN_WORDS, max_words: int = MAX_WORDS):
+        self.min_words = min_words
+        self.max_words = max_words
+
+    def filter(self, candidates):
+        kept, reasons = [], {}
+        for candidate in candidates:
+            words = len(candidate.text.split())
+            if words < self.min_words:
+                _reject(reasons, 'too_short')
+            elif words > self.max_words:
+                _reject(reasons, 'too_long')
+            else:
+                kept.append(candidate)
+        return kept, reasons
+
+
+class CharsetFilter(FilterStage):
+    name = 'charset'
+    cost = 2.0
+
+    def __init__(self, max_foreign: float = MAX_FOREIGN_FRACTION, min_letters: float = MIN_LETTER_FRACTION):
+        self.max_foreign = max_foreign
+        self.min_letters = min_letters
+
+    def filter(self, candidates):
+        kept, reasons = [], {}
+        for candidate in candidates:
+            text = candidate.text
+            size = len(text)
+            if len(FOREIGN_CHARACTERS.findall(text)) > self.max_foreign * size:
+                _reject(reasons, 'foreign_characters')
+            elif size - len(NON_LETTERS.sub('', text)) > (1 - self.min_letters) * size:
+                _reject(reasons, 'too_few_letters')
+            else:
+                kept.append(candidate)
+        return kept, reasons
+
+
+class LanguageFilter(FilterStage):
+    """Keeps Somali; rejections are counted by detected language"""
+
+    name = 'language'
+    cost = 10.0
+
+    def __init__(self, gate: LanguageGate = language_gate):
+        self.gate = gate
+
+    def filter(self, candidates):
+        somali_indices, rejected = self.gate.split([candidate.text for candidate in candidates])
+        return [candidates[i] for i in somali_indices], rejected
+
+
+class DuplicateFilter(FilterStage):
+    """Drops texts repeated within the batch or already in somali_sentences
+
+    Repeats across batches of a stream are caught by the lookup once the
+    earlier copy is written, and otherwise by the table's UNIQUE constraint.
+    """
+
+    name = 'dedup'
+    # One indexed lookup per text, measured cheaper than language ID even
+    # against a 200k-sentence corpus
+    cost = 5.0
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def _stored(self, texts: List[str]) -> set:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'somali_sentences'").fetchone():
+                return set()
+            stored = set()
+            for start in range(0, len(texts), DEDUP_BATCH):
+                batch = texts[start:start + DEDUP_BATCH]
+                stored.update(text for text, in conn.execute(
+                    f"SELECT text FROM somali_sentences WHERE text IN ({','.join('?' * len(batch))})", batch
+                ))
+            return stored
+        finally:
+            conn.close()
+
+    def filter(self, candidates):
+        kept, reasons, seen = [], {}, set()
+        for candidate in candidates:
+            if candidate.text in seen:
+                _reject(reasons, 'repeated_in_batch')
+            else:
+                seen.add(candidate.text)
+                kept.append(candidate)
+
+        stored = self._stored([candidate.text for candidate in kept]) if kept else set()
+        if stored:
+            reasons['already_collected'] = len(stored)
+            kept = [candidate for candidate in kept if candidate.text not in stored]
+        return kept, reasons
+
+
+class ScoreBoundFilter(FilterStage):
+    """Drops texts whose score provably cannot reach the threshold
+
+    Only the engine's leading scoring stages run; their tokenization of the
+    normalized text and their sections are kept on the candidate, so the
+    analysis stage does not compute them again.
+    """
+
+    name = 'score_bound'
+    cost = 60.0
+
+    def __init__(self, engine: SomaliNLPEngine = nlp_engine, min_score: float = QUALITY_THRESHOLD):
+        self.engine = engine
+        self.min_score = min_score
+
+    def filter(self, candidates):
+        kept, reasons = [], {}
+        for candidate in candidates:
+            candidate.features = self.engine.features(normalize_text(candidate.text))
+            candidate.partial = self.engine.bound_sections(candidate.features)
+            if self.engine.score_bound(candidate.features, candidate.partial) < self.min_score:
+                _reject(reasons, 'cannot_reach_threshold')
+            else:
+                kept.append(candidate)
+        return kept, reasons
+
+
+class QualityFilter(FilterStage):
+    """Scores the survivors and keeps those at or above the threshold
+
+    With scores_only the engine's scoring-only mode is used, which skips
+    issue lists and breakdowns and stops as soon as a text cannot reach the
+    threshold; otherwise the survivors get one batched full analysis.
+    """
+
+    name = 'analysis'
+    cost = 120.0
+
+    def __init__(self, engine: SomaliNLPEngine = nlp_engine, min_score: float = QUALITY_THRESHOLD,
+                 scores_only: bool = True):
+        self.engine = engine
+        self.min_score = min_score
+        self.scores_only = scores_only
+
+    def filter(self, candidates):
+        if self.scores_only:
+            for candidate in candidates:
+                candidate.scores = self.engine.score_text(candidate.text, self.min_score,
+                                                          features=candidate.features, partial=candidate.partial)
+        elif candidates:
+            features = [candidate.features or self.engine.features(candidate.text) for candidate in candidates]
+            analyses = self.engine.analyze_many([candidate.text for candidate in candidates], features=features)
+            for candidate, analysis in zip(candidates, analyses):
+                candidate.scores = EnterpriseScores.from_analysis_dict(analysis)
+
+        kept = [candidate for candidate in candidates
+                if candidate.scores is not None and candidate.scores.overall_enterprise_score >= self.min_score]
+        rejected = len(candidates) - len(kept)
+        return kept, {'below_threshold': rejected} if rejected else {}
+
+
+def default_stages(db_path: str, scores_only: bool = True, min_score: float = QUALITY_THRESHOLD,
+                   engine: SomaliNLPEngine = nlp_engine) -> List[FilterStage]:
+    return [
+        LengthFilter(),
+        CharsetFilter(),
+        DuplicateFilter(db_path),
+        LanguageFilter(),
+        ScoreBoundFilter(engine, min_score),
+        QualityFilter(engine, min_score, scores_only)
+    ]
+
+
+def _empty_stats() -> Dict:
+    return {"received": 0, "passed": 0, "rejected": 0, "time_ms": 0.0, "reasons": {}}
+
+
+def _add_stats(totals: Dict, received: int, passed: int, elapsed_ms: float, reasons: Dict[str, int]) -> None:
+    totals["received"] += received
+    totals["passed"] += passed
+    totals["rejected"] += received - passed
+    totals["time_ms"] += elapsed_ms
+    for reason, count in reasons.items():
+        totals["reasons"][reason] = totals["reasons"].get(reason, 0) + count
+
+
+def _rounded(stats: Dict) -> Dict:
+    return {**stats, "time_ms": round(stats["time_ms"], 3), "reasons": dict(stats["reasons"])}
+
+
+class CascadeMetrics:
+    """Running per-stage totals over every cascade run, for the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.runs = 0
+            self._stages: Dict[str, Dict] = {}
+
+    def start_run(self) -> None:
+        with self._lock:
+            self.runs += 1
+
+    def add(self, stage: str, received: int, passed: int, elapsed_ms: float, reasons: Dict[str, int]) -> None:
+        with self._lock:
+            _add_stats(self._stages.setdefault(stage, _empty_stats()), received, passed, elapsed_ms, reasons)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stages = {
+                name: {**_rounded(totals),
+                       "reject_rate": round(totals["rejected"] / totals["received"], 4) if totals["received"] else 0.0}
+                for name, totals in self._stages.items()
+            }
+            return {"collecting_since": self.started_at, "runs": self.runs, "stages": stages}
+
+
+class FilterCascade:
+    """Runs stages cheapest first, passing only the survivors along
+
+    After run() or a finished stream(), report() holds per-stage received,
+    passed and rejected counts, rejection reasons and time, in stage order.
+    """
+
+    def __init__(self, stages: Sequence[FilterStage], metrics: Optional[CascadeMetrics] = None):
+        # Stable sort: stages of equal cost keep the given order
+        self.stages = sorted(stages, key=lambda stage: stage.cost)
+        self.metrics = metrics
+        self._report = {stage.name: _empty_stats() for stage in self.stages}
+
+    def _timed(self, stage: FilterStage) -> Callable[[List[Candidate]], List[Candidate]]:
+        totals = self._report[stage.name]
+
+        def run(candidates: List[Candidate]) -> List[Candidate]:
+            if not candidates:
+                return candidates
+            started = time.perf_counter()
+            kept, reasons = stage.filter(candidates)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _add_stats(totals, len(candidates), len(kept), elapsed_ms, reasons)
+            if self.metrics is not None:
+                self.metrics.add(stage.name, len(candidates), len(kept), elapsed_ms, reasons)
+            return kept
+
+        return run
+
+    def run(self, texts: Sequence[str]) -> Tuple[List[Candidate], Dict[str, Dict]]:
+        """Filter one batch in the calling thread; returns survivors and the report"""
+
+        if self.metrics is not None:
+            self.metrics.start_run()
+        candidates = [Candidate(text) for text in texts]
+        for stage in self.stages:
+            candidates = self._timed(stage)(candidates)
+        return candidates, self.report()
+
+    def stream(self, batches: Iterable[List[Candidate]], queue_size: int = QUEUE_SIZE) -> Iterator[List[Candidate]]:
+        """
+        Filter a stream of candidate batches, every stage in its own thread
+
+        Stages are joined by bounded queues, so memory holds a few batches
+        per stage however long the stream is. Yields each batch's survivors.
+        """
+
+        if self.metrics is not None:
+            self.metrics.start_run()
+        return pipelined(batches, [self._timed(stage) for stage in self.stages], queue_size)
+
+    def report(self) -> Dict[str, Dict]:
+        return {name: _rounded(stats) for name, stats in self._report.items()}
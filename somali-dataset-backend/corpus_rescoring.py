@@ -0,0 +1,367 @@
+"""
+Selective Corpus Re-scoring
+Lexicon diffing and a job that re-scores only the sentences affected by a
+lexicon change
+"""
+
+import json
+import sqlite3
+import logging
+import argparse
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from lexicon_bundle import CompiledLexicon, load_lexicon
+from text_features import WORD_PUNCTUATION
+from token_index import TokenIndex
+from enterprise_nlp import SomaliNLPEngine, nlp_engine
+
+logger = logging.getLogger(__name__)
+
+RESCORE_BATCH = 500
+
+# Rows whose stored quality_score/dialect came from the enterprise engine
+ENGINE_SCORED = ("CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.overall_enterprise_score') END "
+                 "IS NOT NULL")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class TermIndex:
+    """Resolves lexicon terms to candidate sentences through the token index
+
+    A substring term maps to every indexed token containing it, so terms
+    introduced by a later lexicon version are found without re-indexing.
+    Also records the lexicon version the stored scores reflect.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db'):
+        self.db_path = db_path
+        self.tokens = TokenIndex(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS term_index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        return conn
+
+    @staticmethod
+    def _get_state(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute('SELECT value FROM term_index_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute('INSERT OR REPLACE INTO term_index_state (key, value) VALUES (?, ?)', (key, value))
+
+    def update(self) -> int:
+        """Bring the token index up to date; returns the sentence changes applied"""
+        return self.tokens.sync()
+
+    def sentences_for_terms(self, substrings: Iterable[str] = (), words: Iterable[str] = ()) -> Set[int]:
+        """
+        Ids of sentences that may contain the given lexicon terms
+
+        Args:
+            substrings: Terms matched anywhere in the lowercased text
+            words: Terms matched as whole words without surrounding punctuation
+
+        Returns:
+            A superset of the sentences containing any of the terms
+        """
+
+        substrings = set(substrings)
+        words = set(words)
+        if not substrings and not words:
+            return set()
+
+        conn = self.tokens.connect()
+        try:
+            vocabulary = self.tokens.vocabulary(conn)
+            ids = set()
+
+            # A term spanning several tokens needs every piece in some token.
+            # Indexed tokens lack surrounding punctuation, so pieces are
+            # stripped the same way; a piece of punctuation only matches anywhere
+            piece_ids: Dict[str, Set[int]] = {}
+            for term in substrings:
+                candidates = None
+                for piece in term.split() or [term]:
+                    piece = piece.strip(WORD_PUNCTUATION)
+                    if piece not in piece_ids:
+                        if piece:
+                            matches = self.tokens.union(conn, (token for token in vocabulary if piece in token))
+                        else:
+                            matches = self.tokens.all_ids(conn)
+                        piece_ids[piece] = set(matches.tolist())
+                    candidates = piece_ids[piece] if candidates is None else candidates & piece_ids[piece]
+                ids |= candidates
+
+            if words:
+                ids.update(self.tokens.union(conn, words).tolist())
+            return ids
+        finally:
+            conn.close()
+
+    def scored_lexicon(self) -> Optional[CompiledLexicon]:
+        """Lexicon the stored engine scores were last brought up to date with"""
+
+        conn = self._connect()
+        try:
+            data = self._get_state(conn, 'scored_lexicon')
+            content_hash = self._get_state(conn, 'scored_lexicon_hash')
+        finally:
+            conn.close()
+
+        if data is None:
+            return None
+        return CompiledLexicon(json.loads(data), content_hash or '')
+
+    def set_scored_lexicon(self, lexicon: CompiledLexicon) -> None:
+        conn = self._connect()
+        try:
+            self._set_state(conn, 'scored_lexicon', json.dumps(lexicon.data))
+            self._set_state(conn, 'scored_lexicon_hash', lexicon.content_hash)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class LexiconDiff:
+    """Terms whose effect on scoring differs between two lexicon versions"""
+
+    __slots__ = ('substring_terms', 'words', 'full_rescore')
+
+    def __init__(self, substring_terms: Set[str], words: Set[str], full_rescore: bool):
+        self.substring_terms = substring_terms
+        self.words = words
+        self.full_rescore = full_rescore
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.substring_terms or self.words or self.full_rescore)
+
+    def to_dict(self) -> Dict:
+        return {
+            "changed_terms": sorted(self.substring_terms),
+            "changed_words": sorted(self.words),
+            "full_rescore": self.full_rescore
+        }
+
+
+def _term_roles(lex: CompiledLexicon) -> Dict[str, Set[Tuple]]:
+    """Every role a substring-matched term plays in scoring"""
+
+    roles: Dict[str, Set[Tuple]] = {}
+
+    def add(terms: Iterable[str], role: Tuple) -> None:
+        for term in terms:
+            roles.setdefault(term, set()).add(role)
+
+    add(lex.particles, ('particle',))
+    add(lex.formal_patterns, ('formal',))
+    add(lex.academic_words, ('academic',))
+    for category, group in lex.islamic_terms:
+        add(group, ('islamic', category))
+    for category, group in lex.respectful_terms:
+        add(group, ('respectful', category))
+    # Dialect order breaks score ties, so the position is part of the role
+    for position, (dialect, group, indicator_score) in enumerate(lex.dialect_indicators):
+        add(group, ('dialect', position, dialect, indicator_score))
+
+    roles.pop('', None)
+    return roles
+
+
+def _residual(data: Dict) -> Dict:
+    """Bundle content outside the term lists; any change here affects every text"""
+
+    residual = json.loads(json.dumps(data))
+    for key in ('name', 'version', 'professional_words'):
+        residual.pop(key, None)
+    for key in ('formal_patterns', 'academic_words'):
+        residual['professional_indicators'].pop(key, None)
+    residual['grammatical_patterns'].pop('particles', None)
+
+    cultural = residual['cultural_context']
+    cultural.pop('respectful_language', None)
+    cultural['islamic_terms'] = {
+        category: terms for category, terms in cultural['islamic_terms'].items() if category == 'proper_usage'
+    }
+
+    dialects = {}
+    for dialect, markers in residual['dialect_markers'].items():
+        for key in ('indicators', 'weight', 'confidence_boost'):
+            markers.pop(key, None)
+        if markers:
+            dialects[dialect] = markers
+    residual['dialect_markers'] = dialects
+    return residual
+
+
+def diff_lexicons(old: CompiledLexicon, new: CompiledLexicon) -> LexiconDiff:
+    """Compare two lexicon versions term by term"""
+
+    old_roles = _term_roles(old)
+    new_roles = _term_roles(new)
+    substring_terms = {
+        term for term in set(old_roles) | set(new_roles)
+        if old_roles.get(term) != new_roles.get(term)
+    }
+
+    # Category order only changes breakdown ordering, not scores
+    words = {
+        word for word in set(old.word_categories) | set(new.word_categories)
+        if set(old.categories_for(word)) != set(new.categories_for(word))
+    }
+
+    return LexiconDiff(substring_terms, words, _residual(old.data) != _residual(new.data))
+
+
+class RescoringJob:
+    """Re-scores engine-scored sentences affected by a lexicon change
+
+    Only rows whose metadata holds enterprise scores are touched; rows scored
+    by the standard profile do not depend on the lexicon.
+    """
+
+    def __init__(self, engine: SomaliNLPEngine = nlp_engine, db_path: str = 'somali_dataset.db',
+                 batch_size: int = RESCORE_BATCH):
+        self.engine = engine
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.index = TermIndex(db_path)
+
+    def run(self, old_lexicon: Optional[CompiledLexicon] = None, full: bool = False,
+            progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Bring stored scores up to date with the engine's active lexicon
+
+        Args:
+            old_lexicon: Version the stored scores reflect (defaults to the one
+                recorded by the previous run; a full re-score without either)
+            full: Re-score every engine-scored sentence regardless of the diff
+            progress: Called with (sentences done, sentences to do) after each batch
+
+        Returns:
+            Summary of the run
+        """
+
+        new_lexicon = self.engine.lexicon
+        self.index.update()
+
+        if old_lexicon is None:
+            old_lexicon = self.index.scored_lexicon()
+
+        diff = None
+        if full or old_lexicon is None:
+            mode = "full"
+        else:
+            diff = diff_lexicons(old_lexicon, new_lexicon)
+            mode = "full" if diff.full_rescore else "selective"
+
+        if mode == "full":
+            candidates = self._engine_scored_ids()
+        else:
+            candidates = sorted(self.index.sentences_for_terms(diff.substring_terms, diff.words))
+
+        report = {
+            "mode": mode,
+            "old_lexicon": old_lexicon.version_key if old_lexicon is not None else None,
+            "new_lexicon": new_lexicon.version_key,
+            "changed_terms": len(diff.substring_terms) if diff else None,
+            "changed_words": len(diff.words) if diff else None,
+            "candidates": len(candidates),
+            "rescored": 0,
+            "updated": 0,
+            "failed": 0,
+            "batches": 0
+        }
+
+        for batch in _chunks(candidates, self.batch_size):
+            rescored, updated, failed = self._rescore_batch(batch)
+            report["rescored"] += rescored
+            report["updated"] += updated
+            report["failed"] += failed
+            report["batches"] += 1
+
+            done = min(report["batches"] * self.batch_size, len(candidates))
+            if progress is not None:
+                progress(done, len(candidates))
+            logger.info(f"Re-scored {done}/{len(candidates)} candidate sentences")
+
+        self.index.set_scored_lexicon(new_lexicon)
+        return report
+
+    def _engine_scored_ids(self) -> List[int]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute(f'SELECT id FROM somali_sentences WHERE {ENGINE_SCORED} ORDER BY id')]
+        finally:
+            conn.close()
+
+    def _rescore_batch(self, ids: List[int]) -> Tuple[int, int, int]:
+        """Re-score one batch in a single transaction; returns (rescored, updated, failed)"""
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(f'''
+                SELECT id, text, quality_score, dialect FROM somali_sentences
+                WHERE id IN ({','.join('?' * len(ids))}) AND {ENGINE_SCORED}
+            ''', ids).fetchall()
+
+            updates = []
+            failed = 0
+            changed = 0
+            for sentence_id, text, quality_score, dialect in rows:
+                try:
+                    scores = self.engine.score_text(text)
+                except Exception as e:
+                    logger.warning(f"Could not re-score sentence {sentence_id}: {e}")
+                    failed += 1
+                    continue
+
+                if scores.overall_enterprise_score != quality_score or scores.primary_dialect != dialect:
+                    changed += 1
+                updates.append((
+                    scores.overall_enterprise_score, scores.primary_dialect,
+                    json.dumps(scores.to_dict()), sentence_id
+                ))
+
+            conn.executemany('''
+                UPDATE somali_sentences
+                SET quality_score = ?, dialect = ?, metadata = json_patch(metadata, ?)
+                WHERE id = ?
+            ''', updates)
+            conn.commit()
+            return len(updates), changed, failed
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score sentences affected by a lexicon change")
+    parser.add_argument('--db', default='somali_dataset.db')
+    parser.add_argument('--old-lexicon', help="Bundle the stored scores reflect (defaults to the last run's)")
+    parser.add_argument('--full', action='store_true', help="Re-score every engine-scored sentence")
+    args = parser.parse_args()
+
+    old_lexicon = load_lexicon(args.old_lexicon, cache_dir=None) if args.old_lexicon else None
+
+    def show_progress(done: int, total: int) -> None:
+        print(f"   {done}/{total} sentences re-scored")
+
+    report = RescoringJob(db_path=args.db).run(old_lexicon, args.full, show_progress)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Crawl Frontier
+Persisted per-URL crawl state for web data sources: cache validators,
+content hash and when each page is next due
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from web_collector import PageResult, PageValidators
+
+# Revisit interval of a new page; halved when it changed, doubled when not
+INITIAL_INTERVAL_S = 24 * 3600
+MIN_INTERVAL_S = 3600
+MAX_INTERVAL_S = 30 * 24 * 3600
+
+# Failed pages are retried after FAILURE_RETRY_S * 2**(failures - 1), up to MAX_INTERVAL_S
+FAILURE_RETRY_S = 3600
+
+
+def next_interval(interval: int, page: PageResult) -> int:
+    """Revisit interval after a fetch: sooner for pages that change, later for static ones"""
+
+    if page.not_modified or page.unchanged:
+        return min(interval * 2, MAX_INTERVAL_S)
+    return max(interval // 2, MIN_INTERVAL_S)
+
+
+class CrawlFrontier:
+    """
+    The crawl_frontier table, one row per URL of a data source
+
+    A crawl takes due URLs in next_due order and writes their outcome back
+    in batches, so an interrupted crawl resumes with the URLs it had not
+    yet recorded.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db'):
+        self.db_path = db_path
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        self.create_tables(conn)
+        return conn
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_frontier (
+                url TEXT PRIMARY KEY,
+                source_id INTEGER REFERENCES data_sources(id),
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                last_status INTEGER,
+                last_error TEXT,
+                last_fetched TIMESTAMP,
+                next_due TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                interval_s INTEGER NOT NULL DEFAULT 86400,
+                fetch_count INTEGER NOT NULL DEFAULT 0,
+                unchanged_count INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS crawl_frontier_due ON crawl_frontier (next_due)')
+
+    def add(self, urls: Dict[str, int]) -> int:
+        """Add URLs by source id, due at once; known URLs keep their state. Returns how many were new"""
+
+        conn = self.connect()
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO crawl_frontier (url, source_id, interval_s) VALUES (?, ?, ?)',
+                [(url, source_id, INITIAL_INTERVAL_S) for url, source_id in urls.items()]
+            )
+            conn.commit()
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def validators(self, urls: Iterable[str]) -> Dict[str, PageValidators]:
+        """Cache validators of URLs fetched before"""
+
+        urls = list(urls)
+        found = {}
+        conn = self.connect()
+        try:
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                for url, etag, last_modified, content_hash in conn.execute(
+                    f"SELECT url, etag, last_modified, content_hash FROM crawl_frontier "
+                    f"WHERE url IN ({','.join('?' * len(batch))}) AND fetch_count > 0", batch
+                ):
+                    found[url] = PageValidators(etag, last_modified, content_hash)
+        finally:
+            conn.close()
+        return found
+
+    def due(self, limit: Optional[int] = None, source_id: Optional[int] = None) -> Dict[str, str]:
+        """Source names of the URLs whose next visit is due, longest overdue first"""
+
+        query = '''
+            SELECT f.url, s.source_name FROM crawl_frontier f JOIN data_sources s ON s.id = f.source_id
+            WHERE f.next_due <= datetime('now') AND s.is_active
+        '''
+        params: list = []
+        if source_id is not None:
+            query += " AND f.source_id = ?"
+            params.append(source_id)
+        query += " ORDER BY f.next_due LIMIT ?"
+        params.append(-1 if limit is None else limit)
+
+        conn = self.connect()
+        try:
+            return dict(conn.execute(query, params))
+        finally:
+            conn.close()
+
+    def record(self, pages: Iterable[PageResult]) -> None:
+        """Store fetch outcomes and schedule each page's next visit, in one transaction"""
+
+        pages = list(pages)
+        if not pages:
+            return
+        conn = self.connect()
+        try:
+            intervals = {}
+            for start in range(0, len(pages), 500):
+                batch = [page.url for page in pages[start:start + 500]]
+                intervals.update(conn.execute(
+                    f"SELECT url, interval_s FROM crawl_frontier WHERE url IN ({','.join('?' * len(batch))})", batch
+                ))
+            fetched, failed = [], []
+            for page in pages:
+                if page.ok:
+                    interval = next_interval(intervals.get(page.url, INITIAL_INTERVAL_S), page)
+                    fetched.append((page.etag, page.last_modified, page.content_hash, page.status,
+                                    interval, f"+{interval} seconds", int(page.not_modified or page.unchanged), page.url))
+                else:
+                    failed.append((page.status, page.error, FAILURE_RETRY_S, MAX_INTERVAL_S, page.url))
+
+            conn.executemany('''
+                UPDATE crawl_frontier SET etag = ?, last_modified = ?, content_hash = ?, last_status = ?,
+                    last_error = NULL, last_fetched = CURRENT_TIMESTAMP, interval_s = ?,
+                    next_due = datetime('now', ?), fetch_count = fetch_count + 1,
+                    unchanged_count = unchanged_count + ?, failures = 0
+                WHERE url = ?
+            ''', fetched)
+            conn.executemany('''
+                UPDATE crawl_frontier SET last_status = ?, last_error = ?, failures = failures + 1,
+                    next_due = datetime('now', '+' || MIN(? * (1 << MIN(failures, 20)), ?) || ' seconds')
+                WHERE url = ?
+            ''', failed)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        conn = self.connect()
+        try:
+            total, due, fetched, failing, unchanged, fetches = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(next_due <= datetime('now')), 0), COALESCE(SUM(fetch_count > 0), 0),
+                       COALESCE(SUM(failures > 0), 0), COALESCE(SUM(unchanged_count), 0), COALESCE(SUM(fetch_count), 0)
+                FROM crawl_frontier
+            ''').fetchone()
+        finally:
+            conn.close()
+        return {
+            "urls": total,
+            "due": due,
+            "fetched": fetched,
+            "failing": failing,
+            "fetches": fetches,
+            "unchanged_fetches": unchanged
+        }
@@ -8,22 +8,82 @@ import aiohttp
 import sqlite3
 import json
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Sequence, Tuple
 from datetime import datetime
 import hashlib
+import random
 from pathlib import Path
+from urllib.parse import urlsplit
 import logging
 from enterprise_nlp import nlp_engine
+from language_id import language_gate
+from analysis_results import EnterpriseScores
+from web_collector import PageResult, WebFetcher
+from crawl_frontier import CrawlFrontier
+from sentence_writer import SentenceWriter
+from template_engine import SAMPLE_VARIATIONS, TemplateSpace, sample_sharded
+from validation_queue import ValidationQueue
+from scholar_review import ScholarReview
+from collection_filters import MAX_WORDS, MIN_WORDS, Candidate, CascadeMetrics, FilterCascade, FilterStage, default_stages
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentences per batch handed from the splitter to the filter stages
+SPLIT_BATCH = 500
+
+# Collected sentences per database commit
+COMMIT_BATCH = 500
+
+# Fetched pages between data_sources statistics updates
+SOURCE_UPDATE_BATCH = 50
+
+# Texts between progress callbacks
+PROGRESS_BATCH = 100
+
+ProgressCallback = Callable[[int, int], None]
+
+# Sample Somali sentence templates for generate_sample_data
+SAMPLE_TEMPLATES = [
+    "Waxaa jira {noun} oo {adjective} ah",
+    "Dadka Soomaaliyeed waxay {verb} {object}",
+    "Magaalada {city} waxaa ku nool {number} qof",
+    "Dhaqanka Soomaaliyeed wuxuu ka kooban yahay {culture_element}",
+    "Waxbarashada waa muhiim u {group} oo dhan",
+    "Caafimaadka dadka waa mas'uuliyadda {institution}",
+    "Dhaqaalaha dalka wuxuu ku tiirsan yahay {economic_sector}",
+    "Siyaasadda Soomaaliya waxay u baahan tahay {political_need}",
+    "Bulshada Soomaaliyeed waxay door muhiim ah ka ciyaartaa {social_aspect}",
+    "Diinta Islaamka waxay baraysaa {islamic_teaching}"
+]
+
+# Word banks
+SAMPLE_WORD_BANKS = {
+    'noun': ['qof', 'guri', 'magaalo', 'dalka', 'bulshada', 'qoyska', 'shaqo', 'waxbarasho'],
+    'adjective': ['weyn', 'yar', 'qurux badan', 'muhiim', 'cusub', 'hore', 'fiican', 'xun'],
+    'verb': ['samayn', 'dhis', 'waxbarasho', 'caawin', 'horumar', 'ilaalin', 'kobcin', 'hagaajin'],
+    'object': ['dalka', 'bulshada', 'dhaqanka', 'luuqadda', 'waxbarashada', 'caafimaadka'],
+    'city': ['Muqdisho', 'Hargeysa', 'Kismaayo', 'Berbera', 'Burco', 'Bosaso', 'Gaalkacyo'],
+    'number': ['kun', 'laba kun', 'sadex kun', 'afar kun', 'shan kun', 'lix kun', 'toddobo kun'],
+    'culture_element': ['dhaqamada', 'caadadaha', 'hidaha', 'suugaanta', 'heesaha', 'ciyaaraha'],
+    'group': ['caruurta', 'dhalinyarada', 'dadka waaweyn', 'haweenka', 'ragga', 'bulshada'],
+    'institution': ['dawladda', 'isbitaalada', 'dugsiyada', 'hay\'adaha', 'ururrada'],
+    'economic_sector': ['beeraha', 'xoolaha', 'kalluunka', 'ganacsiga', 'warshadaha', 'dhaqaalaha'],
+    'political_need': ['midnimo', 'hoggaamin wanaagsan', 'nabadgelyo', 'cadaalad', 'horumarka'],
+    'social_aspect': ['waxbarashada', 'caafimaadka', 'dhaqaalaha', 'amniga', 'horumarinta'],
+    'islamic_teaching': ['walaaltinimo', 'naxariis', 'cadaalad', 'dulqaad', 'diinta', 'akhlaaq']
+}
+
 class SomaliDataCollector:
     """Enterprise-grade Somali data collection system"""
     
-    def __init__(self, db_path: str = "somali_dataset.db"):
+    def __init__(self, db_path: str = "somali_dataset.db", stages: Optional[Sequence[FilterStage]] = None):
         self.db_path = db_path
+        # Collection filter stages, the costliest attaching scores; None uses default_stages()
+        self.stages = stages
+        self.filter_metrics = CascadeMetrics()
+        self.frontier = CrawlFrontier(db_path)
         self.init_data_tables()
         
     def init_data_tables(self):
@@ -62,36 +122,11 @@ class SomaliDataCollector:
             )
         ''')
         
-        # Validation queue
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS validation_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                raw_data_id INTEGER,
-                text TEXT NOT NULL,
-                validation_status TEXT DEFAULT 'pending',
-                validator_id INTEGER,
-                validation_notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                validated_at TIMESTAMP,
-                FOREIGN KEY (raw_data_id) REFERENCES raw_data (id)
-            )
-        ''')
+        # Validation queue, drained by validation_queue.ValidationWorker
+        ValidationQueue.create_tables(conn)
         
-        # Scholar validation
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scholar_validations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sentence_id INTEGER,
-                scholar_email TEXT,
-                validation_score INTEGER,
-                cultural_score INTEGER,
-                grammar_score INTEGER,
-                notes TEXT,
-                approved BOOLEAN,
-                validated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (sentence_id) REFERENCES somali_sentences (id)
-            )
-        ''')
+        # Scholar validation and review sessions
+        ScholarReview.create_tables(conn)
         
         conn.commit()
         conn.close()
@@ -120,48 +155,214 @@ class SomaliDataCollector:
         finally:
             conn.close()
     
-    def collect_from_text_sources(self, text_sources: List[str]) -> Dict:
-        """Collect data from provided text sources"""
+    def collect_from_text_sources(self, text_sources: Iterable[str], scores_only: bool = True,
+                                  source: str = 'text_input', progress: Optional[ProgressCallback] = None) -> Dict:
+        """Collect data from provided text sources
+        
+        Streams sentences through split, filter and write stages joined by
+        bounded queues, so memory stays flat however many texts arrive (any
+        iterable works) and rows are committed every COMMIT_BATCH sentences.
+        Filtering is a cost-ordered cascade (length, character set, dedup,
+        language ID, score bound, full analysis) that drops each rejected
+        sentence at the cheapest stage able to reject it. With scores_only
+        (the default) the last stage uses the engine's scoring-only mode
+        instead of full analyses.
+        
+        progress(texts read, total texts) is called every PROGRESS_BATCH
+        texts and once at the end; total is 0 for iterables without a length.
+        An exception it raises stops the collection, leaving the sentences
+        committed so far in place.
+        """
+        
+        if progress is None:
+            return self._collect(((text, source) for text in text_sources), scores_only)
+        
+        total = len(text_sources) if hasattr(text_sources, '__len__') else 0
+        read = [0]
+        
+        def counted() -> Iterator[Tuple[str, str]]:
+            for text in text_sources:
+                yield text, source
+                read[0] += 1
+                if read[0] % PROGRESS_BATCH == 0:
+                    progress(read[0], total)
+        
+        result = self._collect(counted(), scores_only)
+        progress(read[0], total)
+        return result
+    
+    def _collect(self, sourced_texts: Iterable[Tuple[str, str]], scores_only: bool = True) -> Dict:
+        """Streaming collection of (text, source name) pairs"""
+        
+        sentences_found = [0]
+        
+        def sentence_batches() -> Iterator[List[Candidate]]:
+            batch = []
+            for source_text, source in sourced_texts:
+                batch.extend(Candidate(sentence, source) for sentence in self._extract_sentences(source_text))
+                while len(batch) >= SPLIT_BATCH:
+                    sentences_found[0] += SPLIT_BATCH
+                    yield batch[:SPLIT_BATCH]
+                    batch = batch[SPLIT_BATCH:]
+            if batch:
+                sentences_found[0] += len(batch)
+                yield batch
+        
+        stages = self.stages if self.stages is not None else default_stages(self.db_path, scores_only)
+        cascade = FilterCascade(stages, self.filter_metrics)
+        
+        # Written by the calling thread as survivors arrive
+        written = self._save_collected_data(
+            {'text': candidate.text, 'scores': candidate.scores, 'source': candidate.source}
+            for survivors in cascade.stream(sentence_batches()) for candidate in survivors
+        )
+        
+        filter_stages = cascade.report()
+        language = filter_stages.get('language', {"rejected": 0, "reasons": {}})
+        return {
+            'sentences_found': sentences_found[0],
+            'filter_stages': filter_stages,
+            'rejected_non_somali': language["rejected"],
+            'rejected_by_language': language["reasons"],
+            'total_collected': written['collected'],
+            'duplicates_skipped': written['duplicates'],
+            'high_quality_count': written['high_quality'],
+            'average_quality': written['quality_sum'] / written['collected'] if written['collected'] else 0,
+            'collected_by_source': written['by_source']
+        }
+    
+    def _score_sentence(self, sentence: str, min_score: Optional[float] = None,
+                        scores_only: bool = True) -> Optional[EnterpriseScores]:
+        """Score a sentence with the scoring-only fast path or the full analysis"""
         
-        collected_data = []
+        if scores_only:
+            return nlp_engine.score_text(sentence, min_score)
         
-        for source_text in text_sources:
-            # Split into sentences
-            sentences = self._extract_sentences(source_text)
-            
-            for sentence in sentences:
-                if self._is_valid_somali_sentence(sentence):
-                    # Analyze with enterprise NLP
-                    analysis = nlp_engine.analyze_text_enterprise(sentence)
-                    
-                    # Only keep high-quality sentences
-                    if analysis['enterprise_metrics']['overall_enterprise_score'] >= 70:
-                        collected_data.append({
-                            'text': sentence,
-                            'analysis': analysis,
-                            'source': 'text_input'
-                        })
-        
-        # Save to database
-        self._save_collected_data(collected_data)
+        return EnterpriseScores.from_analysis_dict(nlp_engine.analyze_many([sentence])[0])
+    
+    def collect_from_web_sources(self, urls: List[str], scores_only: bool = True,
+                                 fetcher: Optional[WebFetcher] = None) -> Dict:
+        """Collect data from web sources
+        
+        Pages are fetched concurrently and their text streams into the same
+        filter and write stages as collect_from_text_sources. Each host is a
+        data source, registered on first use, and each URL joins its crawl
+        frontier; pages fetched before are requested conditionally and only
+        re-analyzed when their text changed.
+        """
+        
+        urls = list(dict.fromkeys(urls))
+        fetched, unsupported = [], []
+        for url in urls:
+            parts = urlsplit(url)
+            (fetched if parts.scheme in ('http', 'https') and parts.hostname else unsupported).append(url)
+        
+        source_ids, sources = self._web_sources(fetched)
+        self.frontier.add({url: source_ids[source] for url, source in sources.items()})
+        
+        result = self._fetch_pages(sources, scores_only, fetcher)
+        result['failed_pages'] = {**dict.fromkeys(unsupported, 'Unsupported URL'), **result['failed_pages']}
+        result['pages_requested'] = len(urls)
+        result['success_rate'] = round(result['pages_fetched'] / len(urls), 3) if urls else 0.0
+        return result
+    
+    def crawl_due_sources(self, limit: Optional[int] = None, scores_only: bool = True,
+                          fetcher: Optional[WebFetcher] = None) -> Dict:
+        """Revisit the frontier URLs that are due, longest overdue first
+        
+        Outcomes are recorded every SOURCE_UPDATE_BATCH pages, so a crawl
+        that is interrupted resumes with the pages it had not recorded.
+        """
         
+        return self._fetch_pages(self.frontier.due(limit), scores_only, fetcher)
+    
+    def _fetch_pages(self, sources: Dict[str, str], scores_only: bool,
+                     fetcher: Optional[WebFetcher]) -> Dict:
+        """Fetch and collect pages given by URL with their source names
+        
+        Frontier state and data_sources statistics (last_scraped,
+        success_rate, total_collected) are written every SOURCE_UPDATE_BATCH
+        finished pages and at the end.
+        """
+        
+        fetcher = fetcher or WebFetcher()
+        urls = list(sources)
+        pages: Dict[str, PageResult] = {}
+        recorded = set()
+        
+        def record(collected: Optional[Dict[str, int]] = None) -> None:
+            finished = [page for page in list(pages.values()) if page.done and page.url not in recorded]
+            self.frontier.record(finished)
+            recorded.update(page.url for page in finished)
+            self._update_source_stats(pages, sources, collected)
+        
+        def page_texts() -> Iterator[Tuple[str, str]]:
+            for url, text in fetcher.stream(urls, pages, self.frontier.validators(urls)):
+                if text is not None:
+                    yield text, sources[url]
+                elif sum(page.done for page in list(pages.values())) - len(recorded) >= SOURCE_UPDATE_BATCH:
+                    record()
+        
+        result = self._collect(page_texts(), scores_only)
+        record(result['collected_by_source'])
+        
+        succeeded = sum(page.ok for page in pages.values())
         return {
-            'total_collected': len(collected_data),
-            'high_quality_count': len([d for d in collected_data if d['analysis']['enterprise_metrics']['overall_enterprise_score'] >= 80]),
-            'average_quality': sum(d['analysis']['enterprise_metrics']['overall_enterprise_score'] for d in collected_data) / len(collected_data) if collected_data else 0
+            'sources_processed': len(set(sources.values())),
+            'pages_requested': len(urls),
+            'pages_fetched': succeeded,
+            'pages_not_modified': sum(page.not_modified for page in pages.values()),
+            'pages_unchanged': sum(page.unchanged for page in pages.values()),
+            'bytes_fetched': sum(page.bytes for page in pages.values()),
+            'success_rate': round(succeeded / len(urls), 3) if urls else 0.0,
+            'failed_pages': {page.url: page.error for page in pages.values() if not page.ok},
+            **result
         }
     
-    def collect_from_web_sources(self, urls: List[str]) -> Dict:
-        """Collect data from web sources"""
+    def _web_sources(self, urls: List[str]) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """Ids of the hosts of the URLs, registered in data_sources if unknown, and each URL's host"""
         
-        # This would implement web scraping
-        # For now, return mock data structure
-        return {
-            'sources_processed': len(urls),
-            'total_collected': 0,
-            'success_rate': 0.0,
-            'note': 'Web scraping to be implemented'
-        }
+        sources = {url: urlsplit(url).hostname for url in urls}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO data_sources (source_name, source_type, url) VALUES (?, 'web', ?)",
+                list({source: (source, url) for url, source in reversed(sources.items())}.values())
+            )
+            conn.commit()
+            hosts = sorted(set(sources.values()))
+            source_ids = {}
+            for start in range(0, len(hosts), 500):
+                batch = hosts[start:start + 500]
+                source_ids.update(conn.execute(
+                    f"SELECT source_name, id FROM data_sources WHERE source_name IN ({','.join('?' * len(batch))})", batch
+                ))
+        finally:
+            conn.close()
+        return source_ids, sources
+    
+    def _update_source_stats(self, pages: Dict[str, PageResult], sources: Dict[str, str],
+                             collected: Optional[Dict[str, int]] = None) -> None:
+        """Write per-source success rates of finished pages, and optionally new sentence counts, in one batch"""
+        
+        attempted: Dict[str, List[int]] = {}
+        for url, page in list(pages.items()):
+            if not page.done:
+                continue
+            counts = attempted.setdefault(sources[url], [0, 0])
+            counts[0] += 1
+            counts[1] += page.ok
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany('''
+                UPDATE data_sources SET last_scraped = CURRENT_TIMESTAMP, success_rate = ?,
+                    total_collected = total_collected + ?
+                WHERE source_name = ?
+            ''', [(ok / total, (collected or {}).get(source, 0), source) for source, (total, ok) in attempted.items()])
+            conn.commit()
+        finally:
+            conn.close()
     
     def _extract_sentences(self, text: str) -> List[str]:
         """Extract individual sentences from text"""
@@ -182,116 +383,69 @@ class SomaliDataCollector:
         return cleaned_sentences
     
     def _is_valid_somali_sentence(self, sentence: str) -> bool:
-        """Quick validation if sentence is likely Somali"""
-        
-        # Check for Somali-specific indicators
-        somali_indicators = [
-            'waa', 'baa', 'ayaa', 'oo', 'iyo', 'ka', 'ku', 'la', 
-            'ah', 'si', 'ugu', 'soo', 'aan', 'waxa', 'waxaa'
-        ]
+        """Quick validation of a sentence the language gate identified as Somali"""
         
-        sentence_lower = sentence.lower()
-        indicator_count = sum(1 for indicator in somali_indicators if indicator in sentence_lower)
-        
-        # Must have at least 1 Somali indicator and reasonable length
-        return indicator_count >= 1 and 5 <= len(sentence.split()) <= 50
+        # Must have a reasonable length
+        return MIN_WORDS <= len(sentence.split()) <= MAX_WORDS
     
-    def _save_collected_data(self, data: List[Dict]):
-        """Save collected data to database"""
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for item in data:
-            try:
-                # Save to raw_data table
-                cursor.execute('''
-                    INSERT INTO raw_data (source_id, raw_text, language_detected, confidence_score, is_processed, is_valid)
-                    VALUES (1, ?, 'somali', ?, TRUE, TRUE)
-                ''', (item['text'], item['analysis']['enterprise_metrics']['overall_enterprise_score']))
-                
-                # Save to main sentences table
-                cursor.execute('''
-                    INSERT OR IGNORE INTO somali_sentences 
-                    (text, dialect, quality_score, source, validated, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    item['text'],
-                    item['analysis']['dialect_analysis']['primary_dialect'],
-                    item['analysis']['enterprise_metrics']['overall_enterprise_score'],
-                    item['source'],
-                    True,
-                    json.dumps(item['analysis']['enterprise_metrics'])
-                ))
-                
-            except sqlite3.IntegrityError:
-                # Sentence already exists, skip
-                continue
-        
-        conn.commit()
-        conn.close()
+    def _save_collected_data(self, data: Iterable[Dict]) -> Dict:
+        """Save collected data to database, committing every COMMIT_BATCH sentences
+        
+        Every sentence is logged to raw_data under its source's id; sentences
+        already in somali_sentences are skipped.
+        
+        Returns:
+            Number of new sentences and duplicates, the new sentences'
+            high-quality count and score sum, and new sentences by source
+        """
+        
+        written = {'collected': 0, 'duplicates': 0, 'high_quality': 0, 'quality_sum': 0.0, 'by_source': {}}
+        
+        def count(inserted: List[Dict]) -> None:
+            for row in inserted:
+                written['by_source'][row['source']] = written['by_source'].get(row['source'], 0) + 1
+                written['high_quality'] += row['quality_score'] >= 80
+                written['quality_sum'] += row['quality_score']
+        
+        rows = (
+            {
+                'text': item['text'],
+                'dialect': item['scores'].primary_dialect,
+                'quality_score': item['scores'].overall_enterprise_score,
+                'source': item['source'],
+                'validated': True,
+                'metadata': item['scores'].to_dict()
+            }
+            for item in data
+        )
+        totals = SentenceWriter(self.db_path, batch_size=COMMIT_BATCH, raw_data=True).write(rows, count)
+        written['collected'] = totals['written']
+        written['duplicates'] = totals['duplicates']
+        return written
     
-    def generate_sample_data(self, count: int = 1000) -> Dict:
-        """Generate sample Somali sentences for testing"""
-        
-        # Sample Somali sentence templates
-        sentence_templates = [
-            "Waxaa jira {noun} oo {adjective} ah",
-            "Dadka Soomaaliyeed waxay {verb} {object}",
-            "Magaalada {city} waxaa ku nool {number} qof",
-            "Dhaqanka Soomaaliyeed wuxuu ka kooban yahay {culture_element}",
-            "Waxbarashada waa muhiim u {group} oo dhan",
-            "Caafimaadka dadka waa mas'uuliyadda {institution}",
-            "Dhaqaalaha dalka wuxuu ku tiirsan yahay {economic_sector}",
-            "Siyaasadda Soomaaliya waxay u baahan tahay {political_need}",
-            "Bulshada Soomaaliyeed waxay door muhiim ah ka ciyaartaa {social_aspect}",
-            "Diinta Islaamka waxay baraysaa {islamic_teaching}"
-        ]
-        
-        # Word banks
-        word_banks = {
-            'noun': ['qof', 'guri', 'magaalo', 'dalka', 'bulshada', 'qoyska', 'shaqo', 'waxbarasho'],
-            'adjective': ['weyn', 'yar', 'qurux badan', 'muhiim', 'cusub', 'hore', 'fiican', 'xun'],
-            'verb': ['samayn', 'dhis', 'waxbarasho', 'caawin', 'horumar', 'ilaalin', 'kobcin', 'hagaajin'],
-            'object': ['dalka', 'bulshada', 'dhaqanka', 'luuqadda', 'waxbarashada', 'caafimaadka'],
-            'city': ['Muqdisho', 'Hargeysa', 'Kismaayo', 'Berbera', 'Burco', 'Bosaso', 'Gaalkacyo'],
-            'number': ['kun', 'laba kun', 'sadex kun', 'afar kun', 'shan kun', 'lix kun', 'toddobo kun'],
-            'culture_element': ['dhaqamada', 'caadadaha', 'hidaha', 'suugaanta', 'heesaha', 'ciyaaraha'],
-            'group': ['caruurta', 'dhalinyarada', 'dadka waaweyn', 'haweenka', 'ragga', 'bulshada'],
-            'institution': ['dawladda', 'isbitaalada', 'dugsiyada', 'hay\'adaha', 'ururrada'],
-            'economic_sector': ['beeraha', 'xoolaha', 'kalluunka', 'ganacsiga', 'warshadaha', 'dhaqaalaha'],
-            'political_need': ['midnimo', 'hoggaamin wanaagsan', 'nabadgelyo', 'cadaalad', 'horumarka'],
-            'social_aspect': ['waxbarashada', 'caafimaadka', 'dhaqaalaha', 'amniga', 'horumarinta'],
-            'islamic_teaching': ['walaaltinimo', 'naxariis', 'cadaalad', 'dulqaad', 'diinta', 'akhlaaq']
-        }
+    def generate_sample_data(self, count: int = 1000, progress: Optional[ProgressCallback] = None,
+                             seed: Optional[int] = None, processes: Optional[int] = None) -> Dict:
+        """Generate sample Somali sentences for testing
         
-        import random
+        Sentences are drawn without replacement from the combination space
+        of SAMPLE_TEMPLATES, so none is generated twice; a count larger than
+        the space yields the whole space. The same seed and count always
+        give the same sentences; without a seed one is picked and reported.
+        progress counts generated sentences collected.
+        """
         
-        generated_sentences = []
-        
-        for i in range(count):
-            template = random.choice(sentence_templates)
-            
-            # Replace placeholders with random words
-            sentence = template
-            for placeholder, words in word_banks.items():
-                if f'{{{placeholder}}}' in sentence:
-                    sentence = sentence.replace(f'{{{placeholder}}}', random.choice(words))
-            
-            # Add some variation
-            if random.random() < 0.3:  # 30% chance to add "si kastaba"
-                sentence = f"Si kastaba, {sentence.lower()}"
-            
-            if random.random() < 0.2:  # 20% chance to add "waa run"
-                sentence = f"{sentence}. Waa run."
-            
-            generated_sentences.append(sentence)
+        seed = seed if seed is not None else random.randrange(2 ** 32)
+        space = TemplateSpace.from_banks(SAMPLE_TEMPLATES, SAMPLE_WORD_BANKS, SAMPLE_VARIATIONS)
+        generated_sentences = [sentence for _, sentence in sample_sharded(space, count, seed, processes=processes)]
         
         # Process and save generated sentences
-        collection_result = self.collect_from_text_sources(generated_sentences)
+        collection_result = self.collect_from_text_sources(generated_sentences, progress=progress)
         
         return {
-            'generated_count': count,
+            'requested_count': count,
+            'seed': seed,
+            'combination_space': space.size,
+            'generated_count': len(generated_sentences),
             'collected_count': collection_result['total_collected'],
             'high_quality_count': collection_result['high_quality_count'],
             'average_quality': collection_result['average_quality']
@@ -339,58 +493,66 @@ class SomaliDataCollector:
             'recent_additions_24h': recent_additions
         }
     
-    def bulk_validate_sentences(self, sentences: List[str], validator_id: int = 1) -> Dict:
-        """Bulk validate sentences for quality"""
+    def bulk_validate_sentences(self, sentences: List[str], validator_id: int = 1,
+                                scores_only: bool = True, progress: Optional[ProgressCallback] = None) -> Dict:
+        """Bulk validate sentences for quality
+        
+        progress(sentences checked, total) is called every PROGRESS_BATCH
+        sentences and before saving; an exception it raises stops the
+        validation before anything is saved.
+        """
         
         validated_sentences = []
         
-        for sentence in sentences:
+        # Reject non-Somali input before any scoring
+        somali_indices, rejected_by_language = language_gate.split(sentences)
+        
+        for checked, i in enumerate(somali_indices):
+            if progress is not None and checked and checked % PROGRESS_BATCH == 0:
+                progress(checked, len(somali_indices))
+            sentence = sentences[i]
             if self._is_valid_somali_sentence(sentence):
-                analysis = nlp_engine.analyze_text_enterprise(sentence)
+                # Every score feeds the average, so no threshold pruning here
+                scores = self._score_sentence(sentence, scores_only=scores_only)
                 
                 validated_sentences.append({
                     'text': sentence,
-                    'quality_score': analysis['enterprise_metrics']['overall_enterprise_score'],
-                    'is_valid': analysis['enterprise_metrics']['overall_enterprise_score'] >= 70,
-                    'analysis': analysis
+                    'quality_score': scores.overall_enterprise_score,
+                    'is_valid': scores.overall_enterprise_score >= 70,
+                    'scores': scores
                 })
         
+        if progress is not None:
+            progress(len(somali_indices), len(somali_indices))
+        
         # Save validation results
-        self._save_validation_results(validated_sentences, validator_id)
+        saved = self._save_validation_results(validated_sentences, validator_id)
         
         return {
+            'rejected_non_somali': sum(rejected_by_language.values()),
+            'rejected_by_language': rejected_by_language,
             'total_validated': len(validated_sentences),
             'valid_sentences': len([s for s in validated_sentences if s['is_valid']]),
             'invalid_sentences': len([s for s in validated_sentences if not s['is_valid']]),
+            'saved_sentences': saved['written'],
+            'duplicate_sentences': saved['duplicates'],
             'average_quality': sum(s['quality_score'] for s in validated_sentences) / len(validated_sentences) if validated_sentences else 0
         }
     
-    def _save_validation_results(self, validated_sentences: List[Dict], validator_id: int):
-        """Save validation results to database"""
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for sentence_data in validated_sentences:
-            if sentence_data['is_valid']:
-                try:
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO somali_sentences 
-                        (text, dialect, quality_score, source, validated, metadata)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        sentence_data['text'],
-                        sentence_data['analysis']['dialect_analysis']['primary_dialect'],
-                        sentence_data['quality_score'],
-                        'bulk_validation',
-                        True,
-                        json.dumps(sentence_data['analysis']['enterprise_metrics'])
-                    ))
-                except sqlite3.IntegrityError:
-                    continue
-        
-        conn.commit()
-        conn.close()
+    def _save_validation_results(self, validated_sentences: List[Dict], validator_id: int) -> Dict:
+        """Save valid sentences to database; returns the writer's counts"""
+        
+        return SentenceWriter(self.db_path).write(
+            {
+                'text': sentence_data['text'],
+                'dialect': sentence_data['scores'].primary_dialect,
+                'quality_score': sentence_data['quality_score'],
+                'source': 'bulk_validation',
+                'validated': True,
+                'metadata': sentence_data['scores'].to_dict()
+            }
+            for sentence_data in validated_sentences if sentence_data['is_valid']
+        )
 
 # Initialize global data collector
 data_collector = SomaliDataCollector()
\ No newline at end of file
@@ -0,0 +1,439 @@
+"""
+Hashed Character N-gram Dialect Model
+Linear dialect classifier over hashed character n-grams, trained from labeled
+rows of somali_sentences and evaluated on whole batches with NumPy
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_PATH = os.environ.get(
+    'SOMALI_DIALECT_MODEL', os.path.join(BASE_DIR, 'models', 'dialect_model.npz')
+)
+
+# Bump when the feature hashing changes so old weight files are rejected
+MODEL_FORMAT = 1
+
+DEFAULT_HASH_BITS = 16
+DEFAULT_ORDERS = (2, 3, 4)
+
+# Texts are featurized in slices of about this many characters to bound memory
+BATCH_CHARS = 1 << 20
+
+# 32-bit FNV prime and murmur3 mixing constants
+_PRIME = np.uint32(0x01000193)
+_ORDER_SALT = 0x9E3779B9
+_MASK_32 = (1 << 32) - 1
+_MIX_1 = np.uint32(0x85EBCA6B)
+_MIX_2 = np.uint32(0xC2B2AE35)
+
+
+def canonical_dialect(label: Optional[str]) -> Optional[str]:
+    """Map stored labels ('Northern Somali', 'northern') to one key"""
+
+    if not label:
+        return None
+    key = label.strip().lower()
+    if key.endswith(' somali'):
+        key = key[:-len(' somali')].strip()
+    if not key or key == 'unknown':
+        return None
+    return key
+
+
+def dialect_display_name(key: str) -> str:
+    """Human readable name used by the public API ('northern' -> 'Northern Somali')"""
+    return "Unknown" if key == "Unknown" else f"{key.title()} Somali"
+
+
+class HashedNgrams:
+    """Hashed character n-grams of every word, padded with word boundaries
+
+    N-grams never cross a word boundary, so the features of a text are the sum
+    of the features of its words; any split at whitespace adds up exactly.
+    """
+
+    def __init__(self, hash_bits: int = DEFAULT_HASH_BITS, orders: Sequence[int] = DEFAULT_ORDERS):
+        self.hash_bits = hash_bits
+        self.orders = tuple(orders)
+        self._shift = np.uint32(32 - hash_bits)
+
+    @property
+    def n_features(self) -> int:
+        return 1 << self.hash_bits
+
+    def transform(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (feature ids, owning text index) for every n-gram in the batch"""
+
+        pieces = list(self.transform_by_order(texts))
+        if not pieces:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        return np.concatenate([ids for ids, _ in pieces]), np.concatenate([owners for _, owners in pieces])
+
+    def transform_by_order(self, texts: Sequence[str]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (feature ids, owners) per n-gram order; owners are ascending"""
+
+        # NUL separates texts, so NULs inside one become spaces; every non-letter acts as a word boundary
+        joined = '\x00' + '\x00'.join(text.replace('\x00', ' ') for text in texts).lower() + '\x00'
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+
+        letter = ((codes >= 97) & (codes <= 122)) | (codes == 39) | (codes >= 0xC0)
+        owner = np.cumsum(codes == 0) - 1
+
+        # Collapse separator runs into a single boundary symbol
+        keep = letter.copy()
+        keep[1:] |= letter[:-1]
+        keep[0] = True
+        letter = letter[keep]
+        owner = owner[keep].astype(np.int32)
+        chars = np.where(letter, codes[keep], 32).astype(np.uint32)
+        nonletters = np.cumsum(~letter, dtype=np.int32)
+
+        # Every valid n-gram holds a letter at its first or second position
+        owner_of_start = np.where(letter[:-1], owner[:-1], owner[1:])
+
+        hashes = chars
+        for order in range(2, max(self.orders) + 1):
+            hashes = hashes[:-1] * _PRIME + chars[order - 1:]
+            if order not in self.orders:
+                continue
+
+            owners = owner_of_start[:len(hashes)]
+            if order > 2:
+                # Interior characters must all be letters
+                valid = nonletters[order - 2:order - 2 + len(hashes)] == nonletters[:len(hashes)]
+                yield self._finalize(hashes[valid], order), owners[valid]
+            else:
+                yield self._finalize(hashes, order), owners
+
+    def _finalize(self, values: np.ndarray, order: int) -> np.ndarray:
+        # Murmur3 finalizer; the top bits select the feature
+        h = values + np.uint32((_ORDER_SALT * order) & _MASK_32)
+        h ^= h >> np.uint32(16)
+        h *= _MIX_1
+        h ^= h >> np.uint32(13)
+        h *= _MIX_2
+        h ^= h >> np.uint32(16)
+        return (h >> self._shift).astype(np.int32)
+
+
+def _iter_slices(texts: Sequence[str], max_chars: int = BATCH_CHARS) -> Iterator[Tuple[int, int]]:
+    ends = np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) + 1)
+    start = 0
+    while start < len(texts):
+        limit = (ends[start - 1] if start else 0) + max_chars
+        end = max(int(np.searchsorted(ends, limit, side='right')), start + 1)
+        yield start, end
+        start = end
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class DialectModel:
+    """Multinomial logistic regression over L1-normalized hashed n-grams
+
+    Weights are a (classes x 2**hash_bits) float32 matrix; inference is a
+    sparse-dense product done with gathers and bincounts over the batch.
+    Probabilities are temperature-scaled on held-out rows, so the reported
+    confidence tracks the observed accuracy.
+    """
+
+    def __init__(self, classes: Sequence[str], weights: np.ndarray, bias: np.ndarray,
+                 temperature: float = 1.0, hash_bits: int = DEFAULT_HASH_BITS,
+                 orders: Sequence[int] = DEFAULT_ORDERS, metadata: Optional[Dict] = None):
+        self.classes = tuple(classes)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self._columns = np.ascontiguousarray(self.weights.T)  # one row of class weights per feature
+        self.bias = np.asarray(bias, dtype=np.float64)
+        self.temperature = float(temperature)
+        self.featurizer = HashedNgrams(hash_bits, orders)
+        self.metadata = metadata or {}
+        self._fingerprint: Optional[str] = None
+
+        if self.weights.shape != (len(self.classes), self.featurizer.n_features):
+            raise ValueError(f"Weight matrix shape {self.weights.shape} does not match the model")
+
+    @property
+    def fingerprint(self) -> str:
+        """Short content hash of the parameters; part of the analysis cache key"""
+
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for part in (self.weights, self.bias, np.array([self.temperature]), np.array(self.featurizer.orders)):
+                digest.update(np.ascontiguousarray(part).tobytes())
+            digest.update('|'.join(self.classes).encode('utf-8'))
+            digest.update(str(self.featurizer.hash_bits).encode('utf-8'))
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def feature_sums(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw per-text weight sums and n-gram counts (additive across text pieces)"""
+
+        sums = np.zeros((len(texts), len(self.classes)))
+        counts = np.zeros(len(texts))
+
+        for start, end in _iter_slices(texts):
+            n = end - start
+            for ids, owners in self.featurizer.transform_by_order(texts[start:end]):
+                if not len(ids):
+                    continue
+                # Owners are sorted, so each text's n-grams form one run
+                per_text = np.bincount(owners, minlength=n)
+                present = np.flatnonzero(per_text) + start
+                offsets = np.cumsum(per_text) - per_text
+                sums[present] += np.add.reduceat(
+                    self._columns[ids], offsets[present - start], axis=0, dtype=np.float64
+                )
+                counts[start:end] += per_text
+
+        return sums, counts
+
+    def probabilities_from_sums(self, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Calibrated class probabilities; rows without any n-gram are all zero"""
+
+        present = counts > 0
+        logits = sums / np.maximum(counts, 1)[:, None] + self.bias
+        probabilities = _softmax(logits / self.temperature)
+        probabilities[~present] = 0.0
+        return probabilities
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        return self.probabilities_from_sums(*self.feature_sums(texts))
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Return (dialect key, confidence 0-100) per text; 'Unknown' without letters"""
+        return self.predictions_from_probabilities(self.predict_proba(texts))
+
+    def predictions_from_probabilities(self, probabilities: np.ndarray) -> List[Tuple[str, float]]:
+        best = probabilities.argmax(axis=1)
+        confidence = np.round(probabilities[np.arange(len(best)), best] * 100, 1)
+        classes = self.classes
+        return [
+            (classes[b], conf) if conf > 0 else ("Unknown", 0)
+            for b, conf in zip(best.tolist(), confidence.tolist())
+        ]
+
+    def save(self, path: str = DEFAULT_MODEL_PATH) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # np.savez appends '.npz' to names without it, so write through a handle
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                format=np.array(MODEL_FORMAT),
+                classes=np.array(self.classes),
+                weights=self.weights,
+                bias=self.bias,
+                temperature=np.array(self.temperature),
+                hash_bits=np.array(self.featurizer.hash_bits),
+                orders=np.array(self.featurizer.orders),
+                metadata=np.array(json.dumps(self.metadata))
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> 'DialectModel':
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format']) != MODEL_FORMAT:
+                raise ValueError(f"Unsupported dialect model format {int(data['format'])}")
+            return cls(
+                classes=[str(c) for c in data['classes']],
+                weights=data['weights'],
+                bias=data['bias'],
+                temperature=float(data['temperature']),
+                hash_bits=int(data['hash_bits']),
+                orders=[int(o) for o in data['orders']],
+                metadata=json.loads(str(data['metadata']))
+            )
+
+
+def fit_temperature(logits: np.ndarray, targets: np.ndarray) -> float:
+    """Temperature minimizing the negative log-likelihood of held-out rows"""
+
+    best_temperature, best_nll = 1.0, float('inf')
+    rows = np.arange(len(targets))
+    for temperature in np.exp(np.linspace(np.log(0.05), np.log(20.0), 120)):
+        probabilities = _softmax(logits / temperature)
+        nll = -np.log(probabilities[rows, targets] + 1e-12).mean()
+        if nll < best_nll:
+            best_temperature, best_nll = float(temperature), nll
+    return best_temperature
+
+
+def train_dialect_model(texts: Sequence[str], labels: Sequence[str], hash_bits: int = DEFAULT_HASH_BITS,
+                        orders: Sequence[int] = DEFAULT_ORDERS, epochs: int = 150,
+                        learning_rate: float = 0.5, l2: float = 1e-6,
+                        validation_fraction: float = 0.2, seed: int = 13) -> DialectModel:
+    """
+    Train the dialect model with full-batch Adam on softmax cross-entropy
+
+    Args:
+        texts: Training sentences
+        labels: Dialect label per sentence (any spelling canonical_dialect accepts)
+        validation_fraction: Share of rows held out for temperature calibration
+
+    Returns:
+        Trained, calibrated DialectModel
+    """
+
+    pairs = [(text, canonical_dialect(label)) for text, label in zip(texts, labels)]
+    pairs = [(text, label) for text, label in pairs if label and text and text.strip()]
+    classes = sorted({label for _, label in pairs})
+    if len(classes) < 2:
+        raise ValueError("Dialect training needs labeled sentences from at least two dialects")
+
+    class_index = {label: i for i, label in enumerate(classes)}
+    texts = [text for text, _ in pairs]
+    targets = np.array([class_index[label] for _, label in pairs])
+
+    featurizer = HashedNgrams(hash_bits, orders)
+    n_features, n_classes = featurizer.n_features, len(classes)
+
+    # Hold out a random slice for calibration when there is enough data
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(texts))
+    n_holdout = int(len(texts) * validation_fraction) if len(texts) >= 50 else 0
+    holdout, train = order[:n_holdout], order[n_holdout:]
+
+    def featurize(indices):
+        ids, owners = featurizer.transform([texts[i] for i in indices])
+        counts = np.bincount(owners, minlength=len(indices)).astype(np.float64)
+        return ids, owners, np.maximum(counts, 1)
+
+    ids, owners, counts = featurize(train)
+    y = np.zeros((len(train), n_classes))
+    y[np.arange(len(train)), targets[train]] = 1.0
+    scale = 1.0 / counts[owners]
+
+    weights = np.zeros((n_classes, n_features))
+    bias = np.zeros(n_classes)
+    params = [weights, bias]
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+    def logits_for(ids, owners, counts, n):
+        sums = np.stack([np.bincount(owners, weights=row[ids], minlength=n) for row in weights], axis=1)
+        return sums / counts[:, None] + bias
+
+    for step in range(1, epochs + 1):
+        error = (_softmax(logits_for(ids, owners, counts, len(train))) - y) / len(train)
+        grad_weights = np.stack([
+            np.bincount(ids, weights=error[owners, c] * scale, minlength=n_features)
+            for c in range(n_classes)
+        ]) + l2 * weights
+        grads = [grad_weights, error.sum(axis=0)]
+
+        for param, grad, (m, v) in zip(params, grads, moments):
+            m *= beta1
+            m += (1 - beta1) * grad
+            v *= beta2
+            v += (1 - beta2) * grad * grad
+            param -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+
+    metadata = {'training_rows': len(train), 'holdout_rows': n_holdout}
+    temperature = 1.0
+    if n_holdout:
+        h_ids, h_owners, h_counts = featurize(holdout)
+        holdout_logits = logits_for(h_ids, h_owners, h_counts, n_holdout)
+        temperature = fit_temperature(holdout_logits, targets[holdout])
+        accuracy = float((holdout_logits.argmax(axis=1) == targets[holdout]).mean())
+        metadata['holdout_accuracy'] = round(accuracy, 4)
+
+    metadata['temperature'] = round(temperature, 4)
+    return DialectModel(classes, weights, bias, temperature, hash_bits, orders, metadata)
+
+
+def load_training_data(db_path: str = "somali_dataset.db") -> Tuple[List[str], List[str]]:
+    """Labeled (text, dialect) rows from somali_sentences"""
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT text, dialect FROM somali_sentences
+        WHERE dialect IS NOT NULL AND dialect != '' AND text IS NOT NULL
+    ''')
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [text for text, _ in rows], [dialect for _, dialect in rows]
+
+
+def train_from_database(db_path: str = "somali_dataset.db", path: str = DEFAULT_MODEL_PATH,
+                        **kwargs) -> DialectModel:
+    """Train from the sentence table and write the weights to path"""
+
+    texts, labels = load_training_data(db_path)
+    model = train_dialect_model(texts, labels, **kwargs)
+    model.save(path)
+
+    logger.info(f"Trained dialect model on {len(texts)} rows ({', '.join(model.classes)}) -> {path}")
+    return model
+
+
+class DialectModelProvider:
+    """Lazily loads the dialect model; get() returns None when none is trained"""
+
+    def __init__(self, path: str = DEFAULT_MODEL_PATH):
+        self.path = path
+        self._current: Optional[DialectModel] = None
+        self._checked = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[DialectModel]:
+        if not self._checked:
+            with self._lock:
+                if not self._checked:
+                    if os.path.exists(self.path):
+                        try:
+                            self._current = DialectModel.load(self.path)
+                        except (OSError, ValueError, KeyError) as e:
+                            logger.warning(f"Ignoring unreadable dialect model {self.path}: {e}")
+                    self._checked = True
+        return self._current
+
+    def reload(self, path: Optional[str] = None) -> DialectModel:
+        model = DialectModel.load(path or self.path)
+        with self._lock:
+            if path:
+                self.path = path
+            self._current = model
+            self._checked = True
+        return model
+
+    def set(self, model: Optional[DialectModel]) -> None:
+        with self._lock:
+            self._current = model
+            self._checked = True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Train the Somali dialect model from the sentence database")
+    parser.add_argument("--db", default="somali_dataset.db")
+    parser.add_argument("--out", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--hash-bits", type=int, default=DEFAULT_HASH_BITS)
+    parser.add_argument("--epochs", type=int, default=150)
+    args = parser.parse_args()
+
+    trained = train_from_database(args.db, args.out, hash_bits=args.hash_bits, epochs=args.epochs)
+    print(f"Classes: {', '.join(trained.classes)}")
+    print(f"Metadata: {trained.metadata}")
@@ -0,0 +1,357 @@
+"""
+Streaming Document Analyzer
+Scores very large Somali texts sentence by sentence with bounded memory
+"""
+
+import os
+import re
+import codecs
+import heapq
+import hashlib
+from collections import Counter
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from analysis_results import DocumentAnalysis, EnterpriseScores, normalize_fields
+from text_features import SENTENCE_SPLIT, TextFeatures
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# A segment without any sentence boundary is force-split past this size
+MAX_PENDING_CHARS = 1024 * 1024
+
+# Sentence terminators followed by whitespace; no lexicon term or grammar
+# pattern spans such a boundary, so per-segment results add up exactly
+SEGMENT_BOUNDARY = re.compile(r'[.!?]+\s')
+
+DocumentSource = Union[str, os.PathLike, IO]
+
+
+def iter_text_chunks(source: DocumentSource, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     encoding: str = 'utf-8') -> Iterator[str]:
+    """Yield decoded text chunks from a file path or a binary/text stream"""
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_text_chunks(f, chunk_size, encoding)
+        return
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_segments(chunks: Iterable[str], max_pending: int = MAX_PENDING_CHARS) -> Iterator[str]:
+    """Re-cut a chunk stream into contiguous sentence segments"""
+
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+
+        start = 0
+        for match in SEGMENT_BOUNDARY.finditer(pending):
+            yield pending[start:match.end()]
+            start = match.end()
+        pending = pending[start:]
+
+        # Text with no boundary at all is cut at the last whitespace
+        while len(pending) > max_pending:
+            cut = max(pending.rfind(' ', 0, max_pending), pending.rfind('\n', 0, max_pending)) + 1
+            if cut <= 0:
+                cut = max_pending
+            yield pending[:cut]
+            pending = pending[cut:]
+
+    if pending:
+        yield pending
+
+
+class DistinctCounter:
+    """Exact distinct count up to k items, then a k-minimum-values estimate"""
+
+    HASH_SPACE = float(2 ** 64)
+
+    def __init__(self, k: int = 8192):
+        self.k = k
+        self.exact: Optional[Set[str]] = set()
+        self._heap: List[int] = []       # negated k smallest hashes (max-heap)
+        self._members: Set[int] = set()
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def add(self, value: str) -> None:
+        if self.exact is not None:
+            self.exact.add(value)
+            if len(self.exact) > self.k:
+                for item in self.exact:
+                    self._add_hash(self._hash(item))
+                self.exact = None
+            return
+        self._add_hash(self._hash(value))
+
+    def _add_hash(self, value: int) -> None:
+        if value in self._members:
+            return
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, -value)
+            self._members.add(value)
+        elif value < -self._heap[0]:
+            removed = -heapq.heapreplace(self._heap, -value)
+            self._members.discard(removed)
+            self._members.add(value)
+
+    @property
+    def is_exact(self) -> bool:
+        return self.exact is not None
+
+    def count(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        kth_smallest = -self._heap[0] / self.HASH_SPACE
+        return int(round((self.k - 1) / kth_smallest))
+
+
+class CitationTracker:
+    """Streaming equivalent of the engine's citation pattern
+
+    Mirrors re.search(r'\\d{4}|\\(.*\\)|\\[.*\\]') over the whole text: the
+    bracket alternatives only match within a single line.
+    """
+
+    def __init__(self):
+        self.found = False
+        self.open_paren = False
+        self.open_bracket = False
+
+    def feed(self, segment: str) -> None:
+        if self.found:
+            return
+        if re.search(r'\d{4}', segment):
+            self.found = True
+            return
+
+        lines = segment.split('\n')
+        for i, line in enumerate(lines):
+            if i > 0:
+                self.open_paren = self.open_bracket = False
+            if self._closes(line, '(', ')', self.open_paren) or self._closes(line, '[', ']', self.open_bracket):
+                self.found = True
+                return
+            self.open_paren = self.open_paren or '(' in line
+            self.open_bracket = self.open_bracket or '[' in line
+
+    @staticmethod
+    def _closes(line: str, opener: str, closer: str, already_open: bool) -> bool:
+        if already_open:
+            return closer in line
+        start = line.find(opener)
+        return start >= 0 and closer in line[start + 1:]
+
+
+class DocumentTotals:
+    """Running aggregates for one document
+
+    Segments are buffered into blocks of a few kilobytes and each block is
+    processed with whole-block string operations; block edges fall on segment
+    boundaries, so the totals equal those of the full text.
+    """
+
+    def __init__(self, lex, dialect_model=None):
+        self.lex = lex
+        self.dialect_model = dialect_model
+        self.text_length = 0
+        self.word_count = 0
+        self.word_chars = 0
+        self.sentence_count = 0
+        self.sentence_words = 0
+        self.segment_count = 0
+        self.svo_matches = 0
+        self.has_punctuation = False
+        self.found: Set[str] = set()
+        self.word_forms: Dict[str, int] = dict.fromkeys(lex.morphology.forms, 0)
+        self.citations = CitationTracker()
+
+        self.vocabulary_chars = 0
+        self.complex_words = 0
+        self.professional_hits = 0
+        self.category_words: Dict[str, Counter] = {}
+        self.distinct_words = DistinctCounter()
+
+        # Dialect model features add up across word boundaries
+        self.dialect_sums = None
+        self.dialect_ngrams = None
+
+    def add_block(self, block: str) -> None:
+        lex = self.lex
+        block_lower = block.lower()
+        words = block.split()
+
+        self.text_length += len(block)
+        self.word_count += len(words)
+        self.word_chars += sum(map(len, words))
+
+        # Vocabulary statistics over distinct normalized words
+        normalized_counts = Counter(word.strip('.,!?;:') for word in block_lower.split())
+        classify = lex.morphology.classify
+        for word, count in normalized_counts.items():
+            for form in classify(word):
+                self.word_forms[form] += count
+            self.distinct_words.add(word)
+            self.vocabulary_chars += len(word) * count
+            if len(word) > 6:
+                self.complex_words += count
+            for category in lex.categories_for(word):
+                self.professional_hits += count
+                self.category_words.setdefault(category, Counter())[word] += count
+
+        # Sentence lengths: terminators separate sentences inside tokens too
+        self.sentence_count += sum(1 for sentence in SENTENCE_SPLIT.split(block) if sentence.strip())
+        self.sentence_words += len(SENTENCE_SPLIT.sub(' ', block).split())
+
+        self.found |= lex.scan(block_lower)
+        self.svo_matches += len(lex.svo_regex.findall(block_lower))
+        if not self.has_punctuation:
+            self.has_punctuation = any(p in block for p in lex.sentence_enders)
+        self.citations.feed(block)
+
+        if self.dialect_model is not None:
+            sums, counts = self.dialect_model.feature_sums([block])
+            if self.dialect_sums is None:
+                self.dialect_sums, self.dialect_ngrams = sums, counts
+            else:
+                self.dialect_sums += sums
+                self.dialect_ngrams += counts
+
+    def dialect_prediction(self) -> Optional[Tuple[str, float]]:
+        """Model prediction for the whole document, if a model is in use"""
+
+        model = self.dialect_model
+        if model is None or self.dialect_sums is None:
+            return None
+        probabilities = model.probabilities_from_sums(self.dialect_sums, self.dialect_ngrams)
+        return model.predictions_from_probabilities(probabilities)[0]
+
+
+class DocumentAnalyzer:
+    """Streams a document through the engine with bounded memory
+
+    Only counters, the set of matched lexicon terms and a bounded distinct-word
+    sketch are kept, so memory does not grow with the document. Professional
+    vocabulary hits list each matched word once, with the total in 'count'.
+    """
+
+    BLOCK_CHARS = 32 * 1024
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def iter_events(self, source: DocumentSource, fields: Optional[Iterable[str]] = None,
+                    per_sentence: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE
+                    ) -> Iterator[Tuple]:
+        """
+        Stream a document through the engine
+
+        Yields ('sentence', index, text, EnterpriseScores) for every sentence when
+        per_sentence is set, then ('document', DocumentAnalysis) at the end.
+        """
+
+        fields = normalize_fields(fields)
+        engine = self.engine
+        lex = engine.lexicon  # one snapshot for the whole document
+        totals = DocumentTotals(lex, engine.dialect_model)
+
+        block: List[str] = []
+        block_chars = 0
+        sentence_index = 0
+
+        for segment in iter_segments(iter_text_chunks(source, chunk_size)):
+            totals.segment_count += 1
+            block.append(segment)
+            block_chars += len(segment)
+            if block_chars >= self.BLOCK_CHARS:
+                totals.add_block(''.join(block))
+                block = []
+                block_chars = 0
+
+            if per_sentence:
+                sentence = segment.strip()
+                if sentence:
+                    yield ('sentence', sentence_index, sentence, engine.score_text(sentence, cached=False))
+                    sentence_index += 1
+
+        if block:
+            totals.add_block(''.join(block))
+
+        if totals.sentence_count == 0:
+            raise ValueError("Document contains no sentences")
+
+        yield ('document', self._build_analysis(totals, fields))
+
+    def _build_analysis(self, totals: DocumentTotals, fields: Tuple[str, ...]) -> DocumentAnalysis:
+        """Turn the running aggregates into the engine's analysis sections"""
+
+        engine = self.engine
+        lex = totals.lex
+        found = totals.found
+        category_words = totals.category_words
+
+        analysis = DocumentAnalysis(totals.text_length, totals.word_count, fields)
+        analysis.segment_count = totals.segment_count
+        analysis.unique_words_exact = totals.distinct_words.is_exact
+
+        analysis.grammar_analysis = engine._grammar_section(
+            svo_matches=totals.svo_matches,
+            particles_found=sum(1 for particle in lex.particles if particle in found),
+            has_proper_punctuation=totals.has_punctuation,
+            word_forms=totals.word_forms,
+            sentence_words=totals.sentence_words,
+            sentence_count=totals.sentence_count
+        )
+        analysis.vocabulary_analysis = engine._vocabulary_section(
+            professional_hits=totals.professional_hits,
+            category_hits=[
+                (category, list(category_words[category]), sum(category_words[category].values()))
+                for category in lex.professional_categories if category in category_words
+            ],
+            unique_words=totals.distinct_words.count(),
+            total_words=totals.word_count,
+            word_chars=totals.vocabulary_chars,
+            complex_words=totals.complex_words
+        )
+        # Term-based analyzers only need the matched terms of the whole document
+        terms = TextFeatures('', lex, found)
+        analysis.dialect_analysis = engine._analyze_dialect_advanced(
+            terms, prediction=totals.dialect_prediction()
+        )
+        analysis.cultural_analysis = engine._analyze_cultural_context(terms)
+        analysis.readability_analysis = engine._readability_section(
+            totals.sentence_count, totals.word_count, totals.word_chars
+        )
+        analysis.professional_score = engine._professional_section(lex, found, totals.citations.found)
+
+        if 'enterprise_metrics' in fields:
+            engine._calculate_enterprise_metrics(analysis)
+
+        return analysis
+
+    def analyze(self, source: DocumentSource, fields: Optional[Iterable[str]] = None,
+                on_sentence: Optional[Callable[[int, str, EnterpriseScores], None]] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> DocumentAnalysis:
+        """Analyze a whole document; on_sentence receives per-sentence scores"""
+
+        for event in self.iter_events(source, fields, on_sentence is not None, chunk_size):
+            if event[0] == 'sentence':
+                on_sentence(event[1], event[2], event[3])
+            else:
+                return event[1]
@@ -0,0 +1,148 @@
+"""
+Engine Stage Metrics
+Opt-in wall time and call count histograms for the NLP engine's analyzers
+"""
+
+import os
+import time
+import threading
+import functools
+from typing import Dict, Iterable
+
+# Set to 1 to time the global engine from startup
+METRICS_ENABLED = os.environ.get('SOMALI_ENGINE_METRICS', '0') == '1'
+
+# Bucket i counts calls that took [2**(i-1), 2**i) microseconds; bucket 0 is < 1us
+BUCKET_COUNT = 24
+
+
+class StageHistogram:
+    """Power-of-two latency buckets; recording is one bit_length and a few adds"""
+
+    __slots__ = ('counts', 'calls', 'total_ns', 'max_ns', '_lock')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counts = [0] * BUCKET_COUNT
+            self.calls = 0
+            self.total_ns = 0
+            self.max_ns = 0
+
+    def record(self, elapsed_ns: int) -> None:
+        bucket = min((elapsed_ns // 1000).bit_length(), BUCKET_COUNT - 1)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.calls += 1
+            self.total_ns += elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bucket bound (microseconds) below which the fraction of calls fall"""
+
+        if not self.calls:
+            return 0.0
+        target = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(2 ** bucket)
+        return float(2 ** (BUCKET_COUNT - 1))
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.calls / 1e3, 2) if self.calls else 0.0,
+            "max_us": round(self.max_ns / 1e3, 2),
+            "p50_us": self.percentile(0.5),
+            "p95_us": self.percentile(0.95),
+            "p99_us": self.percentile(0.99),
+            # Non-empty buckets keyed by their upper bound
+            "buckets_us": {f"<{2 ** bucket}": count for bucket, count in enumerate(self.counts) if count}
+        }
+
+
+class EngineMetrics:
+    """Histograms by stage name"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._stages: Dict[str, StageHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> StageHistogram:
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, StageHistogram())
+        return histogram
+
+    def record(self, stage: str, elapsed_ns: int) -> None:
+        self.histogram(stage).record(elapsed_ns)
+
+    def reset(self) -> None:
+        # Cleared in place: timed wrappers keep references to their histograms
+        with self._lock:
+            for histogram in self._stages.values():
+                histogram.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        """Per-stage statistics, slowest total time first"""
+
+        stages = sorted(
+            ((stage, histogram) for stage, histogram in self._stages.items() if histogram.calls),
+            key=lambda item: item[1].total_ns, reverse=True
+        )
+        return {
+            "collecting_since": self.started_at,
+            "stages": {stage: histogram.to_dict() for stage, histogram in stages}
+        }
+
+    def report(self) -> str:
+        """Plain-text table for offline profiling runs"""
+
+        lines = [f"{'stage':<36}{'calls':>9}{'total ms':>12}{'mean us':>10}{'p95 us':>10}"]
+        for stage, values in self.snapshot()["stages"].items():
+            lines.append(f"{stage:<36}{values['calls']:>9}{values['total_ms']:>12.1f}"
+                         f"{values['mean_us']:>10.1f}{values['p95_us']:>10.0f}")
+        return "\n".join(lines)
+
+
+def _timed(method, stage: str, metrics: EngineMetrics):
+    histogram = metrics.histogram(stage)
+    clock = time.perf_counter_ns
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            histogram.record(clock() - start)
+
+    return wrapper
+
+
+def instrument(target, method_names: Iterable[str], metrics: EngineMetrics) -> None:
+    """
+    Shadow methods of one object with timed wrappers
+
+    The wrappers are instance attributes, so the class and other instances are
+    untouched and removing them restores the untimed methods at zero cost.
+    """
+
+    for name in method_names:
+        setattr(target, name, _timed(getattr(type(target), name).__get__(target), name, metrics))
+
+
+def uninstrument(target, method_names: Iterable[str]) -> None:
+    for name in method_names:
+        target.__dict__.pop(name, None)
+
@@ -5,336 +5,631 @@ Advanced language processing for professional Somali text analysis
 
 import re
 import json
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from datetime import datetime
 import sqlite3
 from collections import Counter
 import math
+from contextlib import contextmanager
+from lexicon_bundle import CompiledLexicon, LexiconProvider
+from text_features import TextFeatures
+from dialect_model import DialectModel, DialectModelProvider
+from scoring_weights import ScoringWeights, ScoringWeightsProvider
+from document_analyzer import DEFAULT_CHUNK_SIZE, DocumentAnalyzer, DocumentSource
+from engine_metrics import METRICS_ENABLED, EngineMetrics, instrument, uninstrument
+from analysis_cache import CACHE_ENABLED, AnalysisCache, CacheEntry, normalize_text, text_hash
+from analysis_results import (
+    ANALYSIS_FIELDS, ANALYZER_SECTIONS, CulturalAnalysis, DialectAnalysis, DocumentAnalysis, EnterpriseAnalysis, EnterpriseMetrics,
+    EnterpriseScores, GrammarAnalysis, ProfessionalScore, ReadabilityAnalysis, VocabularyAnalysis, normalize_fields,
+    select_fields
+)
+
+# Bump whenever analyzer or metric code changes results; cached analyses of
+# other versions are then discarded
+ENGINE_VERSION = 2
+
+# Years, parenthesised or bracketed references
+CITATION_PATTERN = re.compile(r'\d{4}|\(.*\)|\[.*\]')
+
+# Best achievable value of every analyzer section, used to bound scores.
+# The grammar analyzer awards at most 20 + 15 + 10 + 10 + 5 + 5 + 15 = 80 points.
+OPTIMISTIC_SECTIONS = {
+    'grammar_analysis': GrammarAnalysis(80, 1, 1, True, {'plural': 1, 'feminine': 1, 'diminutive': 1}, 1, 8),
+    'vocabulary_analysis': VocabularyAnalysis(100, [], 0, 0, 0, 0),
+    'dialect_analysis': DialectAnalysis('standard', 100, {}),
+    'cultural_analysis': CulturalAnalysis(100, [], [], 100),
+    'readability_analysis': ReadabilityAnalysis(100, 'Elementary'),
+    'professional_score': ProfessionalScore(100, 10, True)
+}
+
+# Leading scoring stages behind score_bound(); on typical sentences they
+# alone already bound the score below the collection threshold
+BOUND_STAGES = 2
+
+# Engine methods timed when metrics are enabled
+TIMED_STAGES = (
+    '_analyze_grammar', '_analyze_vocabulary', '_analyze_dialect_advanced', '_analyze_cultural_context',
+    '_analyze_readability', '_calculate_professional_score', '_calculate_enterprise_metrics',
+    '_calculate_accuracy_score', '_calculate_professionalism_score', '_calculate_cultural_score',
+    '_calculate_business_readiness', '_calculate_overall_score'
+)
 
 class SomaliNLPEngine:
     """Enterprise-grade Somali Natural Language Processing Engine"""
     
-    def __init__(self):
-        self.load_language_resources()
-        self.init_grammar_rules()
-        self.load_cultural_context()
-    
-    def load_language_resources(self):
-        """Load comprehensive Somali language resources"""
-        
-        # Somali alphabet and phonetics
-        self.somali_alphabet = {
-            'consonants': ['b', 'c', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'q', 'r', 's', 't', 'w', 'x', 'y', 'z'],
-            'vowels': ['a', 'e', 'i', 'o', 'u'],
-            'special_chars': ['dh', 'kh', 'sh']
-        }
-        
-        # Professional vocabulary indicators
-        self.professional_words = {
-            'government': ['dowlad', 'xukuumad', 'wasiir', 'guddoomiye', 'golaha', 'baarlamaan'],
-            'business': ['ganacsato', 'macmiil', 'suuq', 'dhaqaale', 'maaliyadeed', 'ganacsi'],
-            'education': ['waxbarasho', 'dugsiga', 'jaamacad', 'macallin', 'arday', 'cilmi'],
-            'medical': ['caafimaad', 'dhakhtarka', 'bukaan', 'dawaynta', 'isbitaal', 'xanuun'],
-            'legal': ['sharci', 'maxkamad', 'qaadhiga', 'xaq', 'dacwad', 'garsoor'],
-            'Islamic': ['islaam', 'diinta', 'salaad', 'quraanka', 'nabiga', 'masjid', 'ducada']
-        }
-        
-        # Common grammatical structures
-        self.grammatical_patterns = {
-            'question_words': ['ma', 'miyay', 'maxay', 'meesha', 'goorma', 'sideed', 'imisa'],
-            'conjunctions': ['oo', 'iyo', 'ama', 'laakiin', 'balse', 'haddii', 'markii'],
-            'particles': ['waa', 'baa', 'ayaa', 'waxaa', 'waxa'],
-            'pronouns': ['aniga', 'adiga', 'isaga', 'iyada', 'annaga', 'idinka', 'iyaga'],
-            'demonstratives': ['kan', 'tan', 'kaas', 'taas', 'kuwan', 'kuwaan', 'kuwaa']
-        }
-        
-        # Regional dialect markers
-        self.dialect_markers = {
-            'standard': {
-                'indicators': ['waa', 'baa', 'ayaa', 'waxa', 'waxaa'],
-                'weight': 1.0,
-                'confidence_boost': 0.8
-            },
-            'northern': {
-                'indicators': ['yahay', 'tahay', 'kaalay', 'yaal', 'dhinac'],
-                'weight': 0.9,
-                'confidence_boost': 0.7
-            },
-            'southern': {
-                'indicators': ['raac', 'keen', 'dhowr', 'yimi', 'kale'],
-                'weight': 0.8,
-                'confidence_boost': 0.6
-            },
-            'coastal': {
-                'indicators': ['xamar', 'badda', 'dekad', 'dooni', 'kalluun'],
-                'weight': 0.7,
-                'confidence_boost': 0.5
-            }
-        }
-    
-    def init_grammar_rules(self):
-        """Initialize advanced grammar validation rules"""
-        
-        self.grammar_rules = {
-            'sentence_structure': {
-                'svo_pattern': r'(\w+)\s+(waa|baa|ayaa)\s+(\w+)',
-                'question_structure': r'(ma|miyay|maxay)\s+(\w+)',
-                'negation_pattern': r'(ma|aan)\s+(\w+)',
-                'emphasis_pattern': r'(\w+)\s+(baa|ayaa)\s+(\w+)'
-            },
-            'word_formation': {
-                'plural_endings': ['yo', 'yaal', 'aal', 'oyin'],
-                'feminine_endings': ['ad', 'ta', 'da'],
-                'masculine_endings': ['ka', 'ga', 'ha'],
-                'diminutive_endings': ['yar', 'yeel', 'aan']
-            },
-            'punctuation_rules': {
-                'sentence_enders': ['.', '!', '?'],
-                'separators': [',', ';', ':'],
-                'quotation_marks': ['"', "'", '"', '"']
-            }
-        }
-    
-    def load_cultural_context(self):
-        """Load cultural and religious context validators"""
-        
-        self.cultural_context = {
-            'islamic_terms': {
-                'greetings': ['assalamu calaykum', 'wacalaykum salaam', 'nabadgelyo'],
-                'blessings': ['barakallahu', 'alhamdulillah', 'subhanallah', 'inshallah'],
-                'respectful_titles': ['shiikh', 'ustaad', 'xaaji', 'imam'],
-                'proper_usage': True
-            },
-            'respectful_language': {
-                'elder_respect': ['walaal', 'waalidka', 'odayaal', 'hooyada'],
-                'formal_address': ['mudane', 'marwo', 'duqa', 'guddoomiye'],
-                'polite_forms': ['fadlan', 'mahadsanid', 'raalli noqo']
-            },
-            'cultural_sensitivity': {
-                'taboo_topics': ['inappropriate_content', 'disrespectful_language'],
-                'traditional_values': ['qoyska', 'dhaqanka', 'aadada', 'hidaha']
-            }
-        }
-    
-    def analyze_text_enterprise(self, text: str) -> Dict:
+    def __init__(self, lexicon_provider: Optional[LexiconProvider] = None,
+                 dialect_model_provider: Optional[DialectModelProvider] = None,
+                 analysis_cache: Optional[AnalysisCache] = None,
+                 scoring_weights_provider: Optional[ScoringWeightsProvider] = None):
+        # Lexicons live in a versioned bundle that is compiled and loaded on first use
+        self.lexicon_provider = lexicon_provider or LexiconProvider()
+        # Trained dialect model; lexicon indicators are used until one exists
+        self.dialect_model_provider = dialect_model_provider or DialectModelProvider()
+        # Metric weights; the defaults until feature_store.py applies others
+        self.scoring_weights_provider = scoring_weights_provider or ScoringWeightsProvider()
+        # Stage timing histograms; None while instrumentation is off
+        self.metrics: Optional[EngineMetrics] = None
+        # Persistent store of finished analyses; None disables read-through caching
+        self.analysis_cache = analysis_cache
+    
+    @property
+    def lexicon(self) -> CompiledLexicon:
+        """Active compiled lexicon snapshot"""
+        return self.lexicon_provider.get()
+    
+    def reload_lexicon(self, path: Optional[str] = None) -> CompiledLexicon:
+        """Hot-swap the lexicon; analyses already running keep their snapshot"""
+        return self.lexicon_provider.reload(path)
+    
+    @property
+    def dialect_model(self) -> Optional[DialectModel]:
+        """Trained dialect model, or None when no weights have been trained"""
+        return self.dialect_model_provider.get()
+    
+    def reload_dialect_model(self, path: Optional[str] = None) -> DialectModel:
+        """Swap in dialect model weights from disk"""
+        return self.dialect_model_provider.reload(path)
+    
+    @property
+    def scoring_weights(self) -> ScoringWeights:
+        """Metric weights of the accuracy and overall scores"""
+        return self.scoring_weights_provider.get()
+    
+    def save_scoring_weights(self, weights: ScoringWeights) -> None:
+        """Persist weights for every engine and score with them from now on"""
+        self.scoring_weights_provider.save(weights)
+    
+    def detect_dialects(self, texts: List[str]) -> List[Tuple[str, float]]:
         """
-        Enterprise-grade comprehensive text analysis
+        Batch dialect detection
+        
+        Returns:
+            (dialect, confidence 0-100) per text, from one model pass over the
+            whole batch, or from the lexicon indicators without a model
+        """
+        
+        model = self.dialect_model
+        if model is not None:
+            return model.predict(texts)
+        
+        lex = self.lexicon
+        results = []
+        for text in texts:
+            dialect = self._analyze_dialect_advanced(TextFeatures(text, lex), detailed=False)
+            results.append((dialect.primary_dialect, dialect.confidence))
+        return results
+    
+    def cache_version(self, lex: Optional[CompiledLexicon] = None) -> str:
+        """Engine version that keys cached analyses: code, lexicon, dialect model and weights"""
+        
+        lex = lex or self.lexicon
+        model = self.dialect_model
+        return (f"{ENGINE_VERSION}/{lex.version_key}/{model.fingerprint if model is not None else 'indicators'}"
+                f"/{self.scoring_weights.fingerprint}")
+    
+    def enable_metrics(self, metrics: Optional[EngineMetrics] = None) -> EngineMetrics:
+        """Start timing every analyzer and metric calculator of this engine"""
+        
+        metrics = metrics or self.metrics or EngineMetrics()
+        instrument(self, TIMED_STAGES, metrics)
+        self.metrics = metrics
+        return metrics
+    
+    def disable_metrics(self) -> None:
+        """Stop timing; the untimed methods run again with no overhead"""
+        
+        uninstrument(self, TIMED_STAGES)
+        self.metrics = None
+    
+    @contextmanager
+    def profile(self):
+        """
+        Time the engine inside a with-block into fresh histograms
+        
+        Usage:
+            with nlp_engine.profile() as metrics:
+                nlp_engine.analyze_text_enterprise(text)
+            print(metrics.report())
+        """
+        
+        previous = self.metrics
+        metrics = self.enable_metrics(EngineMetrics())
+        try:
+            yield metrics
+        finally:
+            if previous is not None:
+                self.enable_metrics(previous)
+            else:
+                self.disable_metrics()
+    
+    # Read-only views of the active bundle, kept for existing callers
+    @property
+    def somali_alphabet(self) -> Dict:
+        return self.lexicon.data['somali_alphabet']
+    
+    @property
+    def professional_words(self) -> Dict:
+        return self.lexicon.data['professional_words']
+    
+    @property
+    def grammatical_patterns(self) -> Dict:
+        return self.lexicon.data['grammatical_patterns']
+    
+    @property
+    def dialect_markers(self) -> Dict:
+        return self.lexicon.data['dialect_markers']
+    
+    @property
+    def grammar_rules(self) -> Dict:
+        return self.lexicon.data['grammar_rules']
+    
+    @property
+    def cultural_context(self) -> Dict:
+        return self.lexicon.data['cultural_context']
+    
+    def features(self, text: str) -> TextFeatures:
+        """Shared tokenization of a text against the active lexicon snapshot"""
+        return TextFeatures(text, self.lexicon)
+    
+    def analyze(self, text: str, fields: Optional[Iterable[str]] = None,
+                features: Optional[TextFeatures] = None) -> EnterpriseAnalysis:
+        """
+        Run the enterprise analysis and return a compact result object
         
         Args:
             text: Somali text to analyze
+            fields: Top-level sections to compute (defaults to all of them)
+            features: Tokenization already computed by a scoring pipeline
             
         Returns:
-            Detailed analysis with enterprise metrics
+            EnterpriseAnalysis holding only the requested sections
         """
         
-        analysis = {
-            'timestamp': datetime.now().isoformat(),
-            'text_length': len(text),
-            'word_count': len(text.split()),
-            'enterprise_metrics': {}
-        }
+        fields = normalize_fields(fields)
+        
+        # One lexicon snapshot and one tokenization serve every analyzer
+        features = features or self.features(text)
+        analysis = EnterpriseAnalysis(len(text), features.word_count, fields)
+        
+        # The enterprise metrics are derived from every analyzer section
+        if 'enterprise_metrics' in fields:
+            sections = ANALYZER_SECTIONS
+        else:
+            sections = [field for field in fields if field in ANALYZER_SECTIONS]
         
         # Core analysis components
-        analysis['grammar_analysis'] = self._analyze_grammar(text)
-        analysis['vocabulary_analysis'] = self._analyze_vocabulary(text)
-        analysis['dialect_analysis'] = self._analyze_dialect_advanced(text)
-        analysis['cultural_analysis'] = self._analyze_cultural_context(text)
-        analysis['readability_analysis'] = self._analyze_readability(text)
-        analysis['professional_score'] = self._calculate_professional_score(text)
+        if 'grammar_analysis' in sections:
+            analysis.grammar_analysis = self._analyze_grammar(features)
+        if 'vocabulary_analysis' in sections:
+            analysis.vocabulary_analysis = self._analyze_vocabulary(features)
+        if 'dialect_analysis' in sections:
+            analysis.dialect_analysis = self._analyze_dialect_advanced(features)
+        if 'cultural_analysis' in sections:
+            analysis.cultural_analysis = self._analyze_cultural_context(features)
+        if 'readability_analysis' in sections:
+            analysis.readability_analysis = self._analyze_readability(features)
+        if 'professional_score' in sections:
+            analysis.professional_score = self._calculate_professional_score(features)
         
         # Enterprise-specific metrics
-        analysis['enterprise_metrics'] = {
-            'accuracy_score': self._calculate_accuracy_score(analysis),
-            'professionalism_score': self._calculate_professionalism_score(analysis),
-            'cultural_appropriateness': self._calculate_cultural_score(analysis),
-            'business_readiness': self._calculate_business_readiness(analysis),
-            'overall_enterprise_score': 0  # Will be calculated
-        }
+        if 'enterprise_metrics' in fields:
+            self._calculate_enterprise_metrics(analysis)
         
-        # Calculate overall enterprise score
-        analysis['enterprise_metrics']['overall_enterprise_score'] = self._calculate_overall_score(analysis)
+        return analysis
+    
+    def analyze_text_enterprise(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Enterprise-grade comprehensive text analysis
+        
+        Args:
+            text: Somali text to analyze
+            fields: Optional subset of top-level sections to return
+            
+        Returns:
+            Detailed analysis with enterprise metrics
+        """
         
+        fields = normalize_fields(fields)
+        return select_fields(self.analyze_many([text], fields)[0], fields)
+    
+    def analyze_many(self, texts: Sequence[str], fields: Optional[Iterable[str]] = None,
+                     features: Optional[Sequence[TextFeatures]] = None) -> List[Dict]:
+        """
+        Serialized analyses of a batch, read through the persistent cache
+        
+        Args:
+            texts: Somali texts to analyze
+            fields: Top-level sections needed (defaults to all of them)
+            features: Tokenizations already computed by a scoring pipeline
+            
+        Returns:
+            One dict per text holding at least the requested fields; cached
+            analyses hold every field, so callers project with select_fields()
+        """
+        
+        fields = normalize_fields(fields)
+        lex = features[0].lex if features else self.lexicon
+        cache = self.analysis_cache
+        
+        # Only analyses with enterprise metrics have every section computed
+        complete = 'enterprise_metrics' in fields
+        
+        if cache is None:
+            results = []
+            for i, text in enumerate(texts):
+                analysis = self.analyze(text, fields, features[i] if features else TextFeatures(text, lex))
+                results.append(analysis.to_dict(ANALYSIS_FIELDS) if complete else analysis.to_dict())
+            return results
+        
+        version = self.cache_version(lex)
+        normalized = [normalize_text(text) for text in texts]
+        hashes = [text_hash(text) for text in normalized]
+        cached = cache.get_many(hashes, version)
+        
+        fresh = []
+        results = []
+        try:
+            for i, (text, key) in enumerate(zip(normalized, hashes)):
+                entry = cached.get(key)
+                if entry is not None and entry.analysis is not None:
+                    # The analysis is reused, but it is reported as made now
+                    results.append({**entry.analysis, 'timestamp': datetime.now().isoformat()})
+                    continue
+                
+                item = features[i] if features and features[i].text == text else TextFeatures(text, lex)
+                analysis = self.analyze(text, fields, item)
+                if complete:
+                    full = analysis.to_dict(ANALYSIS_FIELDS)
+                    scores = EnterpriseScores.from_analysis(analysis).to_record()
+                    cached[key] = CacheEntry(full, scores)
+                    fresh.append((key, full, scores))
+                    results.append(full)
+                else:
+                    results.append(analysis.to_dict())
+        finally:
+            if fresh:
+                cache.put_many(version, fresh)
+        
+        return results
+    
+    def analyze_document(self, source: DocumentSource, fields: Optional[Iterable[str]] = None,
+                         on_sentence: Optional[Callable[[int, str, EnterpriseScores], None]] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> DocumentAnalysis:
+        """
+        Analyze a large document incrementally
+        
+        Args:
+            source: File path or binary/text stream, read chunk by chunk
+            fields: Optional subset of top-level sections to return
+            on_sentence: Optional callback receiving (index, sentence, scores)
+            chunk_size: Bytes read per chunk
+            
+        Returns:
+            DocumentAnalysis with the same document-level metrics as analyze()
+        """
+        
+        return DocumentAnalyzer(self).analyze(source, fields, on_sentence, chunk_size)
+    
+    def score_text(self, text: str, min_score: Optional[float] = None, cached: bool = True,
+                   features: Optional[TextFeatures] = None,
+                   partial: Optional[EnterpriseAnalysis] = None) -> Optional[EnterpriseScores]:
+        """
+        Scoring-only analysis: numeric enterprise scores without issue lists or breakdowns
+        
+        Args:
+            text: Somali text to score
+            min_score: Optional threshold; scoring stops as soon as the overall
+                enterprise score provably cannot reach it
+            cached: Read through the persistent analysis cache when one is set
+            features: Tokenization already computed, e.g. by score_bound()
+            partial: Sections of features already computed by bound_sections()
+            
+        Returns:
+            EnterpriseScores, or None when the text cannot reach min_score
+        """
+        
+        cache = self.analysis_cache if cached else None
+        if cache is None:
+            if features is None:
+                features, partial = self.features(text), None
+            return self._score_features(features, min_score, partial)
+        
+        lex = self.lexicon
+        version = self.cache_version(lex)
+        normalized = normalize_text(text)
+        key = text_hash(normalized)
+        
+        entry = cache.get_many([key], version).get(key)
+        if entry is not None:
+            scores = EnterpriseScores.from_record(entry.scores)
+            if min_score is not None and scores.overall_enterprise_score < min_score:
+                return None
+            return scores
+        
+        # Work already done counts only if it was done on the text being scored
+        if features is None or features.text != normalized or features.lex is not lex:
+            features, partial = TextFeatures(normalized, lex), None
+        scores = self._score_features(features, min_score, partial)
+        # Pruned texts have no exact scores to store
+        if scores is not None:
+            cache.put_many(version, [(key, None, scores.to_record())])
+        return scores
+    
+    def bound_sections(self, features: TextFeatures) -> EnterpriseAnalysis:
+        """The leading scoring stages only; score_text() can carry on from them"""
+        
+        analysis = EnterpriseAnalysis(len(features.text), 0)
+        for section, analyzer in self._scoring_stages()[:BOUND_STAGES]:
+            setattr(analysis, section, analyzer(features))
         return analysis
     
-    def _analyze_grammar(self, text: str) -> Dict:
+    def score_bound(self, features: TextFeatures, partial: Optional[EnterpriseAnalysis] = None) -> float:
+        """Upper bound on the overall score from the leading scoring stages only"""
+        return self._score_upper_bound(partial or self.bound_sections(features))
+    
+    def _scoring_stages(self) -> Tuple:
+        # Cheapest analyzers first so hopeless texts are dropped early
+        return (
+            ('grammar_analysis', self._analyze_grammar),
+            ('professional_score', self._calculate_professional_score),
+            ('readability_analysis', self._analyze_readability),
+            ('cultural_analysis', self._analyze_cultural_context),
+            ('vocabulary_analysis', lambda f: self._analyze_vocabulary(f, detailed=False)),
+            ('dialect_analysis', lambda f: self._analyze_dialect_advanced(f, detailed=False))
+        )
+    
+    def _score_features(self, features: TextFeatures, min_score: Optional[float],
+                        partial: Optional[EnterpriseAnalysis] = None) -> Optional[EnterpriseScores]:
+        analysis = EnterpriseAnalysis(len(features.text), 0)
+        
+        for section, analyzer in self._scoring_stages():
+            done = getattr(partial, section) if partial is not None else None
+            setattr(analysis, section, done if done is not None else analyzer(features))
+            if min_score is not None and self._score_upper_bound(analysis) < min_score:
+                return None
+        
+        analysis.enterprise_metrics = self._calculate_enterprise_metrics(analysis)
+        
+        return EnterpriseScores.from_analysis(analysis)
+    
+    def _score_upper_bound(self, analysis: EnterpriseAnalysis) -> float:
+        """Highest overall score reachable given the sections computed so far"""
+        
+        # Every calculator is monotonic in its inputs, so filling the missing
+        # sections with their best possible values yields a true upper bound
+        bound = EnterpriseAnalysis(analysis.text_length, analysis.word_count)
+        for section in ANALYZER_SECTIONS:
+            value = getattr(analysis, section)
+            setattr(bound, section, value if value is not None else OPTIMISTIC_SECTIONS[section])
+        
+        return self._calculate_enterprise_metrics(bound).overall_enterprise_score
+    
+    def _calculate_enterprise_metrics(self, analysis: EnterpriseAnalysis) -> EnterpriseMetrics:
+        """Derive the enterprise metrics from fully populated analyzer sections"""
+        
+        metrics = EnterpriseMetrics(
+            accuracy_score=self._calculate_accuracy_score(analysis),
+            professionalism_score=self._calculate_professionalism_score(analysis),
+            cultural_appropriateness=self._calculate_cultural_score(analysis),
+            business_readiness=self._calculate_business_readiness(analysis)
+        )
+        analysis.enterprise_metrics = metrics
+        
+        # Calculate overall enterprise score
+        metrics.overall_enterprise_score = self._calculate_overall_score(analysis)
+        
+        return metrics
+    
+    def _analyze_grammar(self, features: TextFeatures) -> GrammarAnalysis:
         """Advanced grammar analysis"""
         
-        words = text.split()
-        sentences = re.split(r'[.!?]+', text)
+        lex = features.lex
+        found = features.found
+        sentence_lengths = features.sentence_lengths
+        
+        return self._grammar_section(
+            svo_matches=len(lex.svo_regex.findall(features.lower)),
+            particles_found=sum(1 for particle in lex.particles if particle in found),
+            has_proper_punctuation=any(p in features.text for p in lex.sentence_enders),
+            word_forms=lex.morphology.count_forms(features.normalized_words),
+            sentence_words=sum(sentence_lengths),
+            sentence_count=len(sentence_lengths)
+        )
+    
+    def _grammar_section(self, svo_matches: int, particles_found: int, has_proper_punctuation: bool,
+                         word_forms: Dict[str, int], sentence_words: int, sentence_count: int) -> GrammarAnalysis:
+        """Score grammar from raw counts (shared by text and document analysis)"""
         
         grammar_score = 0
-        issues = []
         
         # Check sentence structure
-        svo_matches = len(re.findall(self.grammar_rules['sentence_structure']['svo_pattern'], text.lower()))
         if svo_matches > 0:
             grammar_score += 20
-        else:
-            issues.append("No clear Subject-Verb-Object structure detected")
         
         # Check for proper particles usage
-        particles_found = sum(1 for particle in self.grammatical_patterns['particles'] if particle in text.lower())
         if particles_found > 0:
             grammar_score += 15
-        else:
-            issues.append("Missing grammatical particles (waa, baa, ayaa)")
         
         # Check punctuation
-        has_proper_punctuation = any(p in text for p in self.grammar_rules['punctuation_rules']['sentence_enders'])
         if has_proper_punctuation:
             grammar_score += 10
-        else:
-            issues.append("Missing proper sentence punctuation")
         
-        # Check word formation
-        plural_forms = sum(1 for ending in self.grammar_rules['word_formation']['plural_endings'] 
-                          if any(word.endswith(ending) for word in words))
-        if plural_forms > 0:
+        # Check word formation: plurals, gender-marked nouns and diminutives
+        if word_forms.get('plural'):
             grammar_score += 10
+        if word_forms.get('feminine') or word_forms.get('masculine'):
+            grammar_score += 5
+        if word_forms.get('diminutive'):
+            grammar_score += 5
         
         # Sentence length analysis
-        avg_sentence_length = sum(len(s.split()) for s in sentences if s.strip()) / len([s for s in sentences if s.strip()])
+        avg_sentence_length = sentence_words / sentence_count
         if 8 <= avg_sentence_length <= 20:
             grammar_score += 15
-        elif avg_sentence_length < 8:
-            issues.append("Sentences too short for professional writing")
-        else:
-            issues.append("Sentences too long, may affect readability")
-        
-        return {
-            'grammar_score': min(grammar_score, 100),
-            'issues': issues,
-            'sentence_count': len([s for s in sentences if s.strip()]),
-            'average_sentence_length': round(avg_sentence_length, 1),
-            'particles_usage': particles_found,
-            'punctuation_proper': has_proper_punctuation
-        }
-    
-    def _analyze_vocabulary(self, text: str) -> Dict:
+        
+        return GrammarAnalysis(
+            grammar_score=min(grammar_score, 100),
+            svo_matches=svo_matches,
+            particles_found=particles_found,
+            punctuation_proper=has_proper_punctuation,
+            word_forms=word_forms,
+            sentence_count=sentence_count,
+            average_sentence_length=avg_sentence_length
+        )
+    
+    def _analyze_vocabulary(self, features: TextFeatures, detailed: bool = True) -> VocabularyAnalysis:
         """Advanced vocabulary analysis"""
         
-        words = [word.lower().strip('.,!?;:') for word in text.split()]
-        word_count = Counter(words)
+        lex = features.lex
+        words = features.normalized_words
         
-        # Professional vocabulary scoring
-        professional_score = 0
-        professional_categories = []
+        # Professional vocabulary scoring: one table lookup per word
+        professional_hits = 0
+        words_by_category = {}
         
-        for category, category_words in self.professional_words.items():
-            found_words = [word for word in words if word in category_words]
-            if found_words:
-                professional_score += len(found_words) * 10
-                professional_categories.append({
-                    'category': category,
-                    'words_found': found_words,
-                    'count': len(found_words)
-                })
+        for word in words:
+            categories = lex.categories_for(word)
+            if categories:
+                professional_hits += len(categories)
+                if detailed:
+                    for category in categories:
+                        words_by_category.setdefault(category, []).append(word)
         
-        # Vocabulary diversity
-        unique_words = len(set(words))
-        total_words = len(words)
-        diversity_ratio = unique_words / total_words if total_words > 0 else 0
+        category_hits = [
+            (category, words_by_category[category], len(words_by_category[category]))
+            for category in lex.professional_categories if category in words_by_category
+        ]
         
         # Word complexity analysis
-        avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
-        complex_words = [word for word in words if len(word) > 6]
-        
-        return {
-            'vocabulary_score': min(professional_score, 100),
-            'professional_categories': professional_categories,
-            'diversity_ratio': round(diversity_ratio, 3),
-            'unique_words': unique_words,
-            'total_words': total_words,
-            'average_word_length': round(avg_word_length, 1),
-            'complex_words': len(complex_words),
-            'complexity_ratio': round(len(complex_words) / total_words, 3) if total_words > 0 else 0
-        }
-    
-    def _analyze_dialect_advanced(self, text: str) -> Dict:
+        return self._vocabulary_section(
+            professional_hits=professional_hits,
+            category_hits=category_hits,
+            unique_words=len(set(words)),
+            total_words=len(words),
+            word_chars=sum(len(word) for word in words),
+            complex_words=sum(1 for word in words if len(word) > 6)
+        )
+    
+    def _vocabulary_section(self, professional_hits: int, category_hits: List[Tuple[str, List[str], int]],
+                            unique_words: int, total_words: int, word_chars: int,
+                            complex_words: int) -> VocabularyAnalysis:
+        """Score vocabulary from raw counts (shared by text and document analysis)"""
+        
+        return VocabularyAnalysis(
+            vocabulary_score=min(professional_hits * 10, 100),
+            category_hits=category_hits,
+            unique_words=unique_words,
+            total_words=total_words,
+            average_word_length=word_chars / total_words if total_words else 0,
+            complex_words=complex_words
+        )
+    
+    def _analyze_dialect_advanced(self, features: TextFeatures, detailed: bool = True,
+                                  prediction: Optional[Tuple[str, float]] = None) -> DialectAnalysis:
         """Advanced dialect detection with confidence scoring"""
         
-        text_lower = text.lower()
+        found = features.found
         dialect_scores = {}
         
-        for dialect, markers in self.dialect_markers.items():
+        for dialect, indicators, indicator_score in features.lex.dialect_indicators:
             score = 0
             found_indicators = []
             
-            for indicator in markers['indicators']:
-                if indicator in text_lower:
-                    score += markers['weight'] * markers['confidence_boost']
+            for indicator in indicators:
+                if indicator in found:
+                    score += indicator_score
                     found_indicators.append(indicator)
             
             if found_indicators:
-                dialect_scores[dialect] = {
-                    'score': score,
-                    'indicators': found_indicators,
-                    'confidence': min(score * 10, 100)
-                }
-        
-        # Determine primary dialect
-        if dialect_scores:
-            primary_dialect = max(dialect_scores.keys(), key=lambda x: dialect_scores[x]['score'])
-            confidence = dialect_scores[primary_dialect]['confidence']
+                dialect_scores[dialect] = (score, found_indicators)
+        
+        # The trained model decides when available; indicators remain as evidence
+        if prediction is None:
+            model = self.dialect_model
+            if model is not None:
+                prediction = model.predict([features.text])[0]
+        
+        if prediction is not None:
+            primary_dialect, confidence = prediction
+            method = 'ngram_model'
+        elif dialect_scores:
+            primary_dialect = max(dialect_scores.keys(), key=lambda x: dialect_scores[x][0])
+            confidence = min(dialect_scores[primary_dialect][0] * 10, 100)
+            method = 'lexicon_indicators'
         else:
             primary_dialect = "Unknown"
             confidence = 0
+            method = 'lexicon_indicators'
         
-        return {
-            'primary_dialect': primary_dialect,
-            'confidence': round(confidence, 1),
-            'dialect_breakdown': dialect_scores,
-            'is_standard_somali': primary_dialect == 'standard'
-        }
+        return DialectAnalysis(primary_dialect, confidence, dialect_scores if detailed else {}, method)
     
-    def _analyze_cultural_context(self, text: str) -> Dict:
+    def _analyze_cultural_context(self, features: TextFeatures) -> CulturalAnalysis:
         """Analyze cultural and religious appropriateness"""
         
-        text_lower = text.lower()
+        lex = features.lex
+        found = features.found
         cultural_score = 0
-        cultural_elements = []
         
         # Check for Islamic terms usage
         islamic_terms_found = []
-        for category, terms in self.cultural_context['islamic_terms'].items():
-            if category != 'proper_usage':
-                found = [term for term in terms if term in text_lower]
-                if found:
-                    islamic_terms_found.extend(found)
-                    cultural_score += len(found) * 5
+        for category, terms in lex.islamic_terms:
+            matched = [term for term in terms if term in found]
+            if matched:
+                islamic_terms_found.extend(matched)
+                cultural_score += len(matched) * 5
         
         # Check for respectful language
         respectful_terms = []
-        for category, terms in self.cultural_context['respectful_language'].items():
-            found = [term for term in terms if term in text_lower]
-            if found:
-                respectful_terms.extend(found)
-                cultural_score += len(found) * 3
-        
-        # Cultural sensitivity check
-        sensitivity_score = 100  # Start with full score, deduct for issues
-        
-        return {
-            'cultural_score': min(cultural_score, 100),
-            'islamic_terms_found': islamic_terms_found,
-            'respectful_terms': respectful_terms,
-            'cultural_sensitivity': sensitivity_score,
-            'is_culturally_appropriate': sensitivity_score >= 80
-        }
-    
-    def _analyze_readability(self, text: str) -> Dict:
+        for category, terms in lex.respectful_terms:
+            matched = [term for term in terms if term in found]
+            if matched:
+                respectful_terms.extend(matched)
+                cultural_score += len(matched) * 3
+        
+        # Cultural sensitivity check: start with full score, deduct for issues
+        return CulturalAnalysis(
+            cultural_score=min(cultural_score, 100),
+            islamic_terms_found=islamic_terms_found,
+            respectful_terms=respectful_terms,
+            cultural_sensitivity=100
+        )
+    
+    def _analyze_readability(self, features: TextFeatures) -> ReadabilityAnalysis:
         """Advanced readability analysis for Somali text"""
         
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        words = text.split()
+        words = features.words
+        
+        return self._readability_section(len(features.sentence_lengths), len(words), sum(len(word) for word in words))
+    
+    def _readability_section(self, sentence_count: int, word_count: int, word_chars: int) -> ReadabilityAnalysis:
+        """Score readability from raw counts (shared by text and document analysis)"""
         
-        if not sentences or not words:
-            return {'readability_score': 0, 'grade_level': 'Unknown'}
+        if not sentence_count or not word_count:
+            return ReadabilityAnalysis(0, 'Unknown', is_empty=True)
         
         # Basic readability metrics
-        avg_sentence_length = len(words) / len(sentences)
-        avg_word_length = sum(len(word) for word in words) / len(words)
+        avg_sentence_length = word_count / sentence_count
+        avg_word_length = word_chars / word_count
         
         # Somali-specific readability formula
         readability_score = 100 - (
@@ -354,128 +649,124 @@ class SomaliNLPEngine:
         else:
             grade_level = "Graduate"
         
-        return {
-            'readability_score': max(0, min(100, readability_score)),
-            'grade_level': grade_level,
-            'avg_sentence_length': round(avg_sentence_length, 1),
-            'avg_word_length': round(avg_word_length, 1),
-            'complexity_level': 'High' if avg_word_length > 6 else 'Medium' if avg_word_length > 4 else 'Low'
-        }
+        return ReadabilityAnalysis(
+            readability_score=max(0, min(100, readability_score)),
+            grade_level=grade_level,
+            avg_sentence_length=avg_sentence_length,
+            avg_word_length=avg_word_length
+        )
     
-    def _calculate_professional_score(self, text: str) -> Dict:
+    def _calculate_professional_score(self, features: TextFeatures) -> ProfessionalScore:
         """Calculate professional writing score"""
         
-        words = text.split()
+        return self._professional_section(features.lex, features.found, bool(CITATION_PATTERN.search(features.text)))
+    
+    def _professional_section(self, lex: CompiledLexicon, found: Set[str], has_citations: bool) -> ProfessionalScore:
+        """Score professional writing from matched terms and the citation flag"""
         
         # Professional indicators
         professional_indicators = 0
         
         # Check for formal language patterns
-        formal_patterns = ['waxaa', 'waxa', 'sida', 'guud ahaan', 'si kastaba']
-        professional_indicators += sum(1 for pattern in formal_patterns if pattern in text.lower())
+        professional_indicators += sum(1 for pattern in lex.formal_patterns if pattern in found)
         
         # Check for academic/business vocabulary
-        academic_words = ['cilmi', 'daraasad', 'baaritaan', 'xog', 'macluumaad']
-        professional_indicators += sum(1 for word in academic_words if word in text.lower())
+        professional_indicators += sum(1 for word in lex.academic_words if word in found)
         
         # Check for proper citations and references
-        has_citations = bool(re.search(r'\d{4}|\(.*\)|\[.*\]', text))
         if has_citations:
             professional_indicators += 2
         
         # Calculate score
         professional_score = min(professional_indicators * 10, 100)
         
-        return {
-            'professional_score': professional_score,
-            'formal_language_count': professional_indicators,
-            'has_citations': has_citations,
-            'is_professional_level': professional_score >= 70
-        }
+        return ProfessionalScore(
+            professional_score=professional_score,
+            formal_language_count=professional_indicators,
+            has_citations=has_citations
+        )
     
-    def _calculate_accuracy_score(self, analysis: Dict) -> float:
+    def _calculate_accuracy_score(self, analysis: EnterpriseAnalysis) -> float:
         """Calculate overall accuracy score"""
         
-        grammar_weight = 0.3
-        vocabulary_weight = 0.25
-        cultural_weight = 0.2
-        readability_weight = 0.15
-        professional_weight = 0.1
+        weights = self.scoring_weights.accuracy
         
         accuracy = (
-            analysis['grammar_analysis']['grammar_score'] * grammar_weight +
-            analysis['vocabulary_analysis']['vocabulary_score'] * vocabulary_weight +
-            analysis['cultural_analysis']['cultural_score'] * cultural_weight +
-            analysis['readability_analysis']['readability_score'] * readability_weight +
-            analysis['professional_score']['professional_score'] * professional_weight
+            analysis.grammar_analysis.grammar_score * weights['grammar'] +
+            analysis.vocabulary_analysis.vocabulary_score * weights['vocabulary'] +
+            analysis.cultural_analysis.cultural_score * weights['cultural'] +
+            analysis.readability_analysis.readability_score * weights['readability'] +
+            analysis.professional_score.professional_score * weights['professional']
         )
         
         return round(accuracy, 1)
     
-    def _calculate_professionalism_score(self, analysis: Dict) -> float:
+    def _calculate_professionalism_score(self, analysis: EnterpriseAnalysis) -> float:
         """Calculate professionalism score"""
         
-        base_score = analysis['professional_score']['professional_score']
+        base_score = analysis.professional_score.professional_score
         
         # Boost for cultural appropriateness
-        if analysis['cultural_analysis']['is_culturally_appropriate']:
+        if analysis.cultural_analysis.is_culturally_appropriate:
             base_score += 10
         
         # Boost for proper dialect usage
-        if analysis['dialect_analysis']['is_standard_somali']:
+        if analysis.dialect_analysis.is_standard_somali:
             base_score += 5
         
         # Penalty for grammar issues
-        grammar_issues = len(analysis['grammar_analysis']['issues'])
-        base_score -= grammar_issues * 2
+        base_score -= analysis.grammar_analysis.issue_count * 2
         
         return round(min(base_score, 100), 1)
     
-    def _calculate_cultural_score(self, analysis: Dict) -> float:
+    def _calculate_cultural_score(self, analysis: EnterpriseAnalysis) -> float:
         """Calculate cultural appropriateness score"""
         
-        return round(analysis['cultural_analysis']['cultural_sensitivity'], 1)
+        return round(analysis.cultural_analysis.cultural_sensitivity, 1)
     
-    def _calculate_business_readiness(self, analysis: Dict) -> float:
+    def _calculate_business_readiness(self, analysis: EnterpriseAnalysis) -> float:
         """Calculate business readiness score"""
         
         readiness_score = 0
         
         # Grammar quality
-        if analysis['grammar_analysis']['grammar_score'] >= 80:
+        if analysis.grammar_analysis.grammar_score >= 80:
             readiness_score += 30
         
         # Professional vocabulary
-        if analysis['vocabulary_analysis']['vocabulary_score'] >= 70:
+        if analysis.vocabulary_analysis.vocabulary_score >= 70:
             readiness_score += 25
         
         # Cultural appropriateness
-        if analysis['cultural_analysis']['is_culturally_appropriate']:
+        if analysis.cultural_analysis.is_culturally_appropriate:
             readiness_score += 20
         
         # Readability
-        if analysis['readability_analysis']['readability_score'] >= 60:
+        if analysis.readability_analysis.readability_score >= 60:
             readiness_score += 15
         
         # Professional level
-        if analysis['professional_score']['is_professional_level']:
+        if analysis.professional_score.is_professional_level:
             readiness_score += 10
         
         return round(readiness_score, 1)
     
-    def _calculate_overall_score(self, analysis: Dict) -> float:
+    def _calculate_overall_score(self, analysis: EnterpriseAnalysis) -> float:
         """Calculate overall enterprise score"""
         
-        metrics = analysis['enterprise_metrics']
+        metrics = analysis.enterprise_metrics
+        weights = self.scoring_weights.overall
         
         overall = (
-            metrics['accuracy_score'] * 0.3 +
-            metrics['professionalism_score'] * 0.25 +
-            metrics['cultural_appropriateness'] * 0.2 +
-            metrics['business_readiness'] * 0.25
+            metrics.accuracy_score * weights['accuracy'] +
+            metrics.professionalism_score * weights['professionalism'] +
+            metrics.cultural_appropriateness * weights['cultural_appropriateness'] +
+            metrics.business_readiness * weights['business_readiness']
         )
         
         return round(overall, 1)
 
 # Initialize global NLP engine instance
-nlp_engine = SomaliNLPEngine()
\ No newline at end of file
+nlp_engine = SomaliNLPEngine(analysis_cache=AnalysisCache() if CACHE_ENABLED else None)
+if METRICS_ENABLED:
+    nlp_engine.enable_metrics()
\ No newline at end of file
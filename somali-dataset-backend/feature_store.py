@@ -0,0 +1,429 @@
+"""
+Columnar Sentence Feature Store
+Raw per-sentence analyzer counts in memory-mapped column files next to the
+database, re-scored for the whole corpus with vectorized NumPy passes
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from text_features import TextFeatures
+from corpus_rescoring import ENGINE_SCORED
+from enterprise_nlp import CITATION_PATTERN, SomaliNLPEngine, nlp_engine
+from scoring_weights import ScoringWeights
+
+logger = logging.getLogger(__name__)
+
+# Bump when the extracted columns or their meaning change
+FEATURE_VERSION = 1
+
+EXTRACT_BATCH = 1000
+WRITE_BATCH = 5000
+
+# Fixed columns; one "category:<name>" and one "form:<name>" column per
+# lexicon professional category and word formation class follow them
+BASE_COLUMNS = (
+    'svo_matches', 'particles_found', 'punctuation_proper', 'sentence_count', 'sentence_words',
+    'word_count', 'word_chars', 'total_words', 'unique_words', 'normalized_word_chars', 'complex_words',
+    'islamic_terms', 'respectful_terms', 'formal_terms', 'has_citations', 'standard_dialect'
+)
+
+# Cultural sensitivity is not derived from the text; the analyzer fixes it at 100
+CULTURAL_SENSITIVITY = 100.0
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def feature_columns(lex) -> Tuple[str, ...]:
+    return (BASE_COLUMNS +
+            tuple(f'category:{category}' for category in lex.professional_categories) +
+            tuple(f'form:{form}' for form in lex.morphology.forms))
+
+
+def extract_features(engine: SomaliNLPEngine, texts: Sequence[str], lex=None) -> np.ndarray:
+    """
+    Raw counts behind every analyzer section, one row per text
+
+    Args:
+        engine: Engine whose lexicon and dialect model are used
+        texts: Sentences to featurize
+        lex: Lexicon snapshot (defaults to the engine's active one)
+
+    Returns:
+        int32 matrix with the columns of feature_columns(lex)
+    """
+
+    lex = lex or engine.lexicon
+    columns = feature_columns(lex)
+    position = {column: i for i, column in enumerate(columns)}
+    rows = np.zeros((len(texts), len(columns)), dtype=np.int32)
+
+    model = engine.dialect_model
+    predictions = model.predict(texts) if model is not None and texts else [None] * len(texts)
+
+    for row, text, prediction in zip(rows, texts, predictions):
+        features = TextFeatures(text, lex)
+        found = features.found
+        words = features.words
+        normalized = features.normalized_words
+        sentence_lengths = features.sentence_lengths
+
+        values = {
+            'svo_matches': len(lex.svo_regex.findall(features.lower)),
+            'particles_found': sum(1 for particle in lex.particles if particle in found),
+            'punctuation_proper': any(p in text for p in lex.sentence_enders),
+            'sentence_count': len(sentence_lengths),
+            'sentence_words': sum(sentence_lengths),
+            'word_count': len(words),
+            'word_chars': sum(map(len, words)),
+            'total_words': len(normalized),
+            'unique_words': len(set(normalized)),
+            'normalized_word_chars': sum(map(len, normalized)),
+            'complex_words': sum(1 for word in normalized if len(word) > 6),
+            'islamic_terms': sum(1 for _, terms in lex.islamic_terms for term in terms if term in found),
+            'respectful_terms': sum(1 for _, terms in lex.respectful_terms for term in terms if term in found),
+            'formal_terms': (sum(1 for pattern in lex.formal_patterns if pattern in found) +
+                             sum(1 for word in lex.academic_words if word in found)),
+            'has_citations': bool(CITATION_PATTERN.search(text)),
+            'standard_dialect': engine._analyze_dialect_advanced(
+                features, detailed=False, prediction=prediction).is_standard_somali
+        }
+        for word in normalized:
+            for category in lex.categories_for(word):
+                values[f'category:{category}'] = values.get(f'category:{category}', 0) + 1
+        for form, count in lex.morphology.count_forms(normalized).items():
+            values[f'form:{form}'] = count
+
+        for column, value in values.items():
+            row[position[column]] = value
+    return rows
+
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    """round(x, 1) with Python's semantics
+
+    np.round scales by 10 first, which can turn a value just below a tie into
+    an exact tie; the few values that land near a tie are rounded in Python.
+    """
+
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in near_tie.tolist():
+        rounded[i] = round(float(values[i]), 1)
+    return rounded
+
+
+def score_features(columns: Dict[str, np.ndarray], weights: Optional[ScoringWeights] = None) -> Dict[str, np.ndarray]:
+    """
+    Enterprise metrics of every row, mirroring the engine's analyzers and calculators
+
+    Args:
+        columns: Feature column arrays by name
+        weights: Metric weights; the defaults when None
+
+    Returns:
+        Arrays keyed like EnterpriseMetrics.to_dict(); rows without any
+        sentence (which the engine cannot score) are NaN
+    """
+
+    weights = weights or ScoringWeights.defaults()
+    acc_w, all_w = weights.accuracy, weights.overall
+    size = len(columns['sentence_count'])
+
+    def col(name: str) -> np.ndarray:
+        values = columns.get(name)
+        return np.zeros(size) if values is None else np.asarray(values, dtype=np.float64)
+
+    def sum_prefix(prefix: str) -> np.ndarray:
+        total = np.zeros(size)
+        for name, values in columns.items():
+            if name.startswith(prefix):
+                total += values
+        return total
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sentence_count = col('sentence_count')
+        word_count = col('word_count')
+        average_sentence = col('sentence_words') / sentence_count
+        sentence_length_ok = (average_sentence >= 8) & (average_sentence <= 20)
+
+        # Grammar section
+        svo, particles, punctuation = col('svo_matches') > 0, col('particles_found') > 0, col('punctuation_proper') > 0
+        grammar = (20.0 * svo + 15.0 * particles + 10.0 * punctuation +
+                   10.0 * (col('form:plural') > 0) +
+                   5.0 * ((col('form:feminine') + col('form:masculine')) > 0) +
+                   5.0 * (col('form:diminutive') > 0) +
+                   15.0 * sentence_length_ok)
+        grammar = np.minimum(grammar, 100)
+        issues = (~svo).astype(float) + ~particles + ~punctuation + ~sentence_length_ok
+
+        vocabulary = np.minimum(sum_prefix('category:') * 10, 100)
+        cultural = np.minimum(col('islamic_terms') * 5 + col('respectful_terms') * 3, 100)
+
+        # Readability section; texts without sentences or words score 0
+        readability = 100 - ((1.015 * (word_count / sentence_count)) +
+                             (84.6 * (col('word_chars') / word_count) / 4.7))
+        readability = np.where((sentence_count > 0) & (word_count > 0), np.clip(readability, 0, 100), 0.0)
+
+        professional = np.minimum((col('formal_terms') + 2 * col('has_citations')) * 10, 100)
+
+        # Enterprise metrics
+        appropriate = CULTURAL_SENSITIVITY >= 80
+        accuracy = _round1(
+            grammar * acc_w['grammar'] +
+            vocabulary * acc_w['vocabulary'] +
+            cultural * acc_w['cultural'] +
+            readability * acc_w['readability'] +
+            professional * acc_w['professional']
+        )
+        professionalism = _round1(np.minimum(
+            professional + 10.0 * appropriate + 5.0 * col('standard_dialect') - issues * 2, 100
+        ))
+        cultural_appropriateness = np.full(size, round(CULTURAL_SENSITIVITY, 1))
+        business = (30.0 * (grammar >= 80) + 25.0 * (vocabulary >= 70) + 20.0 * appropriate +
+                    15.0 * (readability >= 60) + 10.0 * (professional >= 70))
+        overall = _round1(
+            accuracy * all_w['accuracy'] +
+            professionalism * all_w['professionalism'] +
+            cultural_appropriateness * all_w['cultural_appropriateness'] +
+            business * all_w['business_readiness']
+        )
+
+    unscorable = sentence_count == 0
+    scores = {
+        'accuracy_score': accuracy,
+        'professionalism_score': professionalism,
+        'cultural_appropriateness': cultural_appropriateness,
+        'business_readiness': business,
+        'overall_enterprise_score': overall
+    }
+    for values in scores.values():
+        values[unscorable] = np.nan
+    return scores
+
+
+class FeatureStore:
+    """Append-only column files of sentence features
+
+    Each column is a flat int32 file (ids are int64) mapped read-only with
+    np.memmap, so a pass over one column touches only that column. meta.json
+    records the row count and the inputs the features depend on: the
+    extraction code, the lexicon and the dialect model. Metric weights are
+    not among them, which is the point of the store. Sentences are appended
+    in id order by update(); stale inputs trigger a rebuild.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db', store_dir: Optional[str] = None,
+                 engine: SomaliNLPEngine = nlp_engine):
+        self.db_path = db_path
+        self.store_dir = store_dir or os.path.splitext(db_path)[0] + '.features'
+        self.engine = engine
+
+    def inputs_key(self, lex=None) -> str:
+        lex = lex or self.engine.lexicon
+        model = self.engine.dialect_model
+        return f"{FEATURE_VERSION}/{lex.version_key}/{model.fingerprint if model is not None else 'indicators'}"
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name.replace(':', '__') + '.bin')
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.store_dir, 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta: Dict) -> None:
+        path = os.path.join(self.store_dir, 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def _reset(self, inputs: str, columns: Sequence[str]) -> Dict:
+        os.makedirs(self.store_dir, exist_ok=True)
+        for name in ('id',) + tuple(columns):
+            open(self._path(name), 'wb').close()
+        meta = {"inputs": inputs, "columns": list(columns), "rows": 0, "last_id": 0}
+        self._write_meta(meta)
+        return meta
+
+    def update(self, progress: Optional[ProgressCallback] = None) -> int:
+        """Featurize sentences added since the last update; returns how many"""
+
+        lex = self.engine.lexicon
+        inputs = self.inputs_key(lex)
+        columns = feature_columns(lex)
+        meta = self._read_meta()
+        if meta is None or meta["inputs"] != inputs or meta["columns"] != list(columns):
+            logger.info(f"Rebuilding feature store for {inputs}")
+            meta = self._reset(inputs, columns)
+        else:
+            # Drop rows appended after the last recorded commit
+            for name, itemsize in [('id', 8)] + [(column, 4) for column in columns]:
+                with open(self._path(name), 'r+b') as f:
+                    f.truncate(meta["rows"] * itemsize)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            pending = conn.execute('SELECT COUNT(*) FROM somali_sentences WHERE id > ?', (meta["last_id"],)).fetchone()[0]
+            added = 0
+            while True:
+                rows = conn.execute(
+                    'SELECT id, text FROM somali_sentences WHERE id > ? ORDER BY id LIMIT ?',
+                    (meta["last_id"], EXTRACT_BATCH)
+                ).fetchall()
+                if not rows:
+                    break
+
+                matrix = extract_features(self.engine, [text for _, text in rows], lex)
+                with open(self._path('id'), 'ab') as f:
+                    f.write(np.array([sentence_id for sentence_id, _ in rows], dtype=np.int64).tobytes())
+                for i, column in enumerate(columns):
+                    with open(self._path(column), 'ab') as f:
+                        f.write(np.ascontiguousarray(matrix[:, i]).tobytes())
+
+                meta["rows"] += len(rows)
+                meta["last_id"] = rows[-1][0]
+                self._write_meta(meta)
+                added += len(rows)
+                if progress is not None:
+                    progress(added, pending)
+        finally:
+            conn.close()
+
+        if added:
+            logger.info(f"Featurized {added} sentences")
+        return added
+
+    def load(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """(sentence ids, feature columns by name) as read-only memory maps"""
+
+        meta = self._read_meta()
+        if meta is None:
+            raise FileNotFoundError(f"No feature store at {self.store_dir}")
+        rows = meta["rows"]
+
+        def open_column(name: str, dtype) -> np.ndarray:
+            if rows == 0:
+                return np.zeros(0, dtype=dtype)
+            return np.memmap(self._path(name), dtype=dtype, mode='r', shape=(rows,))
+
+        return open_column('id', np.int64), {column: open_column(column, np.int32) for column in meta["columns"]}
+
+    def rescore(self, accuracy_weights: Optional[Dict[str, float]] = None,
+                overall_weights: Optional[Dict[str, float]] = None, apply: bool = False) -> Dict:
+        """
+        Re-score every stored sentence from its features
+
+        Args:
+            accuracy_weights: Replacements for entries of the engine's accuracy weights
+            overall_weights: Replacements for entries of the engine's overall weights
+            apply: Save the weights as the engine's, so later analyses agree,
+                and write changed scores of engine-scored sentences back to
+                the database; otherwise only report what would change
+
+        Returns:
+            Summary of the run
+        """
+
+        weights = self.engine.scoring_weights.merged(accuracy_weights, overall_weights)
+        started = time.perf_counter()
+        featurized = self.update()
+        ids, columns = self.load()
+        loaded = time.perf_counter()
+
+        scores = score_features(columns, weights)
+        overall = scores['overall_enterprise_score']
+        scored = time.perf_counter()
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Stored overall score first, then every metric kept in metadata
+            metrics = list(scores)
+            extracts = ', '.join(f"json_extract(metadata, '$.{name}')" for name in metrics)
+            stored = np.array(
+                conn.execute(f'SELECT id, quality_score, {extracts} FROM somali_sentences '
+                             f'WHERE {ENGINE_SCORED} ORDER BY id').fetchall(),
+                dtype=np.float64
+            ).reshape(-1, 2 + len(metrics))
+
+            # Engine-scored sentences present in the store, by store row
+            positions = np.searchsorted(ids, stored[:, 0])
+            present = positions < len(ids)
+            present[present] = ids[positions[present]] == stored[present, 0]
+            rows, old_scores = positions[present], stored[present, 1]
+            new_scores = overall[rows]
+            changed = ~np.isnan(new_scores) & (new_scores != old_scores)
+            for i, name in enumerate(metrics):
+                changed |= ~np.isnan(new_scores) & (scores[name][rows] != stored[present, 2 + i])
+
+            updated = 0
+            if apply:
+                # Saved first: whatever gets written is what the engine now computes
+                self.engine.save_scoring_weights(weights)
+                metric_columns = list(scores.items())
+                updates = [
+                    (float(overall[row]),
+                     json.dumps({name: float(values[row]) for name, values in metric_columns}),
+                     int(ids[row]))
+                    for row in rows[changed].tolist()
+                ]
+                for start in range(0, len(updates), WRITE_BATCH):
+                    batch = updates[start:start + WRITE_BATCH]
+                    conn.executemany(
+                        'UPDATE somali_sentences SET quality_score = ?, metadata = json_patch(metadata, ?) WHERE id = ?',
+                        batch
+                    )
+                    conn.commit()
+                    updated += len(batch)
+        finally:
+            conn.close()
+
+        finished = time.perf_counter()
+        valid = ~np.isnan(new_scores)
+        return {
+            "rows": int(len(ids)),
+            "featurized": featurized,
+            "engine_scored": int(len(rows)),
+            "changed": int(changed.sum()),
+            "updated": updated,
+            "weights": weights._asdict(),
+            "mean_before": round(float(old_scores.mean()), 2) if len(old_scores) else None,
+            "mean_after": round(float(new_scores[valid].mean()), 2) if valid.any() else None,
+            "timings_s": {
+                "featurize_and_load": round(loaded - started, 3),
+                "score": round(scored - loaded, 3),
+                "compare_and_write": round(finished - scored, 3)
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score the corpus from stored sentence features")
+    parser.add_argument('--db', default='somali_dataset.db')
+    parser.add_argument('--weights', help='JSON file with "accuracy" and/or "overall" weight overrides')
+    parser.add_argument('--apply', action='store_true', help='Write changed scores back to the database')
+    args = parser.parse_args()
+
+    weights = {}
+    if args.weights:
+        with open(args.weights) as f:
+            weights = json.load(f)
+
+    store = FeatureStore(args.db)
+    store.update(lambda done, total: print(f"   {done}/{total} sentences featurized"))
+    report = store.rescore(weights.get('accuracy'), weights.get('overall'), apply=args.apply)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
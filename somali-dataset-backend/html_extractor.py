@@ -0,0 +1,322 @@
+"""
+Streaming HTML Text Extractor
+Turns HTML arriving in chunks into content paragraphs: scripts, navigation
+and other boilerplate are dropped as the markup streams past, without
+building a document tree
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional
+
+from document_analyzer import DEFAULT_CHUNK_SIZE, iter_text_chunks
+
+# Blocks with fewer words are menus, bylines, buttons and captions
+MIN_BLOCK_WORDS = 5
+# Blocks with more of their words inside links are link lists
+MAX_LINK_DENSITY = 0.5
+
+# Elements whose raw content runs to their end tag and is never text
+RAW_TAGS = {'script', 'style', 'noscript', 'textarea', 'iframe', 'title', 'xmp'}
+# Elements that are never page content, skipped with everything inside
+BOILERPLATE_TAGS = {'head', 'nav', 'header', 'footer', 'aside', 'form', 'menu', 'button', 'select',
+                    'dialog', 'template', 'svg', 'math', 'object', 'video', 'audio', 'canvas', 'map'}
+# Containers skipped when their class, id or role names a boilerplate region
+CLASSED_TAGS = {'div', 'section', 'ul', 'ol', 'dl', 'table', 'span'}
+BOILERPLATE_ATTRIBUTES = re.compile(
+    r'''\b(?:class|id|role)\s*=\s*["']?[^"'>]*?\b(?:nav|navbar|navigation|menu|breadcrumbs?|header|footer|'''
+    r'''sidebar|widget|comments?|share|sharing|social|cookies?|banner|ads?|advert\w*|sponsored|promo|'''
+    r'''related|subscribe|newsletter|popup|modal|contentinfo|complementary)\b''',
+    re.IGNORECASE
+)
+# Elements that end a paragraph
+BLOCK_TAGS = {'p', 'div', 'br', 'hr', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+              'tr', 'td', 'th', 'table', 'caption', 'section', 'article', 'main', 'blockquote', 'pre',
+              'figure', 'figcaption', 'address', 'body', 'html'}
+# Other tags (b, em, img, ...) leave the text run alone
+ACTIVE_TAGS = RAW_TAGS | BOILERPLATE_TAGS | CLASSED_TAGS | BLOCK_TAGS | {'a'}
+
+# Tag attributes, quoted values may hold '>'
+_ATTRIBUTES = r'''([^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*)'''
+# A tag, a comment start, or a declaration / processing instruction
+TOKEN = re.compile(rf'''<(?:(/?)([A-Za-z][A-Za-z0-9:-]*){_ATTRIBUTES}>|(!--)|![^>]*>|\?[^>]*>)''')
+COMMENT_END = re.compile(r'-->')
+RAW_ENDS = {tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in RAW_TAGS}
+# Characters kept from an unfinished raw section, enough for a split end tag
+RAW_TAIL = 16
+
+
+def _skip_token(tag: str) -> re.Pattern:
+    """Inside a skipped element only its own tags, raw sections and the page end matter"""
+
+    names = '|'.join(sorted({tag, 'body', 'html'} | RAW_TAGS))
+    return re.compile(rf'''<(?:(/?)({names})(?=[\s/>]){_ATTRIBUTES}>|(!--))''', re.IGNORECASE)
+
+
+SKIP_TOKENS = {tag: _skip_token(tag) for tag in BOILERPLATE_TAGS | CLASSED_TAGS}
+
+
+class HTMLTextExtractor:
+    """
+    Incremental main-content extractor: feed() takes HTML as it arrives
+    and returns the paragraphs completed so far
+
+    Markup is tokenized with regular expressions and handled as a flat
+    stream of events; only the current paragraph and one open boilerplate
+    element are tracked. A paragraph is the text between two block tags,
+    with whitespace collapsed and entities decoded. It is kept when it has
+    at least min_words words and at most max_link_density of them are link
+    text. Output is the same however the input is chunked.
+    """
+
+    def __init__(self, min_words: int = MIN_BLOCK_WORDS, max_link_density: float = MAX_LINK_DENSITY):
+        self.min_words = min_words
+        self.max_link_density = max_link_density
+        self.stats = {"chars": 0, "blocks": 0, "paragraphs": 0, "short_blocks": 0,
+                      "link_blocks": 0, "skipped_elements": 0}
+        self._buffer = ''
+        self._paragraphs: List[str] = []
+        self._parts: List[str] = []
+        self._link_words = 0
+        self._in_link = 0
+        # End of the raw section or comment being skipped
+        self._until: Optional[re.Pattern] = None
+        # Boilerplate element being skipped and its nesting depth
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+
+    def feed(self, data: str) -> List[str]:
+        self.stats["chars"] += len(data)
+        self._buffer += data
+        self._scan(final=False)
+        paragraphs, self._paragraphs = self._paragraphs, []
+        return paragraphs
+
+    def close(self) -> List[str]:
+        """Flush the last paragraph; an unfinished tag at the end is dropped"""
+
+        self._scan(final=True)
+        self._finish_block()
+        paragraphs, self._paragraphs = self._paragraphs, []
+        return paragraphs
+
+    def _scan(self, final: bool) -> None:
+        buffer = self._buffer
+        size = len(buffer)
+        position = 0
+        while position < size:
+            if self._until is not None:
+                end = self._until.search(buffer, position)
+                if end is None:
+                    position = size if final else max(position, size - RAW_TAIL)
+                    break
+                position = end.end()
+                self._until = None
+                continue
+
+            skipping = self._skip_tag is not None
+            token = (SKIP_TOKENS[self._skip_tag] if skipping else TOKEN).search(buffer, position)
+            if token is None:
+                # The rest may end in a split tag or entity and waits for more input
+                if skipping:
+                    last = buffer.rfind('<', position)
+                    position = size if final or last < 0 else last
+                elif final:
+                    rest = buffer[position:]
+                    cut = rest.rfind('<')
+                    self._text(rest if cut < 0 or '>' in rest[cut:] else rest[:cut])
+                    position = size
+                break
+            start = token.start()
+            if start > position and not skipping:
+                self._text(buffer[position:start])
+            position = token.end()
+            closing, name, attributes, comment = token.groups()
+            if comment:
+                self._until = COMMENT_END
+            elif name:
+                name = name.lower()
+                if name in ACTIVE_TAGS:
+                    self._tag(closing == '/', name, attributes)
+        self._buffer = buffer[position:]
+
+    def _tag(self, closing: bool, name: str, attributes: str) -> None:
+        if not closing and name in RAW_TAGS:
+            self._until = RAW_ENDS[name]
+            return
+
+        if self._skip_tag is not None:
+            if name == self._skip_tag:
+                self._skip_depth += -1 if closing else 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            elif closing and name in ('body', 'html'):
+                # An element left open to the end of the page
+                self._skip_tag = None
+                self._skip_depth = 0
+            return
+
+        if not closing and not attributes.rstrip().endswith('/') and (
+                name in BOILERPLATE_TAGS or (name in CLASSED_TAGS and BOILERPLATE_ATTRIBUTES.search(attributes))):
+            self._finish_block()
+            self.stats["skipped_elements"] += 1
+            self._skip_tag = name
+            self._skip_depth = 1
+        elif name == 'a':
+            self._in_link = max(self._in_link + (-1 if closing else 1), 0)
+        elif name in BLOCK_TAGS:
+            self._finish_block()
+
+    def _text(self, text: str) -> None:
+        if '&' in text:
+            text = html.unescape(text)
+        self._parts.append(text)
+        if self._in_link:
+            self._link_words += len(text.split())
+
+    def _finish_block(self) -> None:
+        if not self._parts:
+            return
+        words = ''.join(self._parts).split()
+        link_words = self._link_words
+        self._parts = []
+        self._link_words = 0
+        if not words:
+            return
+
+        self.stats["blocks"] += 1
+        if len(words) < self.min_words:
+            self.stats["short_blocks"] += 1
+        elif link_words > self.max_link_density * len(words):
+            self.stats["link_blocks"] += 1
+        else:
+            self.stats["paragraphs"] += 1
+            self._paragraphs.append(' '.join(words))
+
+
+def iter_paragraphs(chunks: Iterable[str], extractor: Optional[HTMLTextExtractor] = None) -> Iterable[str]:
+    """Content paragraphs of an HTML chunk stream, as each one completes"""
+
+    extractor = extractor or HTMLTextExtractor()
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+    yield from extractor.close()
+
+
+# Benchmark fixtures: news-style pages of article paragraphs wrapped in the
+# scripts, menus, link lists and ad slots real pages carry
+
+_FIXTURE_SENTENCES = [
+    "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dugsiga sare.",
+    "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn ee magaalada.",
+    "Dalka Soomaaliya waa dal qurux badan oo ku yaal Bariga Afrika.",
+    "Ganacsiga suuqa waa mid horumar leh oo dadka ka faa'iideystaan.",
+    "Beeraleydu waxay &amp; xoolaleydu sugayaan roobka dayrta ee soo socda.",
+    "Waxbarashadu waa iftiin, jaahilnimaduna waa mugdi ayay odayaashu yiraahdaan.",
+    "Dowladda hoose waxay dhistay waddo cusub oo isku xirta <b>labada</b> degmo.",
+    "Kooxda kubadda cagta ee magaalada ayaa ku guuleysatay ciyaartii <a href='/sport'>kama dambaysta</a>.",
+]
+
+_FIXTURE_HEAD = (
+    "<!DOCTYPE html><html lang='so'><head><meta charset='utf-8'><title>Wararka Maanta</title>"
+    "<style>body {{ font: 16px sans-serif; }} .ad-slot > div {{ margin: 0 }}</style>"
+    "<script>window.dataLayer = []; if (a < b && c > d) {{ track('</p>'); }}</script></head>"
+    "<body class='nav-open'><header class='site-header'><a href='/'>Wararka</a></header>"
+    "<nav><ul>{menu}</ul></nav><main><article><h1>Warbixin {index}</h1>"
+)
+_FIXTURE_TAIL = (
+    "</article><aside><h3>Akhri kuwan</h3><ul>{menu}</ul></aside></main>"
+    "<footer><p>&copy; Wararka Maanta. Dhammaan xuquuqda way dhowran yihiin, fadlan ha koobiyeyn.</p></footer>"
+    "</body></html>"
+)
+
+
+def fixture_page(index: int, size: int) -> str:
+    """A deterministic page of about size characters"""
+
+    rng = random.Random(index)
+    links = [f"<li><a href='/qayb/{n}'>Qaybta {n}</a></li>" for n in range(30)]
+    menu = ''.join(links)
+    parts = [_FIXTURE_HEAD.format(menu=menu, index=index)]
+    length = len(parts[0])
+    paragraph = 0
+    while length < size:
+        paragraph += 1
+        sentences = ' '.join(rng.choice(_FIXTURE_SENTENCES) for _ in range(rng.randint(2, 6)))
+        block = f"<p>{sentences}</p>\n"
+        if paragraph % 10 == 0:
+            block += ("<p>Sidoo kale akhri: <a href='/1'>Warbixinta doorashada ee gobolka</a> iyo "
+                      "<a href='/2'>Miisaaniyadda cusub ee dowladda</a></p>"
+                      "<div class='ad-slot'><div><a href='/ad'>Xayeysiis</a></div></div>"
+                      f"<!-- <p>faallo {paragraph}</p> --><ul class='related'>{''.join(links[:8])}</ul>\n")
+        parts.append(block)
+        length += len(block)
+    parts.append(_FIXTURE_TAIL.format(menu=menu))
+    return ''.join(parts)
+
+
+def write_fixture_corpus(directory: str, pages: int = 20, page_size: int = 1024 * 1024) -> List[str]:
+    """Write (or reuse) fixture pages; returns their paths"""
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(pages):
+        path = os.path.join(directory, f"page_{index:03d}_{page_size}.html")
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(fixture_page(index, page_size))
+        paths.append(path)
+    return paths
+
+
+def benchmark(paths: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """Extract every page chunk by chunk as a download would deliver it"""
+
+    totals = {"pages": len(paths), "bytes": 0, "paragraphs": 0, "short_blocks": 0,
+              "link_blocks": 0, "skipped_elements": 0}
+    started = time.perf_counter()
+    for path in paths:
+        totals["bytes"] += os.path.getsize(path)
+        extractor = HTMLTextExtractor()
+        for _ in iter_paragraphs(iter_text_chunks(path, chunk_size), extractor):
+            pass
+        for name in ("paragraphs", "short_blocks", "link_blocks", "skipped_elements"):
+            totals[name] += extractor.stats[name]
+    elapsed = time.perf_counter() - started
+    return {
+        **totals,
+        "chunk_size": chunk_size,
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(totals["bytes"] / elapsed / 1e6, 2) if elapsed else None,
+        "pages_per_s": round(len(paths) / elapsed, 2) if elapsed else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract content paragraphs from HTML files, or benchmark the extractor")
+    parser.add_argument('files', nargs='*', help='HTML files to extract')
+    parser.add_argument('--benchmark', action='store_true', help='Time extraction over a fixture corpus of large pages')
+    parser.add_argument('--fixtures', default=os.path.join(tempfile.gettempdir(), 'somali_html_fixtures'))
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--page-kb', type=int, default=1024)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        paths = args.files or write_fixture_corpus(args.fixtures, args.pages, args.page_kb * 1024)
+        print(json.dumps(benchmark(paths, args.chunk_size), indent=2))
+        return
+
+    for path in args.files:
+        for paragraph in iter_paragraphs(iter_text_chunks(path, args.chunk_size)):
+            print(paragraph)
+
+
+if __name__ == '__main__':
+    main()
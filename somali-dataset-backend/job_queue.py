@@ -0,0 +1,397 @@
+"""
+Background Jobs
+Long collection, generation and validation requests run as jobs: persisted
+in the jobs table, processed by a pool of worker threads with progress
+reporting and cooperative cancellation, and resumed after a restart
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+JOB_WORKERS = 2
+# Seconds between writes of running jobs' heartbeat and progress
+HEARTBEAT_S = 2.0
+# A running job without a heartbeat for this long lost its worker and is queued again
+LEASE_S = 60
+# Seconds an idle worker waits before looking for jobs submitted by other processes
+POLL_S = 1.0
+# Runs of a job whose worker keeps getting lost before it is failed
+MAX_ATTEMPTS = 3
+
+ProgressCallback = Callable[[int, int], None]
+# Called with the job's params and a progress callback; returns the JSON result
+JobHandler = Callable[[Dict, ProgressCallback], Dict]
+
+_JOB_FIELDS = ('id', 'kind', 'status', 'user_id', 'progress_done', 'progress_total', 'attempts',
+               'cancel_requested', 'error', 'created_at', 'started_at', 'finished_at')
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once its cancellation was requested"""
+
+
+class _Interrupted(Exception):
+    """Raised from a job's progress callback while the queue stops; the job is queued again"""
+
+
+class JobQueue:
+    """
+    The jobs table and the worker threads that drain it
+
+    Workers claim the oldest queued job in a write transaction, so several
+    processes can share one database. While a job runs, a heartbeat thread
+    records its progress every HEARTBEAT_S and picks up cancellation
+    requests, which the job's progress callback turns into JobCancelled.
+    A job whose heartbeat is older than LEASE_S, because its process died,
+    goes back to the queue; stop() queues unfinished jobs again at once.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db', workers: int = JOB_WORKERS,
+                 heartbeat_s: float = HEARTBEAT_S, lease_s: int = LEASE_S, poll_s: float = POLL_S,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.workers = workers
+        self.heartbeat_s = heartbeat_s
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.max_attempts = max_attempts
+        # Claims of this queue are tagged with it, so a job re-claimed elsewhere is left alone
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+        self._lock = threading.Lock()
+        # [done, total] of the jobs running here, by id
+        self._running: Dict[str, List[int]] = {}
+        self._cancelled: set = set()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        self.create_tables(conn)
+        return conn
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                user_id INTEGER,
+                progress_done INTEGER NOT NULL DEFAULT 0,
+                progress_total INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+                worker TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, created_at)')
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Dict, user_id: Optional[int] = None) -> Dict:
+        """Queue a job and return its status"""
+
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+
+        job_id = uuid.uuid4().hex
+        conn = self.connect()
+        try:
+            conn.execute('INSERT INTO jobs (id, kind, params, user_id) VALUES (?, ?, ?, ?)',
+                         (job_id, kind, json.dumps(params), user_id))
+            job = self._fetch(conn, job_id)
+        finally:
+            conn.close()
+
+        with self._wake:
+            self._wake.notify()
+        return job
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict]:
+        conn = self.connect()
+        try:
+            return self._fetch(conn, job_id, include_result)
+        finally:
+            conn.close()
+
+    def recent(self, user_id: Optional[int] = None, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first, optionally of one user or status"""
+
+        query = f"SELECT {', '.join(_JOB_FIELDS)} FROM jobs WHERE 1 = 1"
+        params: list = []
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC, rowid DESC LIMIT ?"
+        params.append(limit)
+
+        conn = self.connect()
+        try:
+            return [self._view(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a job: a queued one at once, a running one at its next
+        progress report. Finished jobs are left as they are
+        """
+
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'Cancelled', finished_at = datetime('now') "
+                "WHERE id = ? AND status = ?", (CANCELLED, job_id, QUEUED)
+            )
+            conn.execute('UPDATE jobs SET cancel_requested = TRUE WHERE id = ? AND status = ?', (job_id, RUNNING))
+            conn.execute('COMMIT')
+            job = self._fetch(conn, job_id)
+        finally:
+            conn.close()
+
+        # Jobs running in this process notice without waiting for a heartbeat
+        if job is not None and job['cancel_requested']:
+            with self._lock:
+                if job_id in self._running:
+                    self._cancelled.add(job_id)
+        return job
+
+    def stats(self) -> Dict:
+        conn = self.connect()
+        try:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'))
+            oldest = conn.execute(
+                "SELECT CAST(ROUND((julianday('now') - julianday(MIN(created_at))) * 86400) AS INTEGER) "
+                "FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            running_here = len(self._running)
+        return {
+            "by_status": {status: counts.get(status, 0) for status in (QUEUED, RUNNING) + FINISHED},
+            "oldest_queued_s": oldest,
+            "workers": self.workers if self._threads else 0,
+            "running_here": running_here
+        }
+
+    def start(self) -> None:
+        """Start the worker threads and the heartbeat thread; idempotent"""
+
+        if self._threads:
+            return
+        self._stop.clear()
+        self.connect().close()
+        self._threads = [threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)]
+        self._threads += [threading.Thread(target=self._work, name=f'job-worker-{n}', daemon=True)
+                          for n in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the workers; jobs still running are queued again"""
+
+        self._stop.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        # Jobs whose handler did not reach a progress report in time
+        conn = self.connect()
+        try:
+            conn.execute('UPDATE jobs SET status = ?, worker = NULL WHERE worker = ? AND status = ?',
+                         (QUEUED, self.worker_id, RUNNING))
+        finally:
+            conn.close()
+
+    def run_next(self) -> Optional[str]:
+        """Claim and run the oldest queued job in the calling thread; returns its id, None if none was queued"""
+
+        job = self._claim()
+        if job is None:
+            return None
+        self._run(*job)
+        return job[0]
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is None:
+                with self._wake:
+                    self._wake.wait(self.poll_s)
+                continue
+            self._run(*job)
+
+    def _claim(self) -> Optional[tuple]:
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._reclaim_expired(conn)
+            row = conn.execute(
+                'SELECT id, kind, params FROM jobs WHERE status = ? ORDER BY created_at, rowid LIMIT 1', (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute('''
+                    UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1,
+                        started_at = COALESCE(started_at, datetime('now')), heartbeat_at = datetime('now')
+                    WHERE id = ?
+                ''', (RUNNING, self.worker_id, row[0]))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _reclaim_expired(self, conn: sqlite3.Connection) -> None:
+        """Queue again the running jobs whose worker stopped sending heartbeats"""
+
+        conn.execute('''
+            UPDATE jobs SET
+                status = CASE WHEN cancel_requested THEN 'cancelled' WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                error = CASE WHEN cancel_requested THEN 'Cancelled'
+                             WHEN attempts >= ? THEN 'Worker lost ' || attempts || ' times' ELSE error END,
+                finished_at = CASE WHEN cancel_requested OR attempts >= ? THEN datetime('now') END,
+                worker = NULL
+            WHERE status = 'running' AND heartbeat_at < datetime('now', ?)
+        ''', (self.max_attempts, self.max_attempts, self.max_attempts, f'-{int(self.lease_s)} seconds'))
+
+    def _run(self, job_id: str, kind: str, params: Dict) -> None:
+        state = [0, 0]
+        with self._lock:
+            self._running[job_id] = state
+
+        def progress(done: int, total: int) -> None:
+            state[0], state[1] = done, total
+            if job_id in self._cancelled:
+                raise JobCancelled(job_id)
+            if self._stop.is_set():
+                raise _Interrupted(job_id)
+
+        try:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise ValueError(f"Unknown job kind '{kind}'")
+            result = handler(params, progress)
+        except JobCancelled:
+            self._finish(job_id, CANCELLED, state, error='Cancelled')
+        except _Interrupted:
+            self._requeue(job_id, state)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            self._finish(job_id, FAILED, state, error=f"{type(e).__name__}: {e}")
+        else:
+            self._finish(job_id, SUCCEEDED, state, result=result)
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._cancelled.discard(job_id)
+
+    def _finish(self, job_id: str, status: str, state: List[int], result: Optional[Dict] = None,
+                error: Optional[str] = None) -> None:
+        conn = self.connect()
+        try:
+            conn.execute('''
+                UPDATE jobs SET status = ?, result = ?, error = ?, progress_done = ?, progress_total = ?,
+                    finished_at = datetime('now'), worker = NULL
+                WHERE id = ? AND worker = ? AND status = 'running'
+            ''', (status, None if result is None else json.dumps(result, default=str), error,
+                  state[0], state[1], job_id, self.worker_id))
+        finally:
+            conn.close()
+
+    def _requeue(self, job_id: str, state: List[int]) -> None:
+        conn = self.connect()
+        try:
+            conn.execute('''
+                UPDATE jobs SET status = 'queued', worker = NULL, progress_done = ?, progress_total = ?
+                WHERE id = ? AND worker = ? AND status = 'running'
+            ''', (state[0], state[1], job_id, self.worker_id))
+        finally:
+            conn.close()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.heartbeat_s):
+            with self._lock:
+                running = {job_id: tuple(state) for job_id, state in self._running.items()}
+            if not running:
+                continue
+            try:
+                conn = self.connect()
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                    conn.executemany('''
+                        UPDATE jobs SET heartbeat_at = datetime('now'), progress_done = ?, progress_total = ?
+                        WHERE id = ? AND worker = ? AND status = 'running'
+                    ''', [(done, total, job_id, self.worker_id) for job_id, (done, total) in running.items()])
+                    ids = list(running)
+                    cancelled = [job_id for job_id, in conn.execute(
+                        f"SELECT id FROM jobs WHERE id IN ({','.join('?' * len(ids))}) AND cancel_requested", ids
+                    )]
+                    conn.execute('COMMIT')
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                logger.exception("Job heartbeat failed")
+                continue
+            if cancelled:
+                with self._lock:
+                    self._cancelled.update(job_id for job_id in cancelled if job_id in self._running)
+
+    def _fetch(self, conn: sqlite3.Connection, job_id: str, include_result: bool = False) -> Optional[Dict]:
+        fields = _JOB_FIELDS + (('result',) if include_result else ())
+        row = conn.execute(f"SELECT {', '.join(fields)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._view(row[:len(_JOB_FIELDS)])
+        if include_result:
+            job['result'] = None if row[-1] is None else json.loads(row[-1])
+        return job
+
+    @staticmethod
+    def _view(row: tuple) -> Dict:
+        job = dict(zip(_JOB_FIELDS, row))
+        done, total = job.pop('progress_done'), job.pop('progress_total')
+        job['progress'] = {
+            "done": done,
+            "total": total,
+            "percent": round(100.0 * done / total, 1) if total else None
+        }
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
@@ -0,0 +1,144 @@
+"""
+Character Trigram Language Identification
+Cheap Somali / English / Arabic / other prefilter run before enterprise analysis
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dialect_model import HashedNgrams
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILES_PATH = os.environ.get(
+    'SOMALI_LANGUAGE_PROFILES', os.path.join(BASE_DIR, 'lexicons', 'language_profiles.json')
+)
+
+OTHER_LANGUAGE = 'other'
+PROFILE_HASH_BITS = 14
+SMOOTHING = 0.5
+
+# Average log-probability gain per trigram over an unseen trigram below which
+# a text does not resemble any profiled language
+MIN_FAMILIARITY = 1.0
+
+
+class LanguageIdentifier:
+    """Naive Bayes over hashed word-bounded character trigrams
+
+    Each profile is a row of smoothed log-probabilities in a
+    (languages x 2**PROFILE_HASH_BITS) array; a batch is scored with one
+    gather and a segmented sum over all trigrams of all texts.
+    """
+
+    def __init__(self, seed_texts: Dict[str, Sequence[str]], hash_bits: int = PROFILE_HASH_BITS,
+                 smoothing: float = SMOOTHING, min_familiarity: float = MIN_FAMILIARITY):
+        self.languages = tuple(seed_texts)
+        self.featurizer = HashedNgrams(hash_bits, orders=(3,))
+        self.min_familiarity = min_familiarity
+
+        n_features = self.featurizer.n_features
+        log_probs = np.empty((len(self.languages), n_features), dtype=np.float32)
+        self.unseen_log_probs = np.empty(len(self.languages))
+
+        for row, language in enumerate(self.languages):
+            ids, _ = self.featurizer.transform(list(seed_texts[language]))
+            counts = np.bincount(ids, minlength=n_features).astype(np.float64)
+            total = counts.sum() + smoothing * n_features
+            log_probs[row] = np.log((counts + smoothing) / total)
+            self.unseen_log_probs[row] = np.log(smoothing / total)
+
+        self._columns = np.ascontiguousarray(log_probs.T)  # one row of language scores per trigram
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_PROFILES_PATH) -> 'LanguageIdentifier':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['languages'])
+
+    def log_likelihoods(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Summed trigram log-probabilities per (text, language) and trigram counts"""
+
+        n = len(texts)
+        sums = np.zeros((n, len(self.languages)))
+        counts = np.zeros(n)
+        if not n:
+            return sums, counts
+
+        for ids, owners in self.featurizer.transform_by_order(texts):
+            if not len(ids):
+                continue
+            per_text = np.bincount(owners, minlength=n)
+            present = np.flatnonzero(per_text)
+            offsets = np.cumsum(per_text) - per_text
+            sums[present] += np.add.reduceat(self._columns[ids], offsets[present], axis=0, dtype=np.float64)
+            counts += per_text
+
+        return sums, counts
+
+    def identify(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Return (language, confidence 0-100) per text; unfamiliar text is 'other'"""
+
+        sums, counts = self.log_likelihoods(texts)
+        results = []
+        if not len(texts):
+            return results
+
+        best = sums.argmax(axis=1)
+        safe_counts = np.maximum(counts, 1)
+        familiarity = (sums[np.arange(len(best)), best] / safe_counts) - self.unseen_log_probs[best]
+
+        # Naive Bayes posterior over the profiled languages
+        shifted = np.exp(sums - sums.max(axis=1, keepdims=True))
+        confidence = np.round(shifted.max(axis=1) / shifted.sum(axis=1) * 100, 1)
+
+        for language, familiar, conf, count in zip(best.tolist(), familiarity.tolist(),
+                                                   confidence.tolist(), counts.tolist()):
+            if count == 0 or familiar < self.min_familiarity:
+                results.append((OTHER_LANGUAGE, 0.0))
+            else:
+                results.append((self.languages[language], conf))
+        return results
+
+
+class LanguageGate:
+    """First collection gate: keeps Somali texts and counts the rest by language"""
+
+    def __init__(self, path: str = DEFAULT_PROFILES_PATH):
+        self.path = path
+        self._identifier: Optional[LanguageIdentifier] = None
+        self._lock = threading.Lock()
+
+    @property
+    def identifier(self) -> LanguageIdentifier:
+        identifier = self._identifier
+        if identifier is None:
+            with self._lock:
+                if self._identifier is None:
+                    self._identifier = LanguageIdentifier.from_file(self.path)
+                identifier = self._identifier
+        return identifier
+
+    def split(self, texts: Sequence[str]) -> Tuple[List[int], Dict[str, int]]:
+        """
+        Identify a batch
+
+        Returns:
+            Indices of the Somali texts and rejection counts per detected language
+        """
+
+        kept = []
+        rejected: Dict[str, int] = {}
+        for i, (language, _) in enumerate(self.identifier.identify(texts)):
+            if language == 'somali':
+                kept.append(i)
+            else:
+                rejected[language] = rejected.get(language, 0) + 1
+        return kept, rejected
+
+
+# Initialize global language gate (profiles load on first use)
+language_gate = LanguageGate()
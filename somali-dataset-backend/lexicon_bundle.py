@@ -0,0 +1,227 @@
+"""
+Versioned Somali Lexicon Bundles
+Compiles the JSON lexicon bundle into matcher/lookup tables, caches the
+compiled form on disk and serves it through an atomically swappable reference
+"""
+
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from morphology import SuffixTrie
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LEXICON_PATH = os.environ.get(
+    'SOMALI_LEXICON_PATH', os.path.join(BASE_DIR, 'lexicons', 'somali_lexicon.json')
+)
+DEFAULT_CACHE_DIR = os.environ.get(
+    'SOMALI_LEXICON_CACHE', os.path.join(BASE_DIR, '.lexicon_cache')
+)
+
+# Bump when the compiled layout changes so stale cache files are ignored
+COMPILER_VERSION = 2
+
+REQUIRED_SECTIONS = (
+    'professional_words', 'professional_indicators', 'grammatical_patterns',
+    'dialect_markers', 'grammar_rules', 'cultural_context'
+)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Build a trie-shaped regex matching the longest term at a position"""
+
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Terminal nodes make the continuation optional; greedy '?' prefers the longer term
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class CompiledLexicon:
+    """Immutable, compiled snapshot of a lexicon bundle"""
+
+    def __init__(self, data: Dict, content_hash: str):
+        self.data = data
+        self.name = data.get('name', 'lexicon')
+        self.version = str(data['version'])
+        self.content_hash = content_hash
+
+        cultural = data['cultural_context']
+        indicators = data['professional_indicators']
+
+        # Substring-matched term groups used by the analyzers
+        self.particles = tuple(data['grammatical_patterns']['particles'])
+        self.formal_patterns = tuple(indicators['formal_patterns'])
+        self.academic_words = tuple(indicators['academic_words'])
+        self.islamic_terms = tuple(
+            (category, tuple(terms)) for category, terms in cultural['islamic_terms'].items()
+            if category != 'proper_usage'
+        )
+        self.respectful_terms = tuple(
+            (category, tuple(terms)) for category, terms in cultural['respectful_language'].items()
+        )
+        self.dialect_indicators = tuple(
+            (dialect, tuple(markers['indicators']), markers['weight'] * markers['confidence_boost'])
+            for dialect, markers in data['dialect_markers'].items()
+        )
+
+        terms = set(self.particles) | set(self.formal_patterns) | set(self.academic_words)
+        for _, group in self.islamic_terms + self.respectful_terms:
+            terms.update(group)
+        for _, group, _ in self.dialect_indicators:
+            terms.update(group)
+        terms.discard('')
+
+        # Matcher automaton: one trie regex under a lookahead reports the longest
+        # term at every position; shorter terms there are its prefixes
+        self.term_regex = re.compile('(?=(' + _trie_pattern(terms) + '))') if terms else None
+        self.prefix_terms = {
+            term: tuple(other for other in terms if term.startswith(other))
+            for term in terms
+        }
+
+        # Lookup tables for whole-word vocabulary matching
+        self.professional_categories = tuple(data['professional_words'])
+        word_categories = {}
+        for category, words in data['professional_words'].items():
+            for word in words:
+                categories = word_categories.setdefault(word, [])
+                if category not in categories:
+                    categories.append(category)
+        self.word_categories = {word: tuple(categories) for word, categories in word_categories.items()}
+
+        self.svo_regex = re.compile(data['grammar_rules']['sentence_structure']['svo_pattern'])
+        self.morphology = SuffixTrie(data['grammar_rules']['word_formation'])
+        self.sentence_enders = tuple(data['grammar_rules']['punctuation_rules']['sentence_enders'])
+
+    @property
+    def version_key(self) -> str:
+        """Identifies this exact lexicon content (name, version and hash)"""
+        return f"{self.name}@{self.version}+{self.content_hash[:12]}"
+
+    def scan(self, text_lower: str) -> Set[str]:
+        """Return every lexicon term occurring as a substring of the text"""
+
+        found = set()
+        if self.term_regex is None:
+            return found
+
+        prefix_terms = self.prefix_terms
+        for match in self.term_regex.finditer(text_lower):
+            term = match.group(1)
+            if term:
+                found.update(prefix_terms[term])
+        return found
+
+    def categories_for(self, word: str) -> Tuple[str, ...]:
+        return self.word_categories.get(word, ())
+
+
+def validate_bundle(data: Dict) -> None:
+    """Raise ValueError if a bundle is missing required sections"""
+
+    if 'version' not in data:
+        raise ValueError("Lexicon bundle has no 'version'")
+    missing = [section for section in REQUIRED_SECTIONS if section not in data]
+    if missing:
+        raise ValueError(f"Lexicon bundle missing sections: {', '.join(missing)}")
+
+
+def load_lexicon(path: str = DEFAULT_LEXICON_PATH, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> CompiledLexicon:
+    """Load a bundle, reusing the on-disk compiled form when the content is unchanged"""
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"lexicon-v{COMPILER_VERSION}-{content_hash[:24]}.pickle")
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    lexicon = pickle.load(f)
+                if lexicon.content_hash == content_hash:
+                    return lexicon
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable lexicon cache {cache_path}: {e}")
+
+    data = json.loads(raw.decode('utf-8'))
+    validate_bundle(data)
+    lexicon = CompiledLexicon(data, content_hash)
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write lexicon cache {cache_path}: {e}")
+
+    logger.info(f"Compiled lexicon {lexicon.version_key} from {path}")
+    return lexicon
+
+
+class LexiconProvider:
+    """Lazily loads the active lexicon and swaps it atomically on reload
+
+    Readers grab one snapshot per analysis via get(); a reload compiles the
+    new bundle first and then replaces the reference in a single assignment,
+    so in-flight analyses keep using the snapshot they started with.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEXICON_PATH, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.path = path
+        self.cache_dir = cache_dir
+        self._current = None
+        self._lock = threading.Lock()
+
+    def get(self) -> CompiledLexicon:
+        lexicon = self._current
+        if lexicon is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = load_lexicon(self.path, self.cache_dir)
+                lexicon = self._current
+        return lexicon
+
+    def reload(self, path: Optional[str] = None) -> CompiledLexicon:
+        """Compile a bundle (the configured one by default) and make it active"""
+
+        lexicon = load_lexicon(path or self.path, self.cache_dir)
+        with self._lock:
+            if path:
+                self.path = path
+            self._current = lexicon
+
+        logger.info(f"Active lexicon is now {lexicon.version_key}")
+        return lexicon
+
+    def set(self, lexicon: CompiledLexicon) -> None:
+        """Install an already compiled lexicon"""
+        with self._lock:
+            self._current = lexicon
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._current is not None
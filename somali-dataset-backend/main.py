@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException, Depends, Header, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Dict, Optional
@@ -13,8 +14,19 @@ import uuid
 import os
 import subprocess
 import shutil
-# from enterprise_nlp import nlp_engine
-# from data_collection_system import data_collector
+from enterprise_nlp import nlp_engine
+from analysis_results import normalize_fields
+from document_analyzer import DocumentAnalyzer
+from dialect_model import train_from_database
+from scoring_pipeline import ScoringPipeline, get_pipeline
+from language_id import language_gate
+from corpus_rescoring import RescoringJob
+from token_index import TokenIndex, QueryError
+from feature_store import FeatureStore
+from data_collection_system import data_collector
+from job_queue import FINISHED, JobQueue
+from validation_queue import ValidationQueue, ValidationWorker
+from scholar_review import ReviewSessionNotFound, ScholarReview
 
 app = FastAPI(title="Somali AI Dataset API", version="1.0.0")
 
@@ -30,6 +42,26 @@ app.add_middleware(
 # Authentication setup
 security = HTTPBearer()
 
+# Token -> sentence posting lists and vocabulary counts for /sentences/search and /stats/vocabulary
+token_index = TokenIndex()
+
+# Collection, generation and validation requests run as background jobs
+job_queue = JobQueue()
+
+# Texts waiting for validation; drained by validation_queue.py worker processes
+validation_queue = ValidationQueue()
+
+# Batched scholar review sessions over scholar_validations
+scholar_review = ScholarReview()
+
+@app.on_event("startup")
+def start_job_workers():
+    job_queue.start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_queue.stop()
+
 # Database setup
 def init_db():
     conn = sqlite3.connect('somali_dataset.db')
@@ -168,18 +200,44 @@ class SomaliSentence(BaseModel):
 
 class QualityAnalysis(BaseModel):
     text: str
+    fields: Optional[List[str]] = None
 
 class BulkAnalysis(BaseModel):
     texts: List[str]
     include_enterprise: bool = True
+    fields: Optional[List[str]] = None
+    language_filter: bool = True
 
 class DataCollection(BaseModel):
     texts: List[str]
     source_name: str = "api_submission"
 
+class WebCollection(BaseModel):
+    urls: List[str]
+
 class DataGeneration(BaseModel):
     count: int = 1000
     quality_threshold: float = 70.0
+    seed: Optional[int] = None
+
+class ReviewSessionStart(BaseModel):
+    batch_size: int = 20
+
+class ScholarVerdict(BaseModel):
+    sentence_id: int
+    approved: bool
+    validation_score: Optional[int] = None
+    cultural_score: Optional[int] = None
+    grammar_score: Optional[int] = None
+    notes: Optional[str] = None
+
+class VerdictBatch(BaseModel):
+    verdicts: List[ScholarVerdict]
+
+class FeatureRescore(BaseModel):
+    accuracy_weights: Optional[Dict[str, float]] = None
+    overall_weights: Optional[Dict[str, float]] = None
+    apply: bool = False
 
 class DatasetStats(BaseModel):
     total_sentences: int
@@ -196,65 +254,6 @@ class SpeechGenerationRequest(BaseModel):
     text: str
     voiceId: str = "default"
 
-# Quality analysis functions
-def calculate_quality_score(text: str) -> Dict:
-    """Calculate quality metrics for Somali text"""
-    
-    # Basic quality indicators
-    length_score = min(len(text.split()) / 10, 1.0) * 25  # Good length
-    
-    # Character diversity (Somali uses specific characters)
-    somali_chars = set('abcdefghijklmnopqrstuvwxyzáéíóúÁÉÍÓÚ')
-    char_diversity = len(set(text.lower()) & somali_chars) / len(somali_chars) * 25
-    
-    # Sentence structure
-    has_punctuation = 1 if any(p in text for p in '.!?') else 0
-    structure_score = has_punctuation * 25
-    
-    # Word complexity (longer words often indicate quality)
-    words = text.split()
-    avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
-    complexity_score = min(avg_word_length / 6, 1.0) * 25
-    
-    total_score = length_score + char_diversity + structure_score + complexity_score
-    
-    return {
-        "overall_score": round(total_score, 1),
-        "length_score": round(length_score, 1),
-        "character_diversity": round(char_diversity, 1),
-        "structure_score": round(structure_score, 1),
-        "complexity_score": round(complexity_score, 1),
-        "word_count": len(words),
-        "character_count": len(text)
-    }
-
-def detect_dialect(text: str) -> Dict:
-    """Detect Somali dialect from text patterns"""
-    
-    # Simple dialect detection based on common patterns
-    northern_indicators = ['waa', 'baa', 'ayaa', 'oo', 'iyo']
-    southern_indicators = ['ka', 'ku', 'la', 'ah', 'uu']
-    central_indicators = ['si', 'ugu', 'kala', 'soo', 'aan']
-    
-    northern_count = sum(1 for word in northern_indicators if word in text.lower())
-    southern_count = sum(1 for word in southern_indicators if word in text.lower())
-    central_count = sum(1 for word in central_indicators if word in text.lower())
-    
-    total_indicators = northern_count + southern_count + central_count
-    
-    if total_indicators == 0:
-        return {"dialect": "Unknown", "confidence": 0}
-    
-    if northern_count >= southern_count and northern_count >= central_count:
-        confidence = (northern_count / total_indicators) * 100
-        return {"dialect": "Northern Somali", "confidence": round(confidence, 1)}
-    elif southern_count >= central_count:
-        confidence = (southern_count / total_indicators) * 100
-        return {"dialect": "Southern Somali", "confidence": round(confidence, 1)}
-    else:
-        confidence = (central_count / total_indicators) * 100
-        return {"dialect": "Central Somali", "confidence": round(confidence, 1)}
-
 # API Endpoints
 @app.get("/")
 def read_root():
@@ -360,6 +359,161 @@ async def get_all_users():
         ]
     }
 
+@app.get("/admin/lexicon")
+async def get_lexicon_info():
+    """Admin endpoint to see the active lexicon bundle"""
+    
+    lexicon = nlp_engine.lexicon
+    
+    return {
+        "name": lexicon.name,
+        "version": lexicon.version,
+        "content_hash": lexicon.content_hash,
+        "path": nlp_engine.lexicon_provider.path
+    }
+
+@app.post("/admin/lexicon/reload")
+async def reload_lexicon():
+    """Admin endpoint to hot-swap the lexicon bundle from disk"""
+    
+    previous = nlp_engine.lexicon.version_key
+    
+    try:
+        lexicon = nlp_engine.reload_lexicon()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Lexicon reload failed: {str(e)}")
+    
+    return {
+        "message": "Lexicon reloaded successfully",
+        "previous_version": previous,
+        "active_version": lexicon.version_key,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/admin/lexicon/rescore")
+def rescore_corpus(full: bool = False):
+    """Admin endpoint to re-score stored sentences affected by lexicon changes"""
+    
+    # Re-scoring takes a while; as a plain def it runs in the threadpool, not on the event loop
+    try:
+        report = RescoringJob(nlp_engine).run(full=full)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Re-scoring failed: {str(e)}")
+    
+    return {
+        "message": "Corpus re-scored successfully",
+        **report,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/admin/features/rescore")
+def rescore_from_features(request: FeatureRescore):
+    """Admin endpoint to re-score the corpus from stored features with new metric weights"""
+    
+    # Featurizing the whole corpus takes a while; as a plain def it runs in the threadpool
+    try:
+        report = FeatureStore(engine=nlp_engine).rescore(
+            request.accuracy_weights, request.overall_weights, apply=request.apply
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Feature re-scoring failed: {str(e)}")
+    
+    return {
+        "message": "Weights applied and scores written back" if request.apply else "Dry run; pass apply=true to apply",
+        **report,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/admin/crawl")
+def crawl_due_sources(limit: int = 500):
+    """Admin endpoint to revisit the web pages whose crawl is due"""
+    
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    
+    # The crawl runs a whole collection; as a plain def it runs in the threadpool, not on the event loop
+    return {
+        "crawl_result": data_collector.crawl_due_sources(limit),
+        "frontier": data_collector.frontier.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/admin/crawl")
+async def get_crawl_frontier():
+    """Admin endpoint to see the state of the crawl frontier"""
+    
+    return {"frontier": data_collector.frontier.stats(), "timestamp": datetime.now().isoformat()}
+
+@app.get("/admin/dialect-model")
+async def get_dialect_model_info():
+    """Admin endpoint to see the active dialect model"""
+    
+    model = nlp_engine.dialect_model
+    if model is None:
+        return {"status": "not_trained", "fallback": "lexicon_indicators",
+                "path": nlp_engine.dialect_model_provider.path}
+    
+    return {
+        "status": "active",
+        "dialects": list(model.classes),
+        "hash_bits": model.featurizer.hash_bits,
+        "ngram_orders": list(model.featurizer.orders),
+        "temperature": model.temperature,
+        "metadata": model.metadata,
+        "path": nlp_engine.dialect_model_provider.path
+    }
+
+@app.post("/admin/dialect-model/train")
+def train_dialect_model():
+    """Admin endpoint to retrain the dialect model from labeled sentences"""
+    
+    # Training takes a while; as a plain def it runs in the threadpool, not on the event loop
+    try:
+        model = train_from_database('somali_dataset.db', nlp_engine.dialect_model_provider.path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Dialect training failed: {str(e)}")
+    
+    nlp_engine.dialect_model_provider.set(model)
+    
+    return {
+        "message": "Dialect model trained successfully",
+        "dialects": list(model.classes),
+        "metadata": model.metadata,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/admin/metrics")
+async def get_engine_metrics():
+    """Admin endpoint to see per-stage engine timings and collection filter counts"""
+    
+    collection = data_collector.filter_metrics.snapshot()
+    metrics = nlp_engine.metrics
+    if metrics is None:
+        return {"enabled": False, "stages": {}, "collection": collection}
+    
+    return {"enabled": True, **metrics.snapshot(), "collection": collection}
+
+@app.post("/admin/metrics")
+async def set_engine_metrics(enabled: bool = True, reset: bool = False):
+    """Admin endpoint to switch stage timing on or off, optionally clearing it"""
+    
+    if reset:
+        data_collector.filter_metrics.reset()
+    if enabled:
+        metrics = nlp_engine.enable_metrics()
+        if reset:
+            metrics.reset()
+    else:
+        nlp_engine.disable_metrics()
+    
+    return {
+        "message": f"Engine metrics {'enabled' if enabled else 'disabled'}",
+        "enabled": enabled,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/analyze")
 async def analyze_text(analysis: QualityAnalysis, current_user: dict = Depends(get_current_user)):
     """Analyze Somali text for quality and dialect"""
@@ -370,13 +524,12 @@ async def analyze_text(analysis: QualityAnalysis, current_user: dict = Depends(g
     # Track API usage
     track_api_usage(current_user["user_id"], "/analyze")
     
-    quality_metrics = calculate_quality_score(analysis.text)
-    dialect_info = detect_dialect(analysis.text)
+    result = get_pipeline("standard").score(analysis.text)
     
     return {
         "text": analysis.text,
-        "quality_metrics": quality_metrics,
-        "dialect_detection": dialect_info,
+        "quality_metrics": result.sections["quality_metrics"],
+        "dialect_detection": result.sections["dialect_detection"],
         "validation_status": "processed",
         "timestamp": datetime.now().isoformat(),
         "user_plan": current_user["plan"],
@@ -394,11 +547,17 @@ async def analyze_text_enterprise(analysis: QualityAnalysis, current_user: dict
     if current_user["plan"] not in ["premium", "enterprise"]:
         raise HTTPException(status_code=403, detail="Enterprise analysis requires Premium or Enterprise plan")
     
+    try:
+        fields = normalize_fields(analysis.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Track API usage
     track_api_usage(current_user["user_id"], "/analyze/enterprise")
     
-    # Use enterprise NLP engine
-    enterprise_analysis = nlp_engine.analyze_text_enterprise(analysis.text)
+    # Use enterprise NLP engine, computing only the requested sections
+    result = ScoringPipeline.from_profile("enterprise", fields=fields).score(analysis.text)
+    enterprise_analysis = result.sections["enterprise_analysis"]
     
     return {
         "text": analysis.text,
@@ -429,7 +588,28 @@ async def analyze_bulk_texts(bulk_analysis: BulkAnalysis, current_user: dict = D
     if current_user["requests_used"] + requests_needed > current_user["requests_limit"]:
         raise HTTPException(status_code=429, detail="Insufficient requests remaining for bulk analysis")
     
+    # Validate the field selection once for the whole batch
+    try:
+        fields = normalize_fields(bulk_analysis.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     results = []
+    indexed = [(i, text) for i, text in enumerate(bulk_analysis.texts) if text.strip()]
+    
+    # Language ID runs first over the whole batch; non-Somali texts skip analysis
+    languages = {}
+    if bulk_analysis.language_filter:
+        detected = language_gate.identifier.identify([text for _, text in indexed])
+        languages = {i: language for (i, _), (language, _) in zip(indexed, detected)}
+        indexed = [(i, text) for i, text in indexed if languages[i] == "somali"]
+    
+    # Score the remaining texts as one batch (dialect model runs once for all)
+    if bulk_analysis.include_enterprise:
+        pipeline = ScoringPipeline.from_profile("enterprise", fields=fields)
+    else:
+        pipeline = get_pipeline("standard")
+    scored = dict(zip([i for i, _ in indexed], pipeline.score_batch([text for _, text in indexed])))
     
     for i, text in enumerate(bulk_analysis.texts):
         if not text.strip():
@@ -441,37 +621,45 @@ async def analyze_bulk_texts(bulk_analysis: BulkAnalysis, current_user: dict = D
             })
             continue
         
-        try:
-            if bulk_analysis.include_enterprise:
-                analysis = nlp_engine.analyze_text_enterprise(text)
-                result = {
-                    "index": i,
-                    "text": text,
-                    "enterprise_analysis": analysis,
-                    "status": "success",
-                    "analysis_type": "enterprise_grade"
-                }
-            else:
-                quality_metrics = calculate_quality_score(text)
-                dialect_info = detect_dialect(text)
-                result = {
-                    "index": i,
-                    "text": text,
-                    "quality_metrics": quality_metrics,
-                    "dialect_detection": dialect_info,
-                    "status": "success",
-                    "analysis_type": "standard"
-                }
-            
-            results.append(result)
-            
-        except Exception as e:
+        if languages.get(i, "somali") != "somali":
+            results.append({
+                "index": i,
+                "text": text,
+                "error": f"Text is not Somali (detected: {languages[i]})",
+                "detected_language": languages[i],
+                "status": "rejected"
+            })
+            continue
+        
+        scoring = scored[i]
+        if scoring.error is not None:
             results.append({
                 "index": i,
                 "text": text,
-                "error": str(e),
+                "error": str(scoring.error),
                 "status": "failed"
             })
+            continue
+        
+        if bulk_analysis.include_enterprise:
+            result = {
+                "index": i,
+                "text": text,
+                "enterprise_analysis": scoring.sections["enterprise_analysis"],
+                "status": "success",
+                "analysis_type": "enterprise_grade"
+            }
+        else:
+            result = {
+                "index": i,
+                "text": text,
+                "quality_metrics": scoring.sections["quality_metrics"],
+                "dialect_detection": scoring.sections["dialect_detection"],
+                "status": "success",
+                "analysis_type": "standard"
+            }
+        
+        results.append(result)
     
     # Track API usage for all processed texts
     for _ in bulk_analysis.texts:
@@ -482,18 +670,77 @@ async def analyze_bulk_texts(bulk_analysis: BulkAnalysis, current_user: dict = D
         "total_texts": len(bulk_analysis.texts),
         "successful_analyses": len([r for r in results if r["status"] == "success"]),
         "failed_analyses": len([r for r in results if r["status"] == "failed"]),
+        "rejected_non_somali": len([r for r in results if r["status"] == "rejected"]),
         "timestamp": datetime.now().isoformat(),
         "user_plan": current_user["plan"],
         "requests_remaining": current_user["requests_limit"] - current_user["requests_used"] - len(bulk_analysis.texts)
     }
 
+@app.post("/analyze/document")
+def analyze_document(
+    document: UploadFile = File(...),
+    per_sentence: bool = False,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Streaming analysis of large documents (books, transcripts)
+    
+    A plain def, so FastAPI runs it in its threadpool instead of blocking the
+    event loop for the whole analysis
+    """
+    
+    # Only allow document analysis for premium/enterprise users
+    if current_user["plan"] not in ["premium", "enterprise"]:
+        raise HTTPException(status_code=403, detail="Document analysis requires Premium or Enterprise plan")
+    
+    # Fields arrive as a comma-separated query parameter
+    try:
+        selected_fields = normalize_fields([f.strip() for f in fields.split(",") if f.strip()] if fields else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Track API usage
+    track_api_usage(current_user["user_id"], "/analyze/document")
+    
+    analyzer = DocumentAnalyzer(nlp_engine)
+    
+    if per_sentence:
+        # Newline-delimited JSON: one line per sentence, then the document summary
+        def stream_events():
+            try:
+                for event in analyzer.iter_events(document.file, selected_fields, per_sentence=True):
+                    if event[0] == "sentence":
+                        _, index, sentence, scores = event
+                        line = {"index": index, "text": sentence, "scores": scores.to_dict(),
+                                "primary_dialect": scores.primary_dialect}
+                    else:
+                        line = {"document_analysis": event[1].to_dict()}
+                    yield json.dumps(line) + "\n"
+            except ValueError as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+        
+        return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+    
+    try:
+        document_analysis = analyzer.analyze(document.file, selected_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "filename": document.filename,
+        "document_analysis": document_analysis.to_dict(),
+        "validation_status": "enterprise_processed",
+        "timestamp": datetime.now().isoformat(),
+        "user_plan": current_user["plan"],
+        "analysis_type": "document_streaming"
+    }
+
 @app.post("/sentences")
 async def add_sentence(sentence: SomaliSentence):
     """Add a new Somali sentence to the dataset"""
     
-    # Calculate quality score
-    quality_metrics = calculate_quality_score(sentence.text)
-    dialect_info = detect_dialect(sentence.text)
+    # Score with the configured profile (SOMALI_SCORING_PROFILE)
+    result = get_pipeline().score(sentence.text)
     
     conn = sqlite3.connect('somali_dataset.db')
     cursor = conn.cursor()
@@ -506,8 +753,8 @@ async def add_sentence(sentence: SomaliSentence):
         ''', (
             sentence.text,
             sentence.translation,
-            dialect_info["dialect"],
-            quality_metrics["overall_score"],
+            result.dialect,
+            result.quality_score,
             sentence.source,
             json.dumps(sentence.metadata)
         ))
@@ -522,11 +769,7 @@ async def add_sentence(sentence: SomaliSentence):
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (
             sentence_id,
-            quality_metrics["length_score"],
-            quality_metrics["character_diversity"],
-            quality_metrics["structure_score"],
-            quality_metrics["complexity_score"],
-            quality_metrics["overall_score"]
+            *result.metric_columns
         ))
         
         conn.commit()
@@ -534,8 +777,8 @@ async def add_sentence(sentence: SomaliSentence):
         return {
             "id": sentence_id,
             "message": "Sentence added successfully",
-            "quality_score": quality_metrics["overall_score"],
-            "dialect": dialect_info["dialect"]
+            "quality_score": result.quality_score,
+            "dialect": result.dialect
         }
         
     except sqlite3.IntegrityError:
@@ -582,6 +825,53 @@ async def get_sentences(limit: int = 10, validated: Optional[bool] = None):
         ]
     }
 
+@app.get("/sentences/search")
+def search_sentences(q: str, limit: int = 20, offset: int = 0):
+    """
+    Find sentences by words through the token index
+
+    Words are combined with AND, OR, NOT and parentheses (adjacent words are
+    ANDed); category:<name> matches any professional word of a lexicon
+    category, e.g. "category:medical NOT dhakhtar"
+    """
+    
+    if limit < 1 or limit > 1000 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-1000 and offset non-negative")
+    
+    # The first search builds the index and later ones fold its change log; as a plain def this runs in the threadpool
+    try:
+        total, ids = token_index.search(q, nlp_engine.lexicon, limit, offset)
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {e}")
+    
+    sentences = []
+    if ids:
+        conn = sqlite3.connect('somali_dataset.db')
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM somali_sentences WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id", ids)
+        sentences = cursor.fetchall()
+        conn.close()
+    
+    return {
+        "query": q,
+        "total": total,
+        "offset": offset,
+        "sentences": [
+            {
+                "id": s[0],
+                "text": s[1],
+                "translation": s[2],
+                "dialect": s[3],
+                "quality_score": s[4],
+                "source": s[5],
+                "validated": bool(s[6]),
+                "scholar_approved": bool(s[7]),
+                "created_at": s[8]
+            }
+            for s in sentences
+        ]
+    }
+
 @app.get("/stats")
 async def get_dataset_stats():
     """Get dataset statistics"""
@@ -620,6 +910,27 @@ async def get_dataset_stats():
         "last_updated": datetime.now().isoformat()
     }
 
+@app.get("/stats/vocabulary")
+def get_vocabulary_stats(k: int = 50, dialect: Optional[str] = None, source: Optional[str] = None,
+                         by: str = "occurrences"):
+    """Top-k words of the corpus, or of one dialect or source, by occurrences or documents"""
+    
+    if k < 1 or k > 1000:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 1000")
+    
+    # Statistics are computed over the corpus; as a plain def this runs in the threadpool
+    try:
+        stats = token_index.top_words(k, dialect, source, by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "scope": {"dialect": dialect, "source": source},
+        "ordered_by": by,
+        **stats,
+        "last_updated": datetime.now().isoformat()
+    }
+
 @app.put("/sentences/{sentence_id}/validate")
 async def validate_sentence(sentence_id: int, scholar_approved: bool = False):
     """Validate a sentence (mark as reviewed)"""
@@ -642,6 +953,89 @@ async def validate_sentence(sentence_id: int, scholar_approved: bool = False):
     
     return {"message": "Sentence validated successfully"}
 
+def get_review_session(session_id: str, current_user: dict) -> Dict:
+    """A review session of the current user; other users' sessions are not found"""
+    try:
+        session = scholar_review.get_session(session_id)
+    except ReviewSessionNotFound:
+        raise HTTPException(status_code=404, detail="Review session not found")
+    if session["user_id"] != current_user["user_id"]:
+        raise HTTPException(status_code=404, detail="Review session not found")
+    return session
+
+@app.post("/review/sessions")
+async def start_review_session(request: ReviewSessionStart, current_user: dict = Depends(get_current_user)):
+    """Open a scholar review session; its first batch is reserved right away"""
+    
+    track_api_usage(current_user["user_id"], "/review/sessions")
+    
+    try:
+        session = scholar_review.start_session(current_user["email"], current_user["user_id"], request.batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"session": session, "timestamp": datetime.now().isoformat()}
+
+@app.get("/review/sessions/{session_id}/next")
+async def next_review_batch(session_id: str, limit: Optional[int] = None, current_user: dict = Depends(get_current_user)):
+    """Next unreviewed sentences of a session, highest priority first"""
+    
+    get_review_session(session_id, current_user)
+    track_api_usage(current_user["user_id"], "/review/sessions/next")
+    
+    try:
+        batch = scholar_review.next_batch(session_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {**batch, "timestamp": datetime.now().isoformat()}
+
+@app.post("/review/sessions/{session_id}/verdicts")
+async def submit_review_verdicts(session_id: str, batch: VerdictBatch, fetch_next: bool = False,
+                                 current_user: dict = Depends(get_current_user)):
+    """Record a batch of scholar verdicts in one transaction; with fetch_next=true also return the next batch"""
+    
+    session = get_review_session(session_id, current_user)
+    
+    if not batch.verdicts:
+        raise HTTPException(status_code=400, detail="No verdicts provided")
+    
+    if len(batch.verdicts) > 500:
+        raise HTTPException(status_code=400, detail="Maximum 500 verdicts per request")
+    
+    track_api_usage(current_user["user_id"], "/review/sessions/verdicts")
+    
+    result = scholar_review.submit(session_id, [
+        {
+            "sentence_id": verdict.sentence_id,
+            "approved": verdict.approved,
+            "validation_score": verdict.validation_score,
+            "cultural_score": verdict.cultural_score,
+            "grammar_score": verdict.grammar_score,
+            "notes": verdict.notes
+        }
+        for verdict in batch.verdicts
+    ])
+    
+    response = {"review_result": result, "timestamp": datetime.now().isoformat()}
+    if fetch_next and session["ended_at"] is None:
+        response["next_batch"] = scholar_review.next_batch(session_id)
+    return response
+
+@app.delete("/review/sessions/{session_id}")
+async def end_review_session(session_id: str, current_user: dict = Depends(get_current_user)):
+    """End a review session, releasing the sentences it has not reviewed"""
+    
+    get_review_session(session_id, current_user)
+    
+    return {"session": scholar_review.end_session(session_id), "timestamp": datetime.now().isoformat()}
+
+@app.get("/admin/review")
+async def get_review_stats():
+    """Admin endpoint to see scholar review progress"""
+    
+    return {"review": scholar_review.stats(), "timestamp": datetime.now().isoformat()}
+
 @app.delete("/sentences/{sentence_id}")
 async def delete_sentence(sentence_id: int):
     """Delete a sentence from the dataset"""
@@ -660,7 +1054,18 @@ async def delete_sentence(sentence_id: int):
     
     return {"message": "Sentence deleted successfully"}
 
-@app.post("/data/collect")
+def job_accepted(job: Dict, current_user: dict) -> Dict:
+    """Response of an endpoint that queued a job"""
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+        "result_url": f"/jobs/{job['id']}/result",
+        "timestamp": datetime.now().isoformat(),
+        "user_plan": current_user["plan"]
+    }
+
+@app.post("/data/collect", status_code=202)
 async def collect_data(data_collection: DataCollection, current_user: dict = Depends(get_current_user)):
     """Collect and validate Somali text data"""
     
@@ -677,17 +1082,39 @@ async def collect_data(data_collection: DataCollection, current_user: dict = Dep
     # Track API usage
     track_api_usage(current_user["user_id"], "/data/collect")
     
-    # Collect and validate data
-    collection_result = data_collector.collect_from_text_sources(data_collection.texts)
+    # Collect and validate data in the background
+    job = job_queue.submit("collect", {"texts": data_collection.texts, "source_name": data_collection.source_name},
+                           current_user["user_id"])
+    
+    return job_accepted(job, current_user)
+
+@app.post("/data/collect/web")
+def collect_web_data(web_collection: WebCollection, current_user: dict = Depends(get_current_user)):
+    """Fetch web pages and collect validated Somali sentences from them"""
+    
+    # Only allow data collection for premium/enterprise users
+    if current_user["plan"] not in ["premium", "enterprise", "enterprise_plus"]:
+        raise HTTPException(status_code=403, detail="Data collection requires Premium or Enterprise plan")
+    
+    if not web_collection.urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+    
+    if len(web_collection.urls) > 1000:
+        raise HTTPException(status_code=400, detail="Maximum 1,000 URLs per collection request")
+    
+    # Track API usage
+    track_api_usage(current_user["user_id"], "/data/collect/web")
+    
+    # Fetching and collecting takes a while; as a plain def it runs in the threadpool, not on the event loop
+    collection_result = data_collector.collect_from_web_sources(web_collection.urls)
     
     return {
         "collection_result": collection_result,
-        "source_name": data_collection.source_name,
         "timestamp": datetime.now().isoformat(),
         "user_plan": current_user["plan"]
     }
 
-@app.post("/data/generate")
+@app.post("/data/generate", status_code=202)
 async def generate_sample_data(data_generation: DataGeneration, current_user: dict = Depends(get_current_user)):
     """Generate sample Somali data for testing"""
     
@@ -701,15 +1128,15 @@ async def generate_sample_data(data_generation: DataGeneration, current_user: di
     # Track API usage
     track_api_usage(current_user["user_id"], "/data/generate")
     
-    # Generate sample data
-    generation_result = data_collector.generate_sample_data(data_generation.count)
+    # Pin the seed up front so a re-run job regenerates the same sentences
+    seed = data_generation.seed if data_generation.seed is not None else secrets.randbelow(2 ** 32)
     
-    return {
-        "generation_result": generation_result,
-        "quality_threshold": data_generation.quality_threshold,
-        "timestamp": datetime.now().isoformat(),
-        "user_plan": current_user["plan"]
-    }
+    # Generate sample data in the background
+    job = job_queue.submit("generate", {"count": data_generation.count, "seed": seed,
+                                        "quality_threshold": data_generation.quality_threshold},
+                           current_user["user_id"])
+    
+    return job_accepted(job, current_user)
 
 @app.get("/data/stats")
 async def get_collection_stats(current_user: dict = Depends(get_current_user)):
@@ -727,7 +1154,7 @@ async def get_collection_stats(current_user: dict = Depends(get_current_user)):
         "user_plan": current_user["plan"]
     }
 
-@app.post("/data/validate")
+@app.post("/data/validate", status_code=202)
 async def validate_bulk_sentences(data_collection: DataCollection, current_user: dict = Depends(get_current_user)):
     """Bulk validate sentences for quality"""
     
@@ -744,15 +1171,136 @@ async def validate_bulk_sentences(data_collection: DataCollection, current_user:
     # Track API usage
     track_api_usage(current_user["user_id"], "/data/validate")
     
-    # Validate sentences
-    validation_result = data_collector.bulk_validate_sentences(data_collection.texts, current_user["user_id"])
+    # Validate sentences in the background
+    job = job_queue.submit("validate", {"texts": data_collection.texts, "validator_id": current_user["user_id"]},
+                           current_user["user_id"])
+    
+    return job_accepted(job, current_user)
+
+@app.post("/data/validate/queue")
+async def queue_bulk_sentences(data_collection: DataCollection, current_user: dict = Depends(get_current_user)):
+    """Queue sentences for validation by the validation queue workers"""
+    
+    if current_user["plan"] not in ["premium", "enterprise", "enterprise_plus"]:
+        raise HTTPException(status_code=403, detail="Bulk validation requires Premium or Enterprise plan")
+    
+    if not data_collection.texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    
+    if len(data_collection.texts) > 50000:
+        raise HTTPException(status_code=400, detail="Maximum 50,000 texts per queue request")
+    
+    track_api_usage(current_user["user_id"], "/data/validate/queue")
     
     return {
-        "validation_result": validation_result,
+        "queued": validation_queue.enqueue(data_collection.texts),
+        "queue": validation_queue.stats(),
         "timestamp": datetime.now().isoformat(),
         "user_plan": current_user["plan"]
     }
 
+# Job handlers: params are what the endpoint queued, the result is what the endpoint used to return
+def run_collect_job(params: Dict, progress) -> Dict:
+    return {
+        "collection_result": data_collector.collect_from_text_sources(params["texts"], source=params["source_name"],
+                                                                      progress=progress),
+        "source_name": params["source_name"]
+    }
+
+def run_generate_job(params: Dict, progress) -> Dict:
+    return {
+        "generation_result": data_collector.generate_sample_data(params["count"], progress=progress,
+                                                                 seed=params.get("seed")),
+        "quality_threshold": params["quality_threshold"]
+    }
+
+def run_validate_job(params: Dict, progress) -> Dict:
+    return {
+        "validation_result": data_collector.bulk_validate_sentences(params["texts"], params["validator_id"],
+                                                                    progress=progress)
+    }
+
+job_queue.register("collect", run_collect_job)
+job_queue.register("generate", run_generate_job)
+job_queue.register("validate", run_validate_job)
+
+def get_user_job(job_id: str, current_user: dict, include_result: bool = False) -> Dict:
+    """A job of the current user; other users' jobs are not found"""
+    job = job_queue.get(job_id, include_result)
+    if job is None or job["user_id"] != current_user["user_id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50, current_user: dict = Depends(get_current_user)):
+    """The current user's most recent jobs"""
+    
+    if limit < 1 or limit > 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    
+    return {"jobs": job_queue.recent(current_user["user_id"], status, limit), "timestamp": datetime.now().isoformat()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status and progress of a job"""
+    
+    return {"job": get_user_job(job_id, current_user), "timestamp": datetime.now().isoformat()}
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Result of a finished job"""
+    
+    job = get_user_job(job_id, current_user, include_result=True)
+    if job["status"] not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Cancel a queued job, or stop a running one at its next progress report"""
+    
+    job = get_user_job(job_id, current_user)
+    if job["status"] in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    
+    return {"job": job_queue.cancel(job_id), "timestamp": datetime.now().isoformat()}
+
+@app.get("/admin/validation-queue")
+async def get_validation_queue_stats():
+    """Admin endpoint to see validation queue depth, leases and throughput"""
+    
+    return {"validation_queue": validation_queue.stats(), "timestamp": datetime.now().isoformat()}
+
+@app.post("/admin/validation-queue/drain")
+def drain_validation_queue(batches: int = 10, enqueue_raw: bool = False):
+    """Admin endpoint to drain up to `batches` leases of the validation queue in this process"""
+    
+    if batches < 1:
+        raise HTTPException(status_code=400, detail="batches must be positive")
+    
+    # Draining analyzes and commits whole batches; as a plain def it runs in the threadpool
+    queued_raw = validation_queue.enqueue_raw_data() if enqueue_raw else 0
+    
+    return {
+        "queued_raw_data": queued_raw,
+        "drain_result": ValidationWorker(validation_queue).drain(max_batches=batches),
+        "validation_queue": validation_queue.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/admin/jobs")
+async def get_job_stats():
+    """Admin endpoint to see job queue totals"""
+    
+    return {"jobs": job_queue.stats(), "timestamp": datetime.now().isoformat()}
+
 # Voice Cloning Endpoints
 @app.get("/voice/health")
 async def voice_health_check():
@@ -0,0 +1,80 @@
+"""
+Somali Word Formation
+Suffix trie over the lexicon's word_formation endings classifying tokens as
+plural, feminine, masculine or diminutive forms
+"""
+
+import functools
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Distinct tokens remembered per lexicon snapshot
+MEMO_SIZE = 65536
+
+NO_FORMS: FrozenSet[str] = frozenset()
+
+
+class SuffixTrie:
+    """Word formation endings in a trie over reversed characters
+
+    One walk back from the last character of a token finds every ending it
+    carries, for all rule lists at once. A token is not its own ending: the
+    particle "ka" is not a masculine form. Classifications are memoized per
+    token in a bounded LRU cache, rebuilt empty when a pickled lexicon loads.
+    """
+
+    def __init__(self, word_formation: Dict[str, List[str]], memo_size: int = MEMO_SIZE):
+        # "plural_endings" -> "plural", in bundle order
+        self.forms = tuple(key[:-len('_endings')] for key in word_formation if key.endswith('_endings'))
+        self.memo_size = memo_size
+
+        # Node: (children by character, forms whose ending ends here)
+        root: Dict[str, Tuple[Dict, set]] = {}
+        for form in self.forms:
+            for ending in word_formation[f'{form}_endings']:
+                children, node = root, None
+                for char in reversed(ending):
+                    node = children.setdefault(char, ({}, set()))
+                    children = node[0]
+                if node is not None:
+                    node[1].add(form)
+        self._root = self._freeze(root)
+        self._init_memo()
+
+    @classmethod
+    def _freeze(cls, children: Dict) -> Dict:
+        return {char: (cls._freeze(node[0]), frozenset(node[1])) for char, node in children.items()}
+
+    def _init_memo(self) -> None:
+        self.classify = functools.lru_cache(maxsize=self.memo_size)(self._walk)
+
+    def __getstate__(self) -> Dict:
+        return {'forms': self.forms, 'memo_size': self.memo_size, '_root': self._root}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._init_memo()
+
+    def _walk(self, token: str) -> FrozenSet[str]:
+        """Forms of every ending the token carries after a non-empty stem"""
+
+        forms = NO_FORMS
+        children = self._root
+        # The first character never ends a suffix: the stem must stay non-empty
+        for char in token[:0:-1]:
+            node = children.get(char)
+            if node is None:
+                break
+            if node[1]:
+                forms = forms | node[1]
+            children = node[0]
+        return forms
+
+    def count_forms(self, tokens: Iterable[str]) -> Dict[str, int]:
+        """Number of tokens carrying each form"""
+
+        counts = dict.fromkeys(self.forms, 0)
+        classify = self.classify
+        for token in tokens:
+            for form in classify(token):
+                counts[form] += 1
+        return counts
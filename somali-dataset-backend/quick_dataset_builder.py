@@ -8,6 +8,8 @@ import json
 import random
 from datetime import datetime
 
+from sentence_writer import SENTENCE_COLUMNS, SentenceWriter
+
 def init_database():
     """Initialize database"""
     conn = sqlite3.connect('somali_dataset.db')
@@ -295,38 +297,19 @@ def build_enterprise_dataset():
 
 def save_to_database(sentences):
     """Save sentences to database"""
-    conn = sqlite3.connect('somali_dataset.db')
-    cursor = conn.cursor()
-    
-    success_count = 0
-    
-    for sentence_data in sentences:
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO somali_sentences 
-                (text, dialect, quality_score, source, validated, scholar_approved, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                sentence_data["text"],
-                sentence_data["dialect"],
-                sentence_data["quality_score"],
-                sentence_data["source"],
-                True,
-                True,
-                json.dumps({"category": "enterprise_dataset"})
-            ))
-            
-            if cursor.rowcount > 0:
-                success_count += 1
-                
-        except Exception as e:
-            print(f"Error saving: {e}")
-            continue
-    
-    conn.commit()
-    conn.close()
-    
-    return success_count
+    rows = (
+        {
+            "text": sentence_data["text"],
+            "dialect": sentence_data["dialect"],
+            "quality_score": sentence_data["quality_score"],
+            "source": sentence_data["source"],
+            "validated": True,
+            "scholar_approved": True,
+            "metadata": {"category": "enterprise_dataset"}
+        }
+        for sentence_data in sentences
+    )
+    return SentenceWriter('somali_dataset.db', SENTENCE_COLUMNS + ('scholar_approved',)).write(rows)["written"]
 
 def get_stats():
     """Get dataset statistics"""
@@ -0,0 +1,386 @@
+"""
+Scholar Review Sessions
+Batched scholar review: sessions are handed the next unreviewed sentences
+in priority order, reserved so two scholars never get the same sentence,
+and submit verdicts in batches written to scholar_validations and
+somali_sentences in one transaction. Each session's next batch is reserved
+and loaded in the background while the scholar works on the current one
+"""
+
+import logging
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REVIEW_BATCH = 20
+MAX_REVIEW_BATCH = 200
+# Reserved sentences not reviewed within this many seconds go back to the pool
+RESERVATION_S = 1800
+# Threads reserving sessions' next batches
+PREFETCH_WORKERS = 2
+
+# Priority favours likely-good sentences and those closest to the acceptance threshold
+ACCEPTANCE_SCORE = 70
+UNCERTAINTY_BAND = 30
+QUALITY_WEIGHT = 0.5
+UNCERTAINTY_WEIGHT = 0.5
+
+SCORE_FIELDS = ('validation_score', 'cultural_score', 'grammar_score')
+
+_UNCERTAINTY = f"MAX(0.0, 1.0 - ABS(COALESCE(s.quality_score, 0) - {ACCEPTANCE_SCORE}) / {float(UNCERTAINTY_BAND)})"
+_PRIORITY = f"({QUALITY_WEIGHT} * COALESCE(s.quality_score, 0) / 100.0 + {UNCERTAINTY_WEIGHT} * {_UNCERTAINTY})"
+
+
+class ReviewSessionNotFound(KeyError):
+    """No review session with that id"""
+
+
+class ScholarReview:
+    """
+    Review sessions over somali_sentences
+
+    A sentence is unreviewed while it has no scholar_validations row and is
+    not scholar approved. Handing out a batch reserves its sentences for the
+    session in review_reservations until they are reviewed or the
+    reservation expires. Right after a batch is handed out, the following
+    one is reserved in the background, so the next request returns without
+    running the priority query.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db', reservation_s: float = RESERVATION_S,
+                 prefetch: bool = True):
+        self.db_path = db_path
+        self.reservation_s = reservation_s
+        self.prefetch = prefetch
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Session id -> (batch size, reservation of its next batch)
+        self._prefetched: Dict[str, Tuple[int, Future]] = {}
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        self.create_tables(conn)
+        return conn
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS review_sessions (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER,
+                scholar_email TEXT,
+                batch_size INTEGER NOT NULL,
+                reviewed INTEGER NOT NULL DEFAULT 0,
+                approved INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_active_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ended_at TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS review_reservations (
+                sentence_id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                handed_out BOOLEAN NOT NULL DEFAULT FALSE,
+                expires_at TIMESTAMP NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS review_reservations_session ON review_reservations (session_id)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS scholar_validations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sentence_id INTEGER,
+                scholar_email TEXT,
+                validation_score INTEGER,
+                cultural_score INTEGER,
+                grammar_score INTEGER,
+                notes TEXT,
+                approved BOOLEAN,
+                validated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (sentence_id) REFERENCES somali_sentences (id)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS scholar_validations_sentence ON scholar_validations (sentence_id)')
+
+    def start_session(self, scholar_email: Optional[str], user_id: Optional[int] = None,
+                      batch_size: int = REVIEW_BATCH) -> Dict:
+        """Open a session and start reserving its first batch"""
+
+        if not 1 <= batch_size <= MAX_REVIEW_BATCH:
+            raise ValueError(f"batch_size must be between 1 and {MAX_REVIEW_BATCH}")
+
+        session_id = uuid.uuid4().hex
+        conn = self.connect()
+        try:
+            conn.execute('INSERT INTO review_sessions (id, user_id, scholar_email, batch_size) VALUES (?, ?, ?, ?)',
+                         (session_id, user_id, scholar_email, batch_size))
+            session = self._session(conn, session_id)
+        finally:
+            conn.close()
+        self._start_prefetch(session_id, batch_size)
+        return session
+
+    def get_session(self, session_id: str) -> Dict:
+        conn = self.connect()
+        try:
+            return self._session(conn, session_id)
+        finally:
+            conn.close()
+
+    def next_batch(self, session_id: str, limit: Optional[int] = None) -> Dict:
+        """
+        Hand out the session's next sentences, highest priority first
+
+        Uses the batch reserved in the background when it has the requested
+        size, then starts reserving the one after it.
+        """
+
+        session = self.get_session(session_id)
+        if session['ended_at'] is not None:
+            raise ValueError("Review session has ended")
+        limit = limit or session['batch_size']
+        if not 1 <= limit <= MAX_REVIEW_BATCH:
+            raise ValueError(f"limit must be between 1 and {MAX_REVIEW_BATCH}")
+
+        sentences = None
+        with self._lock:
+            prefetched = self._prefetched.pop(session_id, None)
+        if prefetched is not None:
+            size, future = prefetched
+            try:
+                reserved = future.result()
+            except Exception:
+                logger.exception("Prefetching review batch for session %s failed", session_id)
+                reserved = None
+            if reserved is not None and size == limit:
+                sentences = self._hand_out(session_id, reserved)
+            elif reserved:
+                self._release(session_id, [sentence['id'] for sentence in reserved])
+
+        was_prefetched = sentences is not None
+        if sentences is None:
+            sentences = self._reserve(session_id, limit, handed_out=True)
+
+        if sentences:
+            self._start_prefetch(session_id, limit)
+        return {"session_id": session_id, "sentences": sentences, "prefetched": was_prefetched}
+
+    def submit(self, session_id: str, verdicts: List[Dict]) -> Dict:
+        """
+        Record a batch of verdicts in one transaction
+
+        Each verdict has sentence_id and approved, and optionally
+        validation_score, cultural_score, grammar_score and notes. Every
+        accepted verdict adds a scholar_validations row and marks its
+        sentence validated and (un)approved. Sentences that do not exist or
+        are reserved by another session are skipped and listed.
+        """
+
+        session = self.get_session(session_id)
+        # A sentence judged twice in one batch keeps its last verdict
+        by_sentence = {int(verdict['sentence_id']): verdict for verdict in verdicts}
+        ids = list(by_sentence)
+
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                existing = set()
+                other_sessions = set()
+                for start in range(0, len(ids), 500):
+                    part = ids[start:start + 500]
+                    marks = ','.join('?' * len(part))
+                    existing.update(row[0] for row in conn.execute(
+                        f'SELECT id FROM somali_sentences WHERE id IN ({marks})', part
+                    ))
+                    other_sessions.update(row[0] for row in conn.execute(
+                        f"SELECT sentence_id FROM review_reservations WHERE sentence_id IN ({marks}) "
+                        f"AND session_id != ? AND expires_at >= datetime('now')", part + [session_id]
+                    ))
+                accepted = [sentence_id for sentence_id in ids
+                            if sentence_id in existing and sentence_id not in other_sessions]
+
+                conn.executemany('''
+                    INSERT INTO scholar_validations
+                        (sentence_id, scholar_email, validation_score, cultural_score, grammar_score, notes, approved)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(sentence_id, session['scholar_email'],
+                       *(by_sentence[sentence_id].get(field) for field in SCORE_FIELDS),
+                       by_sentence[sentence_id].get('notes'), bool(by_sentence[sentence_id]['approved']))
+                      for sentence_id in accepted])
+                conn.executemany(
+                    'UPDATE somali_sentences SET validated = 1, scholar_approved = ? WHERE id = ?',
+                    [(bool(by_sentence[sentence_id]['approved']), sentence_id) for sentence_id in accepted]
+                )
+                conn.executemany('DELETE FROM review_reservations WHERE sentence_id = ? AND session_id = ?',
+                                 [(sentence_id, session_id) for sentence_id in accepted])
+                approved = sum(bool(by_sentence[sentence_id]['approved']) for sentence_id in accepted)
+                conn.execute('''
+                    UPDATE review_sessions SET reviewed = reviewed + ?, approved = approved + ?,
+                        last_active_at = datetime('now')
+                    WHERE id = ?
+                ''', (len(accepted), approved, session_id))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+        return {
+            "recorded": len(accepted),
+            "approved": approved,
+            "not_found": [sentence_id for sentence_id in ids if sentence_id not in existing],
+            "reserved_by_other_session": sorted(other_sessions)
+        }
+
+    def end_session(self, session_id: str) -> Dict:
+        """Close a session and release the sentences it still holds"""
+
+        self.get_session(session_id)
+        with self._lock:
+            prefetched = self._prefetched.pop(session_id, None)
+        if prefetched is not None:
+            # Let it finish; its reservations are released with the rest below
+            try:
+                prefetched[1].result()
+            except Exception:
+                pass
+
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            released = conn.execute('DELETE FROM review_reservations WHERE session_id = ?', (session_id,)).rowcount
+            conn.execute("UPDATE review_sessions SET ended_at = COALESCE(ended_at, datetime('now')) WHERE id = ?",
+                         (session_id,))
+            conn.execute('COMMIT')
+            session = self._session(conn, session_id)
+        finally:
+            conn.close()
+        session['released'] = released
+        return session
+
+    def stats(self) -> Dict:
+        conn = self.connect()
+        try:
+            unreviewed = conn.execute('''
+                SELECT COUNT(*) FROM somali_sentences s
+                WHERE NOT COALESCE(s.scholar_approved, 0)
+                  AND NOT EXISTS (SELECT 1 FROM scholar_validations v WHERE v.sentence_id = s.id)
+            ''').fetchone()[0]
+            reserved, handed_out = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(handed_out), 0) FROM review_reservations WHERE expires_at >= datetime('now')"
+            ).fetchone()
+            active = conn.execute("SELECT COUNT(*) FROM review_sessions WHERE ended_at IS NULL "
+                                  "AND last_active_at >= datetime('now', ?)", (f'-{int(self.reservation_s)} seconds',)
+                                  ).fetchone()[0]
+            reviewed, approved = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(approved), 0) FROM scholar_validations "
+                "WHERE validated_at >= datetime('now', '-1 day')"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {
+            "unreviewed": unreviewed,
+            "reserved": reserved,
+            "handed_out": handed_out,
+            "prefetched": reserved - handed_out,
+            "active_sessions": active,
+            "reviewed_24h": reviewed,
+            "approved_24h": approved
+        }
+
+    def _start_prefetch(self, session_id: str, limit: int) -> None:
+        if not self.prefetch:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix='review-prefetch')
+            if session_id not in self._prefetched:
+                self._prefetched[session_id] = (limit, self._executor.submit(self._reserve, session_id, limit))
+
+    def _reserve(self, session_id: str, limit: int, handed_out: bool = False) -> List[Dict]:
+        """Reserve the highest-priority unreviewed, unreserved sentences for a session"""
+
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute("DELETE FROM review_reservations WHERE expires_at < datetime('now')")
+            rows = conn.execute(f'''
+                SELECT s.id, s.text, s.translation, s.dialect, s.quality_score, s.source,
+                       {_PRIORITY} AS priority, {_UNCERTAINTY} AS uncertainty
+                FROM somali_sentences s
+                WHERE NOT COALESCE(s.scholar_approved, 0)
+                  AND NOT EXISTS (SELECT 1 FROM scholar_validations v WHERE v.sentence_id = s.id)
+                  AND NOT EXISTS (SELECT 1 FROM review_reservations r WHERE r.sentence_id = s.id)
+                ORDER BY priority DESC, s.id
+                LIMIT ?
+            ''', (limit,)).fetchall()
+            conn.executemany(
+                "INSERT INTO review_reservations (sentence_id, session_id, handed_out, expires_at) "
+                "VALUES (?, ?, ?, datetime('now', ?))",
+                [(row[0], session_id, handed_out, f'+{int(self.reservation_s)} seconds') for row in rows]
+            )
+            conn.execute("UPDATE review_sessions SET last_active_at = datetime('now') WHERE id = ?", (session_id,))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+        return [
+            {
+                "id": sentence_id,
+                "text": text,
+                "translation": translation,
+                "dialect": dialect,
+                "quality_score": quality_score,
+                "source": source,
+                "priority": round(priority, 4),
+                "uncertainty": round(uncertainty, 4)
+            }
+            for sentence_id, text, translation, dialect, quality_score, source, priority, uncertainty in rows
+        ]
+
+    def _hand_out(self, session_id: str, reserved: List[Dict]) -> List[Dict]:
+        """Mark prefetched sentences handed out, restarting their reservation; drops any the session lost"""
+
+        if not reserved:
+            return []
+        ids = [sentence['id'] for sentence in reserved]
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                "UPDATE review_reservations SET handed_out = TRUE, expires_at = datetime('now', ?) "
+                "WHERE sentence_id = ? AND session_id = ?",
+                [(f'+{int(self.reservation_s)} seconds', sentence_id, session_id) for sentence_id in ids]
+            )
+            held = {row[0] for row in conn.execute(
+                f"SELECT sentence_id FROM review_reservations WHERE session_id = ? "
+                f"AND sentence_id IN ({','.join('?' * len(ids))})", [session_id] + ids
+            )}
+            conn.execute("UPDATE review_sessions SET last_active_at = datetime('now') WHERE id = ?", (session_id,))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return [sentence for sentence in reserved if sentence['id'] in held]
+
+    def _release(self, session_id: str, ids: List[int]) -> None:
+        conn = self.connect()
+        try:
+            conn.executemany('DELETE FROM review_reservations WHERE sentence_id = ? AND session_id = ?',
+                             [(sentence_id, session_id) for sentence_id in ids])
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _session(conn: sqlite3.Connection, session_id: str) -> Dict:
+        fields = ('id', 'user_id', 'scholar_email', 'batch_size', 'reviewed', 'approved',
+                  'created_at', 'last_active_at', 'ended_at')
+        row = conn.execute(f"SELECT {', '.join(fields)} FROM review_sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise ReviewSessionNotFound(session_id)
+        return dict(zip(fields, row))
@@ -0,0 +1,258 @@
+"""
+Unified Scoring Pipeline
+Pluggable scoring stages sharing one tokenization, grouped into profiles
+"""
+
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from enterprise_nlp import SomaliNLPEngine, nlp_engine
+from text_features import TextFeatures
+from dialect_model import dialect_display_name
+from analysis_results import normalize_fields, select_fields
+
+# Profile used where the caller does not pick one (POST /sentences, dataset builds)
+DEFAULT_PROFILE = os.environ.get('SOMALI_SCORING_PROFILE', 'standard')
+
+# Stages run by each profile, in order
+PROFILES: Dict[str, Tuple[str, ...]] = {
+    'standard': ('quality', 'dialect'),
+    'enterprise': ('enterprise',),
+}
+
+SOMALI_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzáéíóúÁÉÍÓÚ')
+
+
+class ScoringResult:
+    """Output sections of one text plus the values persisted with it"""
+
+    __slots__ = ('text', 'sections', 'quality_score', 'dialect', 'metric_columns', 'error')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.sections: Dict = {}
+        self.quality_score: float = 0.0
+        self.dialect: str = "Unknown"
+        # accuracy, cultural, grammar, completeness, overall (quality_metrics table)
+        self.metric_columns: Tuple[float, ...] = ()
+        # First exception raised by a stage; later stages skip the text
+        self.error: Optional[Exception] = None
+
+
+class ScoringStage:
+    """A scoring step; subclasses fill in result sections from shared features"""
+
+    name = ''
+
+    def __init__(self, engine: SomaliNLPEngine, fields: Optional[Iterable[str]] = None):
+        self.engine = engine
+        self.fields = fields
+
+    def run(self, features: TextFeatures, result: ScoringResult) -> None:
+        raise NotImplementedError
+
+    def run_batch(self, features: Sequence[TextFeatures], results: Sequence[ScoringResult]) -> None:
+        for item, result in zip(features, results):
+            if result.error is not None:
+                continue
+            try:
+                self.run(item, result)
+            except Exception as e:
+                result.error = e
+
+
+class QualityStage(ScoringStage):
+    """Basic length, character diversity, structure and complexity metrics"""
+
+    name = 'quality'
+
+    def run(self, features: TextFeatures, result: ScoringResult) -> None:
+        words = features.words
+
+        # Basic quality indicators
+        length_score = min(len(words) / 10, 1.0) * 25
+
+        # Character diversity (Somali uses specific characters)
+        char_diversity = len(set(features.lower) & SOMALI_CHARS) / len(SOMALI_CHARS) * 25
+
+        # Sentence structure
+        structure_score = 25 if any(p in features.text for p in '.!?') else 0
+
+        # Word complexity (longer words often indicate quality)
+        avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
+        complexity_score = min(avg_word_length / 6, 1.0) * 25
+
+        total_score = length_score + char_diversity + structure_score + complexity_score
+
+        result.sections['quality_metrics'] = {
+            "overall_score": round(total_score, 1),
+            "length_score": round(length_score, 1),
+            "character_diversity": round(char_diversity, 1),
+            "structure_score": round(structure_score, 1),
+            "complexity_score": round(complexity_score, 1),
+            "word_count": len(words),
+            "character_count": len(features.text)
+        }
+        result.quality_score = round(total_score, 1)
+        result.metric_columns = (
+            round(length_score, 1), round(char_diversity, 1), round(structure_score, 1),
+            round(complexity_score, 1), round(total_score, 1)
+        )
+
+
+class DialectStage(ScoringStage):
+    """Dialect detection; a batch goes through the n-gram model in one pass"""
+
+    name = 'dialect'
+
+    # Keyword fallback used until a dialect model has been trained
+    KEYWORD_DIALECTS = (
+        ("Northern Somali", ('waa', 'baa', 'ayaa', 'oo', 'iyo')),
+        ("Southern Somali", ('ka', 'ku', 'la', 'ah', 'uu')),
+        ("Central Somali", ('si', 'ugu', 'kala', 'soo', 'aan')),
+    )
+
+    def run(self, features: TextFeatures, result: ScoringResult) -> None:
+        self.run_batch([features], [result])
+
+    def run_batch(self, features: Sequence[TextFeatures], results: Sequence[ScoringResult]) -> None:
+        pending = [i for i, result in enumerate(results) if result.error is None]
+        features = [features[i] for i in pending]
+        results = [results[i] for i in pending]
+
+        model = self.engine.dialect_model
+        if model is not None:
+            detected = [
+                {"dialect": dialect_display_name(dialect), "confidence": confidence}
+                for dialect, confidence in model.predict([item.text for item in features])
+            ]
+        else:
+            detected = [self._detect_keywords(item.lower) for item in features]
+
+        for dialect_info, result in zip(detected, results):
+            result.sections['dialect_detection'] = dialect_info
+            result.dialect = dialect_info["dialect"]
+
+    def _detect_keywords(self, text_lower: str) -> Dict:
+        counts = [sum(1 for word in indicators if word in text_lower) for _, indicators in self.KEYWORD_DIALECTS]
+        total_indicators = sum(counts)
+
+        if total_indicators == 0:
+            return {"dialect": "Unknown", "confidence": 0}
+
+        # Ties go to the earlier dialect
+        best = max(range(len(counts)), key=lambda i: (counts[i], -i))
+        confidence = (counts[best] / total_indicators) * 100
+        return {"dialect": self.KEYWORD_DIALECTS[best][0], "confidence": round(confidence, 1)}
+
+
+class EnterpriseStage(ScoringStage):
+    """Full enterprise analysis by the NLP engine, read through its analysis cache"""
+
+    name = 'enterprise'
+
+    def __init__(self, engine: SomaliNLPEngine, fields: Optional[Iterable[str]] = None):
+        super().__init__(engine, normalize_fields(fields))
+
+    def run(self, features: TextFeatures, result: ScoringResult) -> None:
+        self._fill(self.engine.analyze_many([features.text], self.fields, [features])[0], result)
+
+    def run_batch(self, features: Sequence[TextFeatures], results: Sequence[ScoringResult]) -> None:
+        pending = [i for i, result in enumerate(results) if result.error is None]
+        try:
+            analyses = self.engine.analyze_many(
+                [features[i].text for i in pending], self.fields, [features[i] for i in pending]
+            )
+        except Exception:
+            # Retry one text at a time so only the failing texts get an error
+            super().run_batch(features, results)
+            return
+
+        for i, analysis in zip(pending, analyses):
+            self._fill(analysis, results[i])
+
+    def _fill(self, analysis: Dict, result: ScoringResult) -> None:
+        result.sections['enterprise_analysis'] = select_fields(analysis, self.fields)
+
+        metrics = analysis.get('enterprise_metrics')
+        if metrics is not None:
+            result.quality_score = metrics['overall_enterprise_score']
+            result.metric_columns = (
+                metrics['accuracy_score'], metrics['cultural_appropriateness'],
+                analysis['grammar_analysis']['grammar_score'], metrics['business_readiness'],
+                metrics['overall_enterprise_score']
+            )
+        if 'dialect_analysis' in analysis:
+            result.dialect = dialect_display_name(analysis['dialect_analysis']['primary_dialect'])
+
+
+# Stage factories by name; register_stage() adds new ones
+STAGES: Dict[str, Callable[..., ScoringStage]] = {
+    'quality': QualityStage,
+    'dialect': DialectStage,
+    'enterprise': EnterpriseStage,
+}
+
+
+def register_stage(name: str, factory: Callable[..., ScoringStage]) -> None:
+    """Make a stage available to profiles"""
+    STAGES[name] = factory
+
+
+class ScoringPipeline:
+    """Runs a profile's stages over texts, tokenizing every text once"""
+
+    def __init__(self, stages: List[ScoringStage], engine: SomaliNLPEngine = nlp_engine):
+        self.stages = stages
+        self.engine = engine
+
+    @classmethod
+    def from_profile(cls, profile: Optional[str] = None, engine: SomaliNLPEngine = nlp_engine,
+                     fields: Optional[Iterable[str]] = None) -> 'ScoringPipeline':
+        """Build the pipeline for a profile (DEFAULT_PROFILE when omitted)"""
+
+        profile = profile or DEFAULT_PROFILE
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown scoring profile '{profile}'. Valid profiles: {', '.join(PROFILES)}")
+
+        return cls([STAGES[name](engine, fields) for name in PROFILES[profile]], engine)
+
+    def score(self, text: str) -> ScoringResult:
+        """Score one text, re-raising a stage failure"""
+
+        result = self.score_batch([text])[0]
+        if result.error is not None:
+            raise result.error
+        return result
+
+    def score_batch(self, texts: Sequence[str]) -> List[ScoringResult]:
+        """Score texts together; a failing text gets its error set instead of raising"""
+
+        # One lexicon snapshot for the whole batch
+        lex = self.engine.lexicon
+        features = [TextFeatures(text, lex) for text in texts]
+        results = [ScoringResult(text) for text in texts]
+
+        metrics = self.engine.metrics
+        for stage in self.stages:
+            if metrics is None:
+                stage.run_batch(features, results)
+            else:
+                start = time.perf_counter_ns()
+                stage.run_batch(features, results)
+                metrics.record(f"pipeline.{stage.name}", time.perf_counter_ns() - start)
+        return results
+
+
+_pipelines: Dict[str, ScoringPipeline] = {}
+
+
+def get_pipeline(profile: Optional[str] = None) -> ScoringPipeline:
+    """Shared pipeline instance for a profile with default fields"""
+
+    profile = profile or DEFAULT_PROFILE
+    pipeline = _pipelines.get(profile)
+    if pipeline is None:
+        pipeline = _pipelines[profile] = ScoringPipeline.from_profile(profile)
+    return pipeline
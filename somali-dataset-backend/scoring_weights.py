@@ -0,0 +1,110 @@
+"""
+Scoring Weights
+The metric weights behind the accuracy and overall enterprise scores, with
+the weights applied by feature_store.py persisted so every engine scores
+with them
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WEIGHTS_PATH = os.environ.get(
+    'SOMALI_SCORING_WEIGHTS', os.path.join(BASE_DIR, 'models', 'scoring_weights.json')
+)
+
+# Default metric weights, used until other weights are applied
+ACCURACY_WEIGHTS = {
+    'grammar': 0.3,
+    'vocabulary': 0.25,
+    'cultural': 0.2,
+    'readability': 0.15,
+    'professional': 0.1
+}
+OVERALL_WEIGHTS = {
+    'accuracy': 0.3,
+    'professionalism': 0.25,
+    'cultural_appropriateness': 0.2,
+    'business_readiness': 0.25
+}
+
+
+class ScoringWeights(NamedTuple):
+    accuracy: Dict[str, float]
+    overall: Dict[str, float]
+
+    @classmethod
+    def defaults(cls) -> 'ScoringWeights':
+        return cls(dict(ACCURACY_WEIGHTS), dict(OVERALL_WEIGHTS))
+
+    def merged(self, accuracy: Optional[Dict[str, float]] = None,
+               overall: Optional[Dict[str, float]] = None) -> 'ScoringWeights':
+        """These weights with some entries replaced; unknown names and negative weights raise ValueError"""
+
+        for defaults, overrides in ((ACCURACY_WEIGHTS, accuracy), (OVERALL_WEIGHTS, overall)):
+            unknown = set(overrides or ()) - set(defaults)
+            if unknown:
+                raise ValueError(f"Unknown weights {sorted(unknown)}, expected some of {list(defaults)}")
+            # Score pruning bounds each metric by its best value, which holds only for non-negative weights
+            negative = sorted(name for name, weight in (overrides or {}).items() if not weight >= 0)
+            if negative:
+                raise ValueError(f"Weights must be non-negative: {negative}")
+        return ScoringWeights({**self.accuracy, **(accuracy or {})}, {**self.overall, **(overall or {})})
+
+    @property
+    def fingerprint(self) -> str:
+        """'default', or a short hash of weights that differ from the defaults"""
+
+        if self.accuracy == ACCURACY_WEIGHTS and self.overall == OVERALL_WEIGHTS:
+            return 'default'
+        encoded = json.dumps({'accuracy': self.accuracy, 'overall': self.overall}, sort_keys=True)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+    def save(self, path: str = DEFAULT_WEIGHTS_PATH) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'accuracy': self.accuracy, 'overall': self.overall}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_WEIGHTS_PATH) -> 'ScoringWeights':
+        with open(path) as f:
+            data = json.load(f)
+        return cls.defaults().merged(data.get('accuracy'), data.get('overall'))
+
+
+class ScoringWeightsProvider:
+    """Lazily loads the applied weights; the defaults until weights are saved"""
+
+    def __init__(self, path: str = DEFAULT_WEIGHTS_PATH):
+        self.path = path
+        self._current: Optional[ScoringWeights] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ScoringWeights:
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    weights = ScoringWeights.defaults()
+                    if os.path.exists(self.path):
+                        try:
+                            weights = ScoringWeights.load(self.path)
+                        except (OSError, ValueError, AttributeError) as e:
+                            logger.warning(f"Ignoring unreadable scoring weights {self.path}: {e}")
+                    self._current = weights
+        return self._current
+
+    def save(self, weights: ScoringWeights) -> None:
+        """Persist weights and score with them from now on"""
+        with self._lock:
+            weights.save(self.path)
+            self._current = weights
@@ -0,0 +1,146 @@
+"""
+Bulk Sentence Writer
+The one write path into somali_sentences: rows are inserted in batches with
+executemany, one explicit transaction per batch, and texts already stored
+are counted as duplicates
+"""
+
+import json
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+# Rows per executemany and transaction
+WRITE_BATCH = 500
+
+# Columns written when none are given; every somali_sentences schema has them
+SENTENCE_COLUMNS = ('text', 'dialect', 'quality_score', 'source', 'validated', 'metadata')
+
+# data_sources type of sources first seen by the writer
+DEFAULT_SOURCE_TYPE = 'text'
+
+
+class SentenceWriter:
+    """
+    Batched INSERT OR IGNORE into somali_sentences
+
+    Rows are dicts keyed by column; a dict or list metadata value is stored
+    as JSON and missing columns are NULL. Each batch runs in one BEGIN
+    IMMEDIATE transaction: rows inserted are counted from the statement's
+    row count, which leaves out rows written by triggers such as the token
+    index log; the rest were duplicates of stored texts. Since the
+    transaction holds the write lock, the batch's new rows are exactly those
+    above the largest id before it, which is how on_inserted learns which
+    rows were new.
+
+    With raw_data, every row is also logged to raw_data under the id of its
+    source's data_sources row, registering sources not seen before.
+    """
+
+    def __init__(self, db_path: str, columns: Sequence[str] = SENTENCE_COLUMNS, batch_size: int = WRITE_BATCH,
+                 raw_data: bool = False, source_type: str = DEFAULT_SOURCE_TYPE):
+        if 'text' not in columns:
+            raise ValueError("columns must include 'text'")
+        self.db_path = db_path
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self.raw_data = raw_data
+        self.source_type = source_type
+        self._source_ids: Dict[str, int] = {}
+
+    def write(self, rows: Iterable[Dict], on_inserted: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        """
+        Write rows batch by batch; a failing batch is rolled back, earlier
+        batches stay committed
+
+        on_inserted is called after each commit with the batch's new rows.
+        Returns counts of rows written, duplicates, rows skipped for having
+        no text, and batches.
+        """
+
+        totals = {"written": 0, "duplicates": 0, "skipped": 0, "batches": 0}
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            batch: List[Dict] = []
+            for row in rows:
+                if not row.get('text'):
+                    totals["skipped"] += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._write_batch(conn, batch, totals, on_inserted)
+                    batch = []
+            if batch:
+                self._write_batch(conn, batch, totals, on_inserted)
+        finally:
+            conn.close()
+        return totals
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Dict], totals: Dict,
+                     on_inserted: Optional[Callable[[List[Dict]], None]]) -> None:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self.raw_data:
+                self._log_raw(conn, batch)
+
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM somali_sentences').fetchone()[0]
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO somali_sentences ({', '.join(self.columns)}) "
+                f"VALUES ({', '.join('?' * len(self.columns))})",
+                self._parameters(batch)
+            )
+            written = cursor.rowcount
+            new_texts = set()
+            if on_inserted is not None and written:
+                new_texts = {text for text, in conn.execute('SELECT text FROM somali_sentences WHERE id > ?', (last_id,))}
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            # Sources registered in this transaction are gone again
+            self._source_ids.clear()
+            raise
+
+        totals["written"] += written
+        totals["duplicates"] += len(batch) - written
+        totals["batches"] += 1
+        if on_inserted is not None and written:
+            # A text repeated within the batch is only new once
+            inserted = []
+            for row in batch:
+                if row['text'] in new_texts:
+                    new_texts.discard(row['text'])
+                    inserted.append(row)
+            on_inserted(inserted)
+
+    def _log_raw(self, conn: sqlite3.Connection, batch: List[Dict]) -> None:
+        source_ids = self._resolve_sources(conn, {row.get('source') for row in batch if row.get('source')})
+        conn.executemany('''
+            INSERT INTO raw_data (source_id, raw_text, language_detected, confidence_score, is_processed, is_valid)
+            VALUES (?, ?, 'somali', ?, TRUE, TRUE)
+        ''', [(source_ids.get(row.get('source')), row['text'], row.get('quality_score')) for row in batch])
+
+    def _resolve_sources(self, conn: sqlite3.Connection, names: set) -> Dict[str, int]:
+        """data_sources ids by name, registering unknown names; cached for the writer's lifetime"""
+
+        missing = sorted(names - self._source_ids.keys())
+        if missing:
+            conn.executemany(
+                "INSERT OR IGNORE INTO data_sources (source_name, source_type) VALUES (?, ?)",
+                [(name, self.source_type) for name in missing]
+            )
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                self._source_ids.update(conn.execute(
+                    f"SELECT source_name, id FROM data_sources WHERE source_name IN ({','.join('?' * len(part))})", part
+                ))
+        return self._source_ids
+
+    def _parameters(self, batch: List[Dict]) -> List[list]:
+        columns = self.columns
+        metadata = columns.index('metadata') if 'metadata' in columns else -1
+        parameters = []
+        for row in batch:
+            values = [row.get(column) for column in columns]
+            if metadata >= 0 and isinstance(values[metadata], (dict, list)):
+                values[metadata] = json.dumps(values[metadata])
+            parameters.append(values)
+        return parameters
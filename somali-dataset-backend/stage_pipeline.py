@@ -0,0 +1,102 @@
+"""
+Bounded Stage Pipeline
+Runs a chain of per-item stages in threads connected by bounded queues, so
+a slow stage holds back its producers instead of letting work pile up
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+# Items waiting between two stages
+QUEUE_SIZE = 4
+
+# Seconds between checks for a cancelled pipeline while blocked on a queue
+POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def pipelined(source: Iterable, stages: Sequence[Callable[[Any], Any]],
+              queue_size: int = QUEUE_SIZE) -> Iterator:
+    """
+    Stream items from source through every stage
+
+    The source is read and each stage runs in its own thread; the caller
+    consumes the results. At most queue_size items wait between two stages,
+    so memory is bounded by the item size whatever the input length. An
+    exception in any stage is re-raised to the caller, and closing the
+    returned iterator early stops every thread.
+    """
+
+    stop = threading.Event()
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+
+    def put(target: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source_queue: queue.Queue):
+        while not stop.is_set():
+            try:
+                return source_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def feed() -> None:
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+        except BaseException as e:
+            put(queues[0], _Failure(e))
+            return
+        put(queues[0], _DONE)
+
+    def work(stage: Callable, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while True:
+            item = get(inbox)
+            if item is _DONE or isinstance(item, _Failure):
+                put(outbox, item)
+                return
+            try:
+                result = stage(item)
+            except BaseException as e:
+                put(outbox, _Failure(e))
+                return
+            if not put(outbox, result):
+                return
+
+    threads: List[threading.Thread] = [threading.Thread(target=feed, daemon=True)]
+    threads.extend(
+        threading.Thread(target=work, args=(stage, queues[i], queues[i + 1]), daemon=True)
+        for i, stage in enumerate(stages)
+    )
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,278 @@
+"""
+Sentence Template Engine
+Compiles sentence templates and their word banks into an indexed
+combination space: every index in [0, size) renders one distinct sentence
+by mixed-radix decoding, so the space is never materialized and sampling
+unique sentences means sampling unique indices
+
+sample_sharded() splits a space into a fixed number of shards, each drawn
+with its own seeded random stream on a process pool, so a seed and count
+give the same sentences however many processes run them
+"""
+
+import bisect
+import multiprocessing
+import os
+import random
+import re
+from itertools import zip_longest
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+# Part of the output: changing it changes what a seed generates
+GENERATION_SHARDS = 16
+# Below this many sentences the shards run in-process; pool startup costs more
+PARALLEL_MIN_COUNT = 20000
+
+# A variation axis: one function per choice, applied to the filled template
+Variation = Sequence[Callable[[str], str]]
+
+
+def unchanged(sentence: str) -> str:
+    return sentence
+
+
+def si_kastaba(sentence: str) -> str:
+    return f"Si kastaba, {sentence.lower()}"
+
+
+def waa_run(sentence: str) -> str:
+    return f"{sentence}. Waa run."
+
+
+def waxaa_la_yidhi(sentence: str) -> str:
+    return f"Waxaa la yidhi: '{sentence}'"
+
+
+# Optional "Si kastaba, ..." opener and ". Waa run." closer
+SAMPLE_VARIATIONS: Tuple[Variation, ...] = ((unchanged, si_kastaba), (unchanged, waa_run))
+
+
+class Template:
+    """
+    One template with a word bank per placeholder and variation axes
+
+    The digits of an index in mixed radix (one digit per distinct
+    placeholder, then one per variation axis) select a word for each
+    placeholder and a choice on each axis. A placeholder used twice gets the
+    same word both times.
+    """
+
+    __slots__ = ('text', 'category', 'weight', 'size', '_pieces', '_radices', '_banks', '_variations')
+
+    def __init__(self, text: str, word_banks: Mapping[str, Sequence[str]], variations: Sequence[Variation] = (),
+                 weight: float = 1.0, category: Optional[str] = None):
+        self.text = text
+        self.category = category
+        self.weight = weight
+
+        # Literal text alternating with slot numbers
+        pieces: List = []
+        slots: Dict[str, int] = {}
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            name = match.group(1)
+            if name not in word_banks:
+                raise ValueError(f"No word bank for {{{name}}} in template {text!r}")
+            if not word_banks[name]:
+                raise ValueError(f"Empty word bank for {{{name}}}")
+            pieces.append(text[position:match.start()])
+            pieces.append(slots.setdefault(name, len(slots)))
+            position = match.end()
+        pieces.append(text[position:])
+
+        self._pieces = tuple(pieces)
+        self._banks = tuple(tuple(word_banks[name]) for name in slots)
+        self._variations = tuple(tuple(axis) for axis in variations)
+        self._radices = tuple(len(bank) for bank in self._banks) + tuple(len(axis) for axis in self._variations)
+        self.size = 1
+        for radix in self._radices:
+            self.size *= radix
+
+    def render(self, index: int) -> str:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        digits = []
+        for radix in self._radices:
+            index, digit = divmod(index, radix)
+            digits.append(digit)
+
+        words = [bank[digit] for bank, digit in zip(self._banks, digits)]
+        sentence = ''.join(piece if isinstance(piece, str) else words[piece] for piece in self._pieces)
+        for axis, digit in zip(self._variations, digits[len(self._banks):]):
+            sentence = axis[digit](sentence)
+        return sentence
+
+
+class _LazyPermutation:
+    """Fisher-Yates over range(n) that only stores the positions it swapped"""
+
+    __slots__ = ('n', 'taken', '_swaps', '_rng')
+
+    def __init__(self, n: int, rng: random.Random):
+        self.n = n
+        self.taken = 0
+        self._swaps: Dict[int, int] = {}
+        self._rng = rng
+
+    def next(self) -> int:
+        i = self.taken
+        j = self._rng.randrange(i, self.n)
+        value = self._swaps.get(j, j)
+        self._swaps[j] = self._swaps.pop(i, i)
+        self.taken += 1
+        return value
+
+
+class TemplateSpace:
+    """
+    The combination space of several templates, laid end to end
+
+    sample() draws sentences without replacement: a template is picked in
+    proportion to its weight among those not yet exhausted, then an index
+    not drawn before from its range, so each combination is rendered at
+    most once and no work goes into duplicates.
+    """
+
+    def __init__(self, templates: Sequence[Template]):
+        self.templates = list(templates)
+        self._offsets = []
+        size = 0
+        for template in self.templates:
+            self._offsets.append(size)
+            size += template.size
+        self.size = size
+
+    @classmethod
+    def from_banks(cls, templates: Sequence[str], word_banks: Mapping[str, Sequence[str]],
+                   variations: Sequence[Variation] = (), weights: Optional[Sequence[float]] = None,
+                   category: Optional[str] = None) -> 'TemplateSpace':
+        weights = weights if weights is not None else [1.0] * len(templates)
+        return cls([Template(text, word_banks, variations, weight, category)
+                    for text, weight in zip(templates, weights)])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def render(self, index: int) -> Tuple[Template, str]:
+        """Template and sentence of a global index"""
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        position = bisect.bisect_right(self._offsets, index) - 1
+        template = self.templates[position]
+        return template, template.render(index - self._offsets[position])
+
+    def report(self) -> Dict:
+        by_category: Dict[str, int] = {}
+        for template in self.templates:
+            if template.category is not None:
+                by_category[template.category] = by_category.get(template.category, 0) + template.size
+        report = {
+            "templates": len(self.templates),
+            "combinations": self.size,
+            "largest_template": max((template.size for template in self.templates), default=0)
+        }
+        if by_category:
+            report["by_category"] = by_category
+        return report
+
+    def shard_size(self, shard: int = 0, shards: int = 1) -> int:
+        """Combinations in one shard; shard k holds the local indices k, k + shards, ..."""
+        return sum(len(range(shard, template.size, shards))
+                   for template in self.templates if template.weight > 0)
+
+    def sample(self, count: int, rng: Optional[random.Random] = None,
+               shard: int = 0, shards: int = 1) -> Iterator[Tuple[Template, str]]:
+        """
+        Up to count distinct (template, sentence) pairs, lazily
+
+        Stops early when the space is exhausted. Distinct indices can still
+        render the same text, e.g. two templates sharing a filled-in form;
+        such repeats are skipped too. With shards > 1 only this shard's
+        strided slice of each template is drawn from.
+        """
+
+        rng = rng or random.Random()
+        live = [(template, _LazyPermutation(len(range(shard, template.size, shards)), rng))
+                for template in self.templates
+                if template.weight > 0 and len(range(shard, template.size, shards))]
+        seen = set()
+        produced = 0
+
+        while live and produced < count:
+            cumulative = []
+            total = 0.0
+            for template, _ in live:
+                total += template.weight
+                cumulative.append(total)
+
+            # Draw until a template runs out, then rebuild the weights without it
+            while produced < count:
+                position = min(bisect.bisect_right(cumulative, rng.random() * total), len(live) - 1)
+                template, permutation = live[position]
+                sentence = template.render(permutation.next() * shards + shard)
+                if sentence not in seen:
+                    seen.add(sentence)
+                    produced += 1
+                    yield template, sentence
+                if permutation.taken == permutation.n:
+                    del live[position]
+                    break
+
+
+def shard_quotas(capacities: Sequence[int], count: int) -> List[int]:
+    """Split count evenly over shards, passing what a full shard can't take to the rest"""
+    quotas = [0] * len(capacities)
+    remaining = min(count, sum(capacities))
+    open_shards = [shard for shard, capacity in enumerate(capacities) if capacity > 0]
+    while remaining and open_shards:
+        share, extra = divmod(remaining, len(open_shards))
+        for i, shard in enumerate(open_shards):
+            taken = min(share + (i < extra), capacities[shard] - quotas[shard])
+            quotas[shard] += taken
+            remaining -= taken
+        open_shards = [shard for shard in open_shards if quotas[shard] < capacities[shard]]
+    return quotas
+
+
+def _sample_shard(task: Tuple[TemplateSpace, int, int, int, int]) -> List[Tuple[int, str]]:
+    space, count, seed, shard, shards = task
+    positions = {id(template): position for position, template in enumerate(space.templates)}
+    # String seeds hash with SHA-512, so streams are stable across processes and runs
+    rng = random.Random(f"{seed}/{shard}/{shards}")
+    return [(positions[id(template)], sentence)
+            for template, sentence in space.sample(count, rng, shard, shards)]
+
+
+def sample_sharded(space: TemplateSpace, count: int, seed: int, shards: int = GENERATION_SHARDS,
+                   processes: Optional[int] = None) -> List[Tuple[Template, str]]:
+    """
+    Up to count distinct (template, sentence) pairs, reproducible from seed
+
+    The count is split over the shards by shard_quotas() and each shard is
+    sampled independently; the results are interleaved in shard order and
+    text repeated across shards is dropped, keeping the first. processes
+    (default: one per core) only changes how fast this runs, never what it
+    returns.
+    """
+
+    quotas = shard_quotas([space.shard_size(shard, shards) for shard in range(shards)], count)
+    tasks = [(space, quota, seed, shard, shards) for shard, quota in enumerate(quotas)]
+    processes = min(processes or os.cpu_count() or 1, shards)
+
+    if processes > 1 and count >= PARALLEL_MIN_COUNT:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_sample_shard, tasks)
+    else:
+        results = [_sample_shard(task) for task in tasks]
+
+    # Round-robin merge keeps every prefix spread over the whole space
+    merged: List[Tuple[Template, str]] = []
+    seen = set()
+    for row in zip_longest(*results):
+        for item in row:
+            if item is not None and item[1] not in seen:
+                seen.add(item[1])
+                merged.append((space.templates[item[0]], item[1]))
+    return merged
@@ -89,6 +89,1482 @@ def test_nlp_engine():
         print("❌ No valid results")
         return False
 
+def test_field_projection():
+    """Test that field selection only returns the requested sections"""
+    print("\n🧪 Testing Field Projection...")
+    
+    sentence = "Dhaqanka Soomaaliyeed waa mid taariikh dheer leh"
+    
+    try:
+        full = nlp_engine.analyze_text_enterprise(sentence)
+        projected = nlp_engine.analyze_text_enterprise(sentence, fields=['enterprise_metrics'])
+        
+        print(f"   Full sections: {len(full)}")
+        print(f"   Projected sections: {list(projected.keys())}")
+        
+        same_score = projected['enterprise_metrics'] == full['enterprise_metrics']
+        only_requested = list(projected.keys()) == ['enterprise_metrics']
+        
+        try:
+            nlp_engine.analyze_text_enterprise(sentence, fields=['unknown_section'])
+            rejects_unknown = False
+        except ValueError:
+            rejects_unknown = True
+        
+        return same_score and only_requested and rejects_unknown
+        
+    except Exception as e:
+        print(f"❌ Projection error: {e}")
+        return False
+
+def test_scoring_fast_path():
+    """Test that scoring-only mode matches the full analysis"""
+    print("\n🧪 Testing Scoring Fast Path...")
+    
+    sentences = [
+        "Dhaqanka Soomaaliyeed waa mid taariikh dheer leh",
+        "Waxaa jira dowlad iyo wasiir caafimaad oo ka hadlay dhakhtarka isbitaal sida guud ahaan (2020).",
+        "The quick brown fox jumps over the lazy dog"
+    ]
+    
+    try:
+        for sentence in sentences:
+            full_score = nlp_engine.analyze(sentence).enterprise_metrics.overall_enterprise_score
+            scores = nlp_engine.score_text(sentence)
+            
+            print(f"   {full_score}% vs {scores.overall_enterprise_score}%: '{sentence[:40]}'")
+            
+            if scores.overall_enterprise_score != full_score:
+                return False
+            
+            # Pruned texts must really be below the threshold
+            if nlp_engine.score_text(sentence, min_score=70) is None and full_score >= 70:
+                return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Scoring error: {e}")
+        return False
+
+def test_lexicon_hot_reload():
+    """Test swapping in a new lexicon bundle at runtime"""
+    print("\n🧪 Testing Lexicon Hot Reload...")
+    
+    import tempfile
+    from enterprise_nlp import SomaliNLPEngine
+    from lexicon_bundle import DEFAULT_LEXICON_PATH, LexiconProvider
+    
+    sentence = "Qoraalkan waxaa ku jira erayga tijaabo"
+    
+    try:
+        with open(DEFAULT_LEXICON_PATH) as f:
+            bundle = json.load(f)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = SomaliNLPEngine(LexiconProvider(DEFAULT_LEXICON_PATH, cache_dir=tmp_dir))
+            before = engine.analyze(sentence).vocabulary_analysis.vocabulary_score
+            snapshot = engine.lexicon
+            
+            bundle['version'] = 'test-reload'
+            bundle['professional_words']['education'].append('tijaabo')
+            new_path = os.path.join(tmp_dir, 'lexicon.json')
+            with open(new_path, 'w') as f:
+                json.dump(bundle, f)
+            
+            engine.reload_lexicon(new_path)
+            after = engine.analyze(sentence).vocabulary_analysis.vocabulary_score
+            
+            print(f"   Vocabulary score: {before} -> {after} ({engine.lexicon.version})")
+            
+            # The old snapshot must be untouched by the swap
+            return after > before and snapshot.version != engine.lexicon.version
+        
+    except Exception as e:
+        print(f"❌ Reload error: {e}")
+        return False
+
+def test_document_streaming():
+    """Test streaming document analysis against whole-text analysis"""
+    print("\n🧪 Testing Document Streaming...")
+    
+    import io
+    from enterprise_nlp import nlp_engine
+    
+    text = ("Dowladda Soomaaliya waxay ku dhawaaqday barnaamij cusub oo waxbarasho. "
+            "Ardayda jaamacadda ayaa ka qayb qaadanaya cilmi baarista! ") * 200
+    
+    try:
+        expected = nlp_engine.analyze(text, ['enterprise_metrics', 'readability_analysis']).to_dict()
+        
+        sentences = []
+        result = nlp_engine.analyze_document(
+            io.BytesIO(text.encode('utf-8')),
+            fields=['enterprise_metrics', 'readability_analysis'],
+            on_sentence=lambda index, sentence, scores: sentences.append(scores),
+            chunk_size=100
+        ).to_dict()
+        
+        print(f"   Sentences streamed: {len(sentences)}")
+        print(f"   Segments analyzed: {result['document_stats']['segments_analyzed']}")
+        
+        return (len(sentences) == 400 and
+                result['enterprise_metrics'] == expected['enterprise_metrics'] and
+                result['readability_analysis'] == expected['readability_analysis'])
+        
+    except Exception as e:
+        print(f"❌ Streaming error: {e}")
+        return False
+
+def test_dialect_model():
+    """Test training and batch inference of the n-gram dialect model"""
+    print("\n🧪 Testing Dialect Model...")
+    
+    import random
+    import tempfile
+    from dialect_model import DialectModel, train_dialect_model
+    
+    common = ["qof", "guri", "magaalo", "arday", "dugsi", "hooyo", "aabe", "biyo", "shaqo", "maanta"]
+    markers = {
+        "Northern Somali": ["yahay", "tahay", "kaalay", "dhinac"],
+        "Southern Somali": ["raac", "keen", "dhowr", "yimi"],
+        "Coastal Somali": ["xamar", "badda", "dekad", "kalluun"]
+    }
+    rng = random.Random(7)
+    
+    def make_sentence(dialect):
+        words = [rng.choice(common) for _ in range(rng.randint(4, 10))]
+        words.insert(rng.randrange(len(words) + 1), rng.choice(markers[dialect]))
+        return " ".join(words) + "."
+    
+    try:
+        labels = [rng.choice(list(markers)) for _ in range(600)]
+        model = train_dialect_model([make_sentence(label) for label in labels], labels,
+                                    hash_bits=14, epochs=60)
+        
+        test_labels = [rng.choice(list(markers)) for _ in range(200)]
+        test_texts = [make_sentence(label) for label in test_labels]
+        predictions = model.predict(test_texts)
+        accuracy = sum(1 for (dialect, _), label in zip(predictions, test_labels)
+                       if label.lower().startswith(dialect)) / len(test_labels)
+        
+        print(f"   Dialects: {', '.join(model.classes)}")
+        print(f"   Accuracy: {accuracy:.1%}, temperature {model.temperature:.2f}")
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'dialect_model.npz')
+            model.save(path)
+            reloaded = DialectModel.load(path)
+        
+        # Batch inference must agree with one-by-one inference
+        single = [model.predict([text])[0] for text in test_texts[:20]]
+        
+        return (accuracy >= 0.9 and
+                single == predictions[:20] and
+                reloaded.predict(test_texts) == predictions and
+                model.predict(["", "123"]) == [("Unknown", 0), ("Unknown", 0)])
+        
+    except Exception as e:
+        print(f"❌ Dialect model error: {e}")
+        return False
+
+def test_language_id():
+    """Test the language identification gate"""
+    print("\n🧪 Testing Language Identification...")
+    
+    from language_id import language_gate
+    
+    samples = [
+        ("Dadka Soomaaliyeed waxay leeyihiin dhaqan taariikh dheer leh", "somali"),
+        ("Macallinku waa qofka dhisa mustaqbalka ardayda", "somali"),
+        ("The results of the election will be announced tomorrow", "english"),
+        ("ذهبت إلى السوق مع والدي", "arabic"),
+        ("Ich habe heute keine Zeit für dich", "other"),
+        ("12345 67890", "other")
+    ]
+    
+    try:
+        detected = language_gate.identifier.identify([text for text, _ in samples])
+        for (text, expected), (language, confidence) in zip(samples, detected):
+            print(f"   {language} ({confidence}%): '{text[:40]}'")
+        
+        kept, rejected = language_gate.split([text for text, _ in samples])
+        print(f"   Kept {len(kept)}, rejected {rejected}")
+        
+        # A NUL inside one text must not shift the texts after it
+        with_nul = language_gate.identifier.identify(["Dadka\x00Soomaaliyeed waxay leeyihiin dhaqan"] +
+                                                     [text for text, _ in samples])
+        separated = [language for language, _ in with_nul[1:]] == [language for language, _ in detected]
+        
+        return ([language for language, _ in detected] == [expected for _, expected in samples] and
+                kept == [0, 1] and sum(rejected.values()) == 4 and separated)
+        
+    except Exception as e:
+        print(f"❌ Language ID error: {e}")
+        return False
+
+def test_scoring_pipeline():
+    """Test the unified scoring pipeline profiles"""
+    print("\n🧪 Testing Scoring Pipeline...")
+    
+    from scoring_pipeline import ScoringPipeline, get_pipeline
+    
+    sentence = "Waxbarashadu waa furaha horumarinta bulshada Soomaaliyeed."
+    
+    try:
+        standard = get_pipeline("standard").score(sentence)
+        quality = standard.sections["quality_metrics"]
+        print(f"   Standard: {standard.quality_score} ({standard.dialect})")
+    
+        # 6 words, 18 distinct letters, punctuation, 8.8 chars per word
+        expected_overall = round(0.6 * 25 + 18 / 36 * 25 + 25 + 25, 1)
+    
+        enterprise = ScoringPipeline.from_profile("enterprise").score(sentence)
+        direct = nlp_engine.analyze_text_enterprise(sentence)
+        print(f"   Enterprise: {enterprise.quality_score} ({enterprise.dialect})")
+    
+        # Batch errors stay on their result; score() raises them
+        failing = ScoringPipeline.from_profile("enterprise")
+        batch = failing.score_batch([sentence, ""])
+        print(f"   Batch errors: {[type(r.error).__name__ if r.error else None for r in batch]}")
+    
+        return (quality["overall_score"] == expected_overall and quality["word_count"] == 6 and
+                standard.metric_columns[-1] == standard.quality_score and
+                {k: v for k, v in enterprise.sections["enterprise_analysis"].items() if k != "timestamp"} ==
+                {k: v for k, v in direct.items() if k != "timestamp"} and
+                enterprise.quality_score == direct["enterprise_metrics"]["overall_enterprise_score"] and
+                batch[0].error is None and batch[1].error is not None)
+    
+    except Exception as e:
+        print(f"❌ Scoring pipeline error: {e}")
+        return False
+
+def test_engine_metrics():
+    """Test per-stage timing instrumentation"""
+    print("\n🧪 Testing Engine Metrics...")
+    
+    from enterprise_nlp import TIMED_STAGES
+    
+    sentence = "Dhaqanka Soomaaliyeed waa mid taariikh dheer leh"
+    
+    try:
+        untimed = nlp_engine.analyze(sentence).to_dict()
+        
+        with nlp_engine.profile() as metrics:
+            for _ in range(5):
+                timed = nlp_engine.analyze(sentence).to_dict()
+        
+        print(metrics.report())
+        stages = metrics.snapshot()["stages"]
+        
+        # Instrumentation must be fully removed after the block
+        restored = nlp_engine.metrics is None and not any(name in vars(nlp_engine) for name in TIMED_STAGES)
+        
+        untimed.pop("timestamp")
+        timed.pop("timestamp")
+        
+        return (timed == untimed and restored and
+                all(stages[name]["calls"] == 5 for name in TIMED_STAGES))
+        
+    except Exception as e:
+        print(f"❌ Engine metrics error: {e}")
+        return False
+
+def test_analysis_cache():
+    """Test the persistent analysis cache and its version invalidation"""
+    print("\n🧪 Testing Analysis Cache...")
+    
+    import tempfile
+    from enterprise_nlp import SomaliNLPEngine
+    from analysis_cache import AnalysisCache
+    from lexicon_bundle import DEFAULT_LEXICON_PATH, LexiconProvider
+    
+    sentence = "Dowladda iyo wasiirka caafimaad waxaa ka hadlay dhakhtarka isbitaal."
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'cache.db')
+            engine = SomaliNLPEngine(LexiconProvider(DEFAULT_LEXICON_PATH, cache_dir=tmp_dir),
+                                     analysis_cache=AnalysisCache(db_path))
+            
+            first = engine.analyze_text_enterprise(sentence)
+            engine.analysis_cache.flush()
+            
+            # A new process sees the stored row, also for padded input; hits are dated now
+            engine.analysis_cache = AnalysisCache(db_path)
+            second = engine.analyze_text_enterprise("  " + sentence + "\n")
+            redated = second.pop('timestamp') > first.pop('timestamp')
+            projected = engine.analyze_text_enterprise(sentence, fields=['enterprise_metrics'])
+            scores = engine.score_text(sentence)
+            hits = engine.analysis_cache.hits
+            print(f"   Hits after restart: {hits}")
+            
+            # A lexicon with a new version must not be served old rows
+            with open(DEFAULT_LEXICON_PATH) as f:
+                bundle = json.load(f)
+            bundle['version'] = 'test-cache'
+            new_path = os.path.join(tmp_dir, 'lexicon.json')
+            with open(new_path, 'w') as f:
+                json.dump(bundle, f)
+            engine.reload_lexicon(new_path)
+            engine.analyze_text_enterprise(sentence)
+            stats = engine.analysis_cache.stats()
+            print(f"   After version change: {stats}")
+            
+            # A cache database that can't be opened only costs misses (buffered rows still hit)
+            engine.analysis_cache = AnalysisCache(tmp_dir)
+            degraded = (engine.analyze_text_enterprise(sentence)['enterprise_metrics'] == first['enterprise_metrics'] and
+                        engine.score_text(sentence) is not None and engine.analysis_cache.misses == 1)
+            print(f"   Unusable cache: analyses still served: {degraded}")
+            
+            return (first == second and redated and hits == 3 and degraded and
+                    projected == {'enterprise_metrics': first['enterprise_metrics']} and
+                    scores.overall_enterprise_score == first['enterprise_metrics']['overall_enterprise_score'] and
+                    stats['hits'] == 3 and stats['rows'] == 1)
+        
+    except Exception as e:
+        print(f"❌ Analysis cache error: {e}")
+        return False
+
+def test_selective_rescoring():
+    """Test re-scoring only the sentences affected by a lexicon change"""
+    print("\n🧪 Testing Selective Re-scoring...")
+    
+    import tempfile
+    from enterprise_nlp import SomaliNLPEngine
+    from lexicon_bundle import DEFAULT_LEXICON_PATH, LexiconProvider
+    from corpus_rescoring import RescoringJob, diff_lexicons
+    
+    sentences = [
+        "Macallinka iskuulka wuxuu baraa ardayda xisaabta",
+        "Ganacsiga suuqa waa mid horumar leh",
+        "Dadka reer miyiga waxay dhaqdaan geel iyo ari",
+        "Xukuumadda ayaa ansixisay sharci cusub oo caafimaad",
+        "Carruurtu waxay ku ciyaarayaan garoonka kubadda"
+    ]
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'rescore.db')
+            engine = SomaliNLPEngine(LexiconProvider(DEFAULT_LEXICON_PATH, cache_dir=tmp_dir))
+            
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, metadata TEXT
+                )
+            ''')
+            for sentence in sentences:
+                scores = engine.score_text(sentence)
+                conn.execute(
+                    "INSERT INTO somali_sentences (text, dialect, quality_score, source, metadata) VALUES (?, ?, ?, ?, ?)",
+                    (sentence, scores.primary_dialect, scores.overall_enterprise_score, "test", json.dumps(scores.to_dict()))
+                )
+            # Standard-profile rows do not depend on the lexicon
+            conn.execute("INSERT INTO somali_sentences (text, quality_score, metadata) VALUES ('Ardayda iskuulka', 50, '{}')")
+            conn.commit()
+            conn.close()
+            
+            job = RescoringJob(engine, db_path)
+            baseline = job.run()
+            
+            # New version: one professional word and one formal pattern
+            with open(DEFAULT_LEXICON_PATH) as f:
+                bundle = json.load(f)
+            bundle['version'] = 'test-rescore'
+            bundle['professional_words']['education'].append('iskuulka')
+            bundle['professional_indicators']['formal_patterns'].append('ansixi')
+            new_path = os.path.join(tmp_dir, 'lexicon.json')
+            with open(new_path, 'w') as f:
+                json.dump(bundle, f)
+            old_lexicon = engine.lexicon
+            engine.reload_lexicon(new_path)
+            
+            diff = diff_lexicons(old_lexicon, engine.lexicon)
+            progress = []
+            report = job.run(progress=lambda done, total: progress.append((done, total)))
+            print(f"   Diff: {diff.to_dict()}")
+            print(f"   Baseline: {baseline['mode']} {baseline['candidates']}, now: {report}")
+            
+            conn = sqlite3.connect(db_path)
+            stored = dict(conn.execute("SELECT text, quality_score FROM somali_sentences"))
+            conn.close()
+            
+            return (baseline["mode"] == "full" and baseline["candidates"] == 5 and
+                    report["mode"] == "selective" and report["candidates"] == 3 and report["rescored"] == 2 and
+                    progress[-1] == (3, 3) and stored['Ardayda iskuulka'] == 50 and
+                    all(stored[s] == engine.score_text(s).overall_enterprise_score for s in sentences))
+        
+    except Exception as e:
+        print(f"❌ Re-scoring error: {e}")
+        return False
+
+def test_token_index():
+    """Test the compressed token index and boolean search"""
+    print("\n🧪 Testing Token Index...")
+    
+    import tempfile
+    from lexicon_bundle import load_lexicon, DEFAULT_LEXICON_PATH
+    from token_index import TokenIndex, QueryError, encode_postings, decode_postings
+    
+    sentences = [
+        "Dhakhtarka ayaa daaweeyay bukaanka.",
+        "Macallinka wuxuu baraa ardayda",
+        "Bukaanka iyo dhakhtarka waxay joogaan isbitaalka",
+        "Ardayda waxay tagaan iskuulka, macallinkuna waa joogaa"
+    ]
+    
+    try:
+        ids = [1, 2, 130, 131, 20000, 2 ** 40]
+        if decode_postings(encode_postings(ids)).tolist() != ids:
+            print("❌ Posting list round trip failed")
+            return False
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'index.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute("CREATE TABLE somali_sentences (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT, source TEXT)")
+            conn.executemany("INSERT INTO somali_sentences (text) VALUES (?)", [(s,) for s in sentences])
+            conn.commit()
+            
+            index = TokenIndex(db_path)
+            lexicon = load_lexicon(DEFAULT_LEXICON_PATH, cache_dir=None)
+            lexicon.data['professional_words'].setdefault('medical', []).append('bukaanka')
+            
+            def search(query):
+                return index.search(query, lexicon, limit=100)[1]
+            
+            built = (search("bukaanka dhakhtarka") == [1, 3] and
+                     search("macallinka OR iskuulka") == [2, 4] and
+                     search("ardayda NOT iskuulka") == [2] and
+                     search("NOT (bukaanka OR ardayda)") == [] and
+                     search("category:medical AND isbitaalka") == [3])
+            
+            # Writes made behind the index's back reach it through the triggers
+            conn.execute("DELETE FROM somali_sentences WHERE id = 1")
+            conn.execute("INSERT INTO somali_sentences (text) VALUES ('Dhakhtarka cusub wuxuu yimid')")
+            conn.execute("UPDATE somali_sentences SET text = 'Macallinka cusub' WHERE id = 2")
+            conn.commit()
+            conn.close()
+            
+            incremental = (search("dhakhtarka") == [3, 5] and search("cusub") == [2, 5] and
+                           search("ardayda") == [4])
+            print(f"   Built: {built}, incremental: {incremental}")
+            
+            try:
+                search("(bukaanka OR")
+                return False
+            except QueryError:
+                pass
+            return built and incremental
+        
+    except Exception as e:
+        print(f"❌ Token index error: {e}")
+        return False
+
+def test_vocabulary_stats():
+    """Test corpus vocabulary counts maintained through the token index"""
+    print("\n🧪 Testing Vocabulary Statistics...")
+    
+    import tempfile
+    from token_index import TokenIndex
+    
+    rows = [
+        ("Waxaan tagay suuqa, suuqa waa weyn", "Northern Somali", "news"),
+        ("Suuqa Muqdisho waa mid weyn", "Southern Somali", "news"),
+        ("Waxaan arkay geel badan", "Northern Somali", "manual")
+    ]
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'vocabulary.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute("CREATE TABLE somali_sentences (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT, source TEXT)")
+            conn.executemany("INSERT INTO somali_sentences (text, dialect, source) VALUES (?, ?, ?)", rows)
+            conn.commit()
+            
+            index = TokenIndex(db_path)
+            overall = index.top_words(3)
+            northern = index.top_words(2, dialect="Northern Somali")
+            by_documents = index.top_words(1, source="news", by="documents")
+            print(f"   Overall: {[(w['word'], w['occurrences'], w['documents']) for w in overall['words']]}")
+            
+            built = (overall["sentences"] == 3 and overall["tokens"] == 15 and
+                     [w["word"] for w in overall["words"]] == ["suuqa", "waa", "waxaan"] and
+                     overall["words"][0]["occurrences"] == 3 and overall["words"][0]["documents"] == 2 and
+                     [w["word"] for w in northern["words"]] == ["suuqa", "waxaan"] and
+                     by_documents["words"][0]["word"] == "suuqa" and by_documents["sentences"] == 2)
+            
+            # Deletes and dialect changes move counts between scopes
+            conn.execute("DELETE FROM somali_sentences WHERE id = 1")
+            conn.execute("UPDATE somali_sentences SET dialect = 'Northern Somali' WHERE id = 2")
+            conn.commit()
+            conn.close()
+            
+            overall = index.top_words(1)
+            northern = index.top_words(10, dialect="Northern Somali")
+            frequencies, total = index.document_frequencies(["suuqa", "geel", "magaalo"])
+            incremental = (overall["sentences"] == 2 and overall["words"][0]["occurrences"] == 1 and
+                           northern["sentences"] == 2 and
+                           index.top_words(5, dialect="Southern Somali")["words"] == [] and
+                           frequencies == {"suuqa": 1, "geel": 1} and total == 2)
+            print(f"   Built: {built}, incremental: {incremental}")
+            return built and incremental
+        
+    except Exception as e:
+        print(f"❌ Vocabulary statistics error: {e}")
+        return False
+
+def test_word_formation():
+    """Test suffix trie morphology and its use in grammar scoring"""
+    print("\n🧪 Testing Word Formation...")
+    
+    import pickle
+    from lexicon_bundle import load_lexicon, DEFAULT_LEXICON_PATH
+    
+    try:
+        lexicon = load_lexicon(DEFAULT_LEXICON_PATH, cache_dir=None)
+        morphology = lexicon.morphology
+        
+        expected = {
+            "ardayda": {"feminine"},
+            "macallinka": {"masculine"},
+            "magaalooyin": {"plural"},
+            "wiilyar": {"diminutive"},
+            "ka": set(),
+            "nin": set()
+        }
+        classified = {word: set(morphology.classify(word)) for word in expected}
+        print(f"   Classified: {classified}")
+        
+        # The memo is rebuilt after the compiled lexicon is unpickled
+        restored = pickle.loads(pickle.dumps(lexicon)).morphology
+        
+        grammar = nlp_engine.analyze_text_enterprise(
+            "Macallinka iyo ardayda waxay joogaan magaalooyin waaweyn.", fields=["grammar_analysis"]
+        )["grammar_analysis"]
+        print(f"   Word forms: {grammar['word_forms']}")
+        
+        return (classified == expected and restored.classify("ardayda") == {"feminine"} and
+                morphology.count_forms(["ardayda", "bisadda", "magaalooyin"]) ==
+                {"plural": 1, "feminine": 2, "masculine": 0, "diminutive": 0} and
+                grammar["word_forms"]["plural"] >= 1 and grammar["word_forms"]["masculine"] == 1)
+        
+    except Exception as e:
+        print(f"❌ Word formation error: {e}")
+        return False
+
+
+def test_feature_store():
+    """Test re-scoring the corpus from stored features with new weights"""
+    print("\n🧪 Testing Feature Store...")
+    
+    import tempfile
+    from enterprise_nlp import SomaliNLPEngine
+    from lexicon_bundle import DEFAULT_LEXICON_PATH, LexiconProvider
+    from feature_store import FeatureStore
+    from scoring_weights import ScoringWeightsProvider
+    
+    sentences = [
+        "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka.",
+        "Macallinka wuxuu baraa ardayda xisaabta (2019).",
+        "Ganacsiga suuqa waa mid horumar leh",
+        "Mudane, waxaan codsanayaa in aad ii soo dirto warbixinta sanadlaha ah.",
+        "Wiilyar iyo gabadhyar ayaa ku ciyaaraya guryaha dhexdooda!"
+    ]
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'features.db')
+            weights_path = os.path.join(tmp_dir, 'scoring_weights.json')
+            engine = SomaliNLPEngine(LexiconProvider(DEFAULT_LEXICON_PATH, cache_dir=tmp_dir),
+                                     scoring_weights_provider=ScoringWeightsProvider(weights_path))
+            
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, metadata TEXT
+                )
+            ''')
+            for sentence in sentences:
+                scores = engine.score_text(sentence, cached=False)
+                conn.execute(
+                    "INSERT INTO somali_sentences (text, dialect, quality_score, source, metadata) VALUES (?, ?, ?, ?, ?)",
+                    (sentence, scores.primary_dialect, scores.overall_enterprise_score, "test", json.dumps(scores.to_dict()))
+                )
+            conn.commit()
+            
+            store = FeatureStore(db_path, engine=engine)
+            unchanged = store.rescore()
+            
+            accuracy_weights = {'grammar': 0.1, 'vocabulary': 0.45}
+            overall_weights = {'accuracy': 0.5, 'business_readiness': 0.05}
+            dry_run = store.rescore(accuracy_weights, overall_weights)
+            try:
+                store.rescore({'grammar': -0.1})
+                rejected = False
+            except ValueError:
+                rejected = True
+            version_before = engine.cache_version()
+            kept = engine.scoring_weights.fingerprint == 'default' and not os.path.exists(weights_path)
+            applied = store.rescore(accuracy_weights, overall_weights, apply=True)
+            
+            # Applying makes them the engine's weights, saved for other engines too
+            expected = {s: engine.score_text(s, cached=False).to_dict() for s in sentences}
+            reloaded = ScoringWeightsProvider(weights_path).get()
+            persisted = (reloaded == engine.scoring_weights and reloaded.accuracy['grammar'] == 0.1 and
+                         reloaded.overall['accuracy'] == 0.5 and engine.cache_version() != version_before)
+            again = store.rescore()
+            
+            matches = True
+            for text, quality_score, metadata in conn.execute("SELECT text, quality_score, metadata FROM somali_sentences"):
+                metadata = json.loads(metadata)
+                matches &= quality_score == expected[text]['overall_enterprise_score']
+                matches &= all(metadata[name] == value for name, value in expected[text].items())
+            conn.close()
+            
+            print(f"   Unchanged: {unchanged['changed']}, changed: {dry_run['changed']}, updated: {applied['updated']}")
+            print(f"   Matches engine: {matches}, weights persisted: {persisted}, changed after apply: {again['changed']}")
+            return (unchanged['rows'] == len(sentences) and unchanged['changed'] == 0 and
+                    dry_run['changed'] > 0 and dry_run['updated'] == 0 and kept and rejected and
+                    applied['updated'] == dry_run['changed'] and matches and persisted and again['changed'] == 0)
+        
+    except Exception as e:
+        print(f"❌ Feature store error: {e}")
+        return False
+
+
+def test_collection_cascade():
+    """Test the cost-ordered collection filter cascade and its stage counts"""
+    print("\n🧪 Testing Collection Cascade...")
+    
+    import tempfile
+    from data_collection_system import SomaliDataCollector
+    from collection_filters import default_stages
+    from enterprise_nlp import SomaliNLPEngine
+    from lexicon_bundle import DEFAULT_LEXICON_PATH, LexiconProvider
+    
+    texts = [
+        "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dalka.",
+        "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dalka.",
+        "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn ee magaalada.",
+        "Ganacsiga suuqa waa mid horumar leh oo dadka ka faa'iideystaan.",
+        "Ardayda way yimaadeen.",
+        "هذه جملة باللغة العربية لاختبار المرشح اللغوي الجديد.",
+        "This is an English sentence about the weather in London today."
+    ]
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'collect.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.execute("INSERT INTO somali_sentences (text) VALUES (?)", (texts[3].rstrip('.'),))
+            conn.commit()
+            conn.close()
+            
+            # The analysis stage carries on from the sections the score bound computed
+            engine = SomaliNLPEngine(LexiconProvider(DEFAULT_LEXICON_PATH, cache_dir=tmp_dir))
+            grammar_calls = []
+            analyze_grammar = engine._analyze_grammar
+            engine._analyze_grammar = lambda features: grammar_calls.append(features.text) or analyze_grammar(features)
+            
+            # A lower threshold than the default so some sentences are kept
+            collector = SomaliDataCollector(db_path, stages=default_stages(db_path, min_score=30, engine=engine))
+            result = collector.collect_from_text_sources(texts)
+            stages = result['filter_stages']
+            
+            grammar_analyses = len(grammar_calls)
+            conn = sqlite3.connect(db_path)
+            stored = conn.execute("SELECT text, quality_score FROM somali_sentences WHERE quality_score IS NOT NULL").fetchall()
+            conn.close()
+            shared = (grammar_analyses == stages['score_bound']['received'] and stored and
+                      all(score == engine.score_text(text, cached=False).overall_enterprise_score for text, score in stored))
+            print(f"   Grammar analyses: {grammar_analyses} for {stages['score_bound']['received']} bounded texts")
+            
+            for name, stats in stages.items():
+                print(f"   {name}: {stats['received']} -> {stats['passed']} {stats['reasons']}")
+            
+            ordered = list(stages) == ['length', 'charset', 'dedup', 'language', 'score_bound', 'analysis']
+            chained = all(stages[a]['passed'] == stages[b]['received'] for a, b in zip(stages, list(stages)[1:]))
+            reasons = (stages['length']['reasons'] == {'too_short': 1} and
+                       stages['charset']['reasons'] == {'foreign_characters': 1} and
+                       stages['dedup']['reasons'] == {'repeated_in_batch': 1, 'already_collected': 1} and
+                       result['rejected_by_language'] == {'english': 1})
+            collected = result['total_collected'] == stages['analysis']['passed'] > 0
+            totals = collector.filter_metrics.snapshot()['stages']['length']['received'] == len(texts)
+            
+            return ordered and chained and reasons and collected and totals and shared
+        
+    except Exception as e:
+        print(f"❌ Collection cascade error: {e}")
+        return False
+
+
+def test_streaming_collection():
+    """Test streaming collection through bounded stages with batched commits"""
+    print("\n🧪 Testing Streaming Collection...")
+    
+    import tempfile
+    import data_collection_system
+    from data_collection_system import SomaliDataCollector
+    from collection_filters import FilterStage, default_stages
+    from stage_pipeline import pipelined
+    
+    class FailAfter(FilterStage):
+        name = 'fail_after'
+        cost = float('inf')
+        
+        def __init__(self, batches):
+            self.batches = batches
+        
+        def filter(self, candidates):
+            self.batches -= 1
+            if self.batches < 0:
+                raise RuntimeError("stage failed")
+            return candidates, {}
+    
+    def documents(count, place):
+        for i in range(count):
+            yield f"Macallinka {i} wuxuu baraa ardayda {place} xisaabta iyo taariikhda. Ardayda {i} waxay tagaan iskuulka {place}."
+    
+    saved = data_collection_system.SPLIT_BATCH, data_collection_system.COMMIT_BATCH
+    try:
+        ordered = list(pipelined(range(100), [lambda x: x * 2, lambda x: x + 1], queue_size=2)) == [2 * x + 1 for x in range(100)]
+        try:
+            list(pipelined(range(10), [lambda x: 1 // (5 - x)]))
+            propagated = False
+        except ZeroDivisionError:
+            propagated = True
+        
+        data_collection_system.SPLIT_BATCH = data_collection_system.COMMIT_BATCH = 10
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'stream.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.commit()
+            
+            collector = SomaliDataCollector(db_path, stages=default_stages(db_path, min_score=0))
+            result = collector.collect_from_text_sources(documents(50, 'Muqdisho'))
+            streamed = (result['sentences_found'] == 100 and result['total_collected'] == 100 and
+                        conn.execute("SELECT COUNT(*) FROM somali_sentences").fetchone()[0] == 100)
+            
+            # Batches written before a failure stay committed
+            failing = SomaliDataCollector(db_path, stages=default_stages(db_path, min_score=0) + [FailAfter(3)])
+            try:
+                failing.collect_from_text_sources(documents(50, 'Hargeysa'))
+                committed = False
+            except RuntimeError:
+                committed = conn.execute("SELECT COUNT(*) FROM somali_sentences").fetchone()[0] == 130
+            conn.close()
+        
+        print(f"   Ordered: {ordered}, errors propagated: {propagated}")
+        print(f"   Streamed: {streamed}, committed before failure: {committed}")
+        return ordered and propagated and streamed and committed
+        
+    except Exception as e:
+        print(f"❌ Streaming collection error: {e}")
+        return False
+    finally:
+        data_collection_system.SPLIT_BATCH, data_collection_system.COMMIT_BATCH = saved
+
+
+def test_web_collection():
+    """Test concurrent web collection against a local HTTP server"""
+    print("\n🧪 Testing Web Collection...")
+    
+    import tempfile
+    import threading
+    import time
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from data_collection_system import SomaliDataCollector
+    from collection_filters import default_stages
+    from web_collector import WebFetcher
+    
+    page = ("<html><head><title>Wararka</title><script>var note = 'Tani ma aha qoraal la ururiyo.';</script></head>"
+            "<body><nav><a href='/'>Bogga hore</a></nav><p>Macallinka wuxuu baraa ardayda {n} xisaabta iyo taariikhda. "
+            "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn ee magaalada.</p></body></html>")
+    state = {'flaky': 0, 'active': 0, 'peak': 0}
+    lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+        
+        def do_GET(self):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            try:
+                time.sleep(0.02)
+                length = True
+                if self.path.startswith('/page'):
+                    status, content_type, body = 200, 'text/html; charset=utf-8', page.format(n=self.path[5:]).encode()
+                elif self.path == '/flaky':
+                    state['flaky'] += 1
+                    status, content_type, body = (503, 'text/plain', b'busy') if state['flaky'] == 1 else (
+                        200, 'text/plain; charset=utf-8', "Ganacsiga suuqa waa mid horumar leh oo dadka ka faa'iideystaan.".encode())
+                elif self.path == '/bogus':
+                    # An unknown charset is read as utf-8
+                    status, content_type, body = (200, 'text/plain; charset=bogus-cs',
+                                                  "Beeraleyda waxay sugayaan roobka dayrta ee soo socda.".encode())
+                elif self.path == '/big':
+                    status, content_type, body = 200, 'text/plain', b'x' * 5000
+                elif self.path == '/stream':
+                    # No Content-Length: the cap applies while reading
+                    status, content_type, body, length = 200, 'text/plain', b'Ardayda waxay tagaan iskuulka magaalada. ' * 100, False
+                else:
+                    status, content_type, body = 404, 'text/plain', b'not found'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                if length:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with lock:
+                    state['active'] -= 1
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'web.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.commit()
+            
+            collector = SomaliDataCollector(db_path, stages=default_stages(db_path, min_score=0))
+            urls = ([f"{base}/page{n}" for n in range(12)] +
+                    [f"{base}/flaky", f"{base}/bogus", f"{base}/big", f"{base}/stream", f"{base}/missing", "ftp://example.com/x"])
+            result = collector.collect_from_web_sources(
+                urls, fetcher=WebFetcher(per_host=3, retries=2, backoff=0.01, max_bytes=1000)
+            )
+            
+            texts = [text for text, in conn.execute("SELECT text FROM somali_sentences")]
+            source = conn.execute(
+                "SELECT source_type, total_collected, success_rate, last_scraped FROM data_sources WHERE source_name = '127.0.0.1'"
+            ).fetchone()
+            conn.close()
+            
+            print(f"   Pages fetched: {result['pages_fetched']}/{result['pages_requested']}, peak concurrency: {state['peak']}")
+            print(f"   Collected: {result['total_collected']}, failed: {sorted(result['failed_pages'].values())}")
+            
+            fetched = result['pages_fetched'] == 15 and state['flaky'] == 2 and state['peak'] <= 3
+            failed = sorted(result['failed_pages'].values()) == ['HTTP 404', 'Response of 5000 bytes exceeds 1000', 'Unsupported URL']
+            # 12 distinct teacher sentences, one shared doctor sentence, the retried, bogus charset and capped pages
+            extracted = (len(texts) == 16 and result['total_collected'] == 16 and
+                         not any('Bogga' in text or 'qoraal' in text for text in texts))
+            recorded = source is not None and source[0] == 'web' and source[1] == 16 and abs(source[2] - 15 / 17) < 1e-9 and source[3] is not None
+            return fetched and failed and extracted and recorded
+        
+    except Exception as e:
+        print(f"❌ Web collection error: {e}")
+        return False
+    finally:
+        server.shutdown()
+
+
+def test_crawl_frontier():
+    """Test conditional re-fetching and resuming through the crawl frontier"""
+    print("\n🧪 Testing Crawl Frontier...")
+    
+    import tempfile
+    import threading
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from data_collection_system import SomaliDataCollector
+    from collection_filters import default_stages
+    from web_collector import WebFetcher
+    
+    state = {'version': 1, 'conditional': 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+        
+        def do_GET(self):
+            if self.path == '/etag':
+                if self.headers.get('If-None-Match') == '"v1"':
+                    state['conditional'] += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dalka."
+            elif self.path == '/static':
+                # No validators, and markup that changes on every request
+                body = f"<p>Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn ee magaalada.</p><script>{id(self)}</script>"
+            elif self.path == '/news':
+                body = f"<p>Warka {state['version']}: ganacsiga suuqa waa mid horumar leh oo cusub.</p>"
+            else:
+                body = f"<p>Bogga {self.path[1:]} wuxuu ka warramayaa waxbarashada carruurta dalka.</p>"
+            data = body.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            if self.path == '/etag':
+                self.send_header('ETag', '"v1"')
+            self.end_headers()
+            self.wfile.write(data)
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'crawl.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.commit()
+            
+            collector = SomaliDataCollector(db_path, stages=default_stages(db_path, min_score=0))
+            fetcher = WebFetcher(backoff=0.01)
+            urls = [f"{base}/etag", f"{base}/static", f"{base}/news"]
+            first = collector.collect_from_web_sources(urls, fetcher=fetcher)
+            state['version'] = 2
+            second = collector.collect_from_web_sources(urls, fetcher=fetcher)
+            
+            print(f"   First: {first['total_collected']} collected; second: {second['pages_not_modified']} not modified, "
+                  f"{second['pages_unchanged']} unchanged, {second['total_collected']} collected")
+            conditional = (first['total_collected'] == 3 and state['conditional'] == 1 and
+                           second['pages_not_modified'] == 1 and second['pages_unchanged'] == 1 and
+                           second['filter_stages']['length']['received'] == 1 and second['total_collected'] == 1)
+            
+            # Nothing is due until the revisit interval passes
+            nothing_due = collector.crawl_due_sources(fetcher=fetcher)['pages_requested'] == 0
+            
+            # An interrupted crawl resumes with the pages it had not recorded
+            collector.frontier.add({f"{base}/page{n}": 1 for n in range(6)})
+            partial = collector.crawl_due_sources(limit=4, fetcher=fetcher)
+            rest = collector.crawl_due_sources(fetcher=fetcher)
+            resumed = partial['pages_fetched'] == 4 and rest['pages_fetched'] == 2
+            
+            stats = collector.frontier.stats()
+            print(f"   Resumed: {partial['pages_fetched']} then {rest['pages_fetched']}, frontier: {stats}")
+            conn.close()
+            return conditional and nothing_due and resumed and stats['urls'] == 9 and stats['due'] == 0
+        
+    except Exception as e:
+        print(f"❌ Crawl frontier error: {e}")
+        return False
+    finally:
+        server.shutdown()
+
+
+def test_html_extraction():
+    """Test streaming main-content extraction from HTML"""
+    print("\n🧪 Testing HTML Extraction...")
+    
+    import tempfile
+    from html_extractor import HTMLTextExtractor, benchmark, write_fixture_corpus
+    
+    page = ("<!DOCTYPE html><HTML><head><title>Wararka</title><style>p > a { color: red }</style>"
+            "<script>if (a < b) { document.write('<p>Qoraal aan la rabin oo dheer</p>'); }</script></head>"
+            "<body><header><h1>Wararka Maanta oo dhan</h1></header>"
+            "<nav><ul><li><a href='/'>Bogga hore</a></li><li><a href='/ciyaaraha'>Ciyaaraha</a></li></ul></nav>"
+            "<div class=\"top-menu\"><div><a href='/a'>Qaybta koowaad ee wararka</a> iyo waxyaabo kale</div></div>"
+            "<article><h2>Hal xariiq</h2>"
+            "<P>Macallinka wuxuu baraa ardayda <b>xisaabta</b> iyo taariikhda dugsiga.\n   Ardaydu way dhageystaan."
+            "<p data-note='a > b'>Dhakhtarka ayaa daaweeyay bukaanka &amp; qoyskiisa isbitaalka weyn.</p>"
+            "<!-- <p>Faallo la qariyay oo aan muuqan</p> -->"
+            "<p>Akhri: <a href='/1'>Warbixinta doorashada gobolka</a> <a href='/2'>Miisaaniyadda cusub</a></p>"
+            "<p>Beeraleyda waxay sugayaan roobka dayrta ee soo socda<br>Xoolaleyduna sidoo kale way sugayaan roobka.</p>"
+            "</article><aside><p>Kuwa ugu badan ee la akhriyay toddobaadkan oo dhan</p></aside>"
+            "<footer><p>Dhammaan xuquuqda way dhowran yihiin, fadlan ha koobiyeyn.</p></footer></body></HTML>")
+    expected = [
+        "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dugsiga. Ardaydu way dhageystaan.",
+        "Dhakhtarka ayaa daaweeyay bukaanka & qoyskiisa isbitaalka weyn.",
+        "Beeraleyda waxay sugayaan roobka dayrta ee soo socda",
+        "Xoolaleyduna sidoo kale way sugayaan roobka."
+    ]
+    
+    try:
+        outputs = []
+        for size in (1, 5, 64, len(page)):
+            extractor = HTMLTextExtractor()
+            paragraphs = []
+            for start in range(0, len(page), size):
+                paragraphs.extend(extractor.feed(page[start:start + size]))
+            paragraphs.extend(extractor.close())
+            outputs.append(paragraphs)
+    
+        print(f"   Paragraphs: {outputs[-1]}")
+        print(f"   Stats: {extractor.stats}")
+        extracted = all(paragraphs == expected for paragraphs in outputs)
+        counted = extractor.stats['link_blocks'] == 1 and extractor.stats['skipped_elements'] == 6
+    
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report = benchmark(write_fixture_corpus(tmp_dir, pages=2, page_size=200 * 1024), chunk_size=4096)
+        print(f"   Fixture corpus: {report['bytes']} bytes at {report['mb_per_s']} MB/s, {report['paragraphs']} paragraphs")
+        benchmarked = report['paragraphs'] > 0 and report['link_blocks'] > 0 and report['skipped_elements'] > 0
+    
+        return extracted and counted and benchmarked
+    
+    except Exception as e:
+        print(f"❌ HTML extraction error: {e}")
+        return False
+
+
+def test_sentence_writer():
+    """Test batched sentence writes, duplicate counts and source ids"""
+    print("\n🧪 Testing Sentence Writer...")
+    
+    import tempfile
+    from data_collection_system import SomaliDataCollector
+    from collection_filters import default_stages
+    from sentence_writer import SentenceWriter
+    from token_index import TokenIndex
+    
+    stored = "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dalka"
+    rows = [
+        {'text': "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn", 'source': 'news', 'quality_score': 81, 'metadata': {'n': 1}},
+        {'text': stored, 'source': 'news', 'quality_score': 75},
+        {'text': "Ganacsiga suuqa waa mid horumar leh oo cusub", 'source': 'radio', 'quality_score': 72},
+        {'text': "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn", 'source': 'radio', 'quality_score': 81},
+        {'text': '', 'source': 'radio'},
+        {'text': "Beeraleyda waxay sugayaan roobka dayrta ee soo socda", 'source': 'radio', 'quality_score': 90},
+        {'text': "Ardayda waxay tagaan iskuulka magaalada subax kasta", 'source': 'news', 'quality_score': 77},
+        {'text': "Xoolaleyda ayaa u guuray deegaanka biyaha leh", 'source': 'farm', 'quality_score': 70}
+    ]
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'writer.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.execute("INSERT INTO somali_sentences (text) VALUES (?)", (stored,))
+            conn.commit()
+            collector = SomaliDataCollector(db_path, stages=default_stages(db_path, min_score=0))
+    
+            inserted = []
+            totals = SentenceWriter(db_path, batch_size=3, raw_data=True).write(rows, inserted.extend)
+            sources = dict(conn.execute("SELECT source_name, id FROM data_sources"))
+            logged = conn.execute(
+                "SELECT COUNT(*) FROM raw_data r JOIN data_sources s ON s.id = r.source_id"
+            ).fetchone()[0]
+            metadata = conn.execute("SELECT metadata FROM somali_sentences WHERE source = 'news' AND quality_score = 81").fetchone()[0]
+            print(f"   Totals: {totals}, sources: {sorted(sources)}, raw rows with a source: {logged}")
+            counted = (totals == {'written': 5, 'duplicates': 2, 'skipped': 1, 'batches': 3} and
+                       inserted == [rows[0], rows[2], rows[5], rows[6], rows[7]])
+            resolved = sorted(sources) == ['farm', 'news', 'radio'] and logged == 7 and json.loads(metadata) == {'n': 1}
+    
+            # A failing batch is rolled back whole; earlier batches stay
+            bad = [{'text': f"Jumlad cusub oo tijaabo ah lambar {n}", 'source': 'radio', 'dialect': [n] if n == 3 else None}
+                   for n in range(5)]
+            try:
+                SentenceWriter(db_path, batch_size=3, raw_data=True).write(bad)
+                rolled_back = False
+            except sqlite3.Error:
+                rolled_back = (conn.execute("SELECT COUNT(*) FROM somali_sentences WHERE text LIKE 'Jumlad%'").fetchone()[0] == 3 and
+                               conn.execute("SELECT COUNT(*) FROM raw_data WHERE raw_text LIKE 'Jumlad%'").fetchone()[0] == 3)
+    
+            # Collected sentences are logged under their own source
+            result = collector.collect_from_text_sources(
+                ["Kalluumeysatada ayaa badda u baxay subaxnimadii hore ee maanta."], source='coast'
+            )
+            coast = conn.execute(
+                "SELECT COUNT(*) FROM raw_data r JOIN data_sources s ON s.id = r.source_id WHERE s.source_name = 'coast'"
+            ).fetchone()[0]
+    
+            # Rows the token index triggers log are not counted as writes
+            TokenIndex(db_path).sync()
+            indexed = SentenceWriter(db_path).write([
+                {'text': "Hooyada ayaa cunto u karisay carruurteeda yaryar"},
+                {'text': stored},
+                {'text': "Dalxiisayaasha ayaa booqday xeebta Berbera"}
+            ])
+            conn.close()
+            print(f"   Rolled back: {rolled_back}, collected under 'coast': {coast}, with token index: {indexed}")
+            triggered = indexed['written'] == 2 and indexed['duplicates'] == 1
+    
+            return counted and resolved and rolled_back and result['total_collected'] == 1 and coast == 1 and triggered
+    
+    except Exception as e:
+        print(f"❌ Sentence writer error: {e}")
+        return False
+
+def test_job_queue():
+    """Test background jobs: progress, results, cancellation and recovery after a restart"""
+    print("\n🧪 Testing Job Queue...")
+    
+    import tempfile
+    import time
+    import main
+    from data_collection_system import SomaliDataCollector
+    from collection_filters import default_stages
+    from job_queue import JobQueue
+    
+    def count(params, progress):
+        for step in range(params['steps']):
+            progress(step, params['steps'])
+            time.sleep(0.01)
+        progress(params['steps'], params['steps'])
+        return {'counted': params['steps']}
+    
+    def fail(params, progress):
+        raise ValueError("bad input")
+    
+    def new_queue(db_path):
+        queue = JobQueue(db_path, workers=2, heartbeat_s=0.05, lease_s=1, poll_s=0.05)
+        queue.register('count', count)
+        queue.register('fail', fail)
+        return queue
+    
+    def wait_for(queue, job_id, statuses, timeout=15.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = queue.get(job_id)
+            if job['status'] in statuses:
+                return job
+            time.sleep(0.02)
+        return queue.get(job_id)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'jobs.db')
+    
+            # Jobs queued before a restart, and one whose worker died mid-run
+            queue = new_queue(db_path)
+            done = queue.submit('count', {'steps': 5}, user_id=7)
+            lost = queue.submit('count', {'steps': 3})
+            failing = queue.submit('fail', {})
+            conn = sqlite3.connect(db_path)
+            conn.execute("UPDATE jobs SET status = 'running', attempts = 1, worker = 'gone', "
+                         "heartbeat_at = datetime('now', '-1 hour') WHERE id = ?", (lost['id'],))
+            conn.commit()
+            conn.close()
+    
+            queue = new_queue(db_path)
+            queue.start()
+            finished = [wait_for(queue, job['id'], ('succeeded', 'failed')) for job in (done, lost, failing)]
+            result = queue.get(done['id'], include_result=True)
+            print(f"   After restart: {[job['status'] for job in finished]}, lost job attempts: {finished[1]['attempts']}")
+            recovered = ([job['status'] for job in finished] == ['succeeded', 'succeeded', 'failed'] and
+                         finished[1]['attempts'] == 2 and result['result'] == {'counted': 5} and
+                         result['progress']['percent'] == 100.0 and finished[2]['error'] == 'ValueError: bad input' and
+                         [job['id'] for job in queue.recent(user_id=7)] == [done['id']])
+    
+            # A running job stops at its next progress report
+            long_job = queue.submit('count', {'steps': 2000})
+            wait_for(queue, long_job['id'], ('running',))
+            time.sleep(0.2)
+            queue.cancel(long_job['id'])
+            cancelled = wait_for(queue, long_job['id'], ('cancelled',))
+            print(f"   Cancelled at {cancelled['progress']}")
+            stopped = cancelled['status'] == 'cancelled' and 0 < cancelled['progress']['done'] < 2000
+    
+            # Stopping the queue puts a running job back in line
+            requeued = queue.submit('count', {'steps': 2000})
+            wait_for(queue, requeued['id'], ('running',))
+            queue.stop()
+            requeued = queue.get(requeued['id'])
+            queued = queue.submit('count', {'steps': 1})
+            queued = queue.cancel(queued['id'])
+            stats = queue.stats()
+            print(f"   After stop: {requeued['status']}, queued job cancelled: {queued['status']}, stats: {stats['by_status']}")
+    
+            # A collection job stores its sentences under the submitted source name
+            collect_db = os.path.join(tmp_dir, 'collect.db')
+            conn = sqlite3.connect(collect_db)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.commit()
+            conn.close()
+            data_collector = main.data_collector
+            main.data_collector = SomaliDataCollector(collect_db, stages=default_stages(collect_db, min_score=0))
+            try:
+                collect_queue = JobQueue(os.path.join(tmp_dir, 'collect_jobs.db'), workers=1, poll_s=0.05)
+                collect_queue.register('collect', main.run_collect_job)
+                collect_queue.start()
+                collect_job = collect_queue.submit('collect', {
+                    'texts': ["Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dalka."], 'source_name': 'radio_muqdisho'
+                })
+                collect_job = wait_for(collect_queue, collect_job['id'], ('succeeded', 'failed'))
+                collect_queue.stop()
+            finally:
+                main.data_collector = data_collector
+            conn = sqlite3.connect(collect_db)
+            sources = [source for source, in conn.execute("SELECT source FROM somali_sentences")]
+            conn.close()
+            print(f"   Collection job: {collect_job['status']}, stored sources: {sources}")
+            sourced = collect_job['status'] == 'succeeded' and sources == ['radio_muqdisho']
+    
+            return (recovered and stopped and requeued['status'] == 'queued' and queued['status'] == 'cancelled' and
+                    stats['by_status'] == {'queued': 1, 'running': 0, 'succeeded': 2, 'failed': 1, 'cancelled': 2} and
+                    sourced)
+    
+    except Exception as e:
+        print(f"❌ Job queue error: {e}")
+        return False
+
+def test_validation_queue():
+    """Test leased validation queue batches, expired lease reclaiming and parallel workers"""
+    print("\n🧪 Testing Validation Queue...")
+    
+    import tempfile
+    from data_collection_system import SomaliDataCollector
+    from validation_queue import ValidationQueue, ValidationWorker, run_workers
+    
+    texts = [
+        "Macallinka wuxuu baraa ardayda xisaabta iyo taariikhda dalka",
+        "Dhakhtarka ayaa daaweeyay bukaanka isbitaalka weyn ee magaalada",
+        "The weather is very nice today and we are going to the park",
+        "Haa waan",
+        "Ganacsiga suuqa waa mid horumar leh oo cusub sanadkan",
+        "Beeraleyda waxay sugayaan roobka dayrta ee soo socda"
+    ]
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'queue.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN, metadata TEXT
+                )
+            ''')
+            conn.commit()
+            SomaliDataCollector(db_path)
+            conn.execute("INSERT INTO raw_data (raw_text) VALUES (?)", ("Xoolaleyda ayaa u guuray deegaanka biyaha leh",))
+            conn.commit()
+    
+            queue = ValidationQueue(db_path)
+            queued = queue.enqueue(texts) + queue.enqueue_raw_data()
+    
+            # Two workers never hold the same row
+            first = queue.claim('worker-a', 3)
+            second = queue.claim('worker-b', 3)
+            held = {row.id for row in first.rows} | {row.id for row in second.rows}
+            exclusive = len(held) == 6 and queue.stats()['active_workers'] == 2
+    
+            # worker-a dies: its lease expires and the rows are processed again
+            conn.execute("UPDATE validation_queue SET lease_expires_at = '2000-01-01 00:00:00.000' WHERE lease_id = ?",
+                         (first.id,))
+            conn.commit()
+            worker = ValidationWorker(queue, 'worker-c', batch_size=2, min_score=0)
+            totals = worker.drain()
+            late = queue.complete(first, {row.id: {'status': 'rejected', 'notes': {}} for row in first.rows})
+            queue.release(second, 'stopped')
+            totals_after = worker.drain()
+    
+            stats = queue.stats()
+            rows = conn.execute("SELECT validation_status, validation_notes, attempts FROM validation_queue").fetchall()
+            reasons = sorted(json.loads(notes).get('reason', 'valid') for _, notes, _ in rows)
+            raw_processed = conn.execute("SELECT is_processed FROM raw_data").fetchone()[0]
+            sentences = conn.execute("SELECT COUNT(*) FROM somali_sentences WHERE source = 'validation_queue'").fetchone()[0]
+            print(f"   Queued: {queued}, drained: {totals['recorded']} + {totals_after['recorded']}, late completion: {late}")
+            print(f"   Reasons: {reasons}, stats: {stats['by_status']}")
+            drained = (queued == 7 and late == 0 and totals['recorded'] + totals_after['recorded'] == 7 and
+                       stats['depth'] == 0 and stats['throughput_per_s'] > 0 and raw_processed == 1 and
+                       reasons == ['language', 'length', 'valid', 'valid', 'valid', 'valid', 'valid'] and
+                       sentences == stats['by_status']['validated'] == 5 and
+                       max(attempts for _, _, attempts in rows) == 2)
+    
+            # Worker processes share one queue without double-processing
+            queue.enqueue([f"{text} {n}" for n in range(10) for text in texts])
+            parallel = run_workers(db_path, processes=2, batch_size=5, min_score=0)
+            attempts = conn.execute("SELECT MAX(attempts) FROM validation_queue WHERE id > 7").fetchone()[0]
+            written = conn.execute("SELECT COUNT(*) FROM somali_sentences").fetchone()[0]
+            conn.close()
+            print(f"   Parallel: {[w['recorded'] for w in parallel['workers']]} rows at {parallel['rows_per_s']} rows/s")
+            shared = (parallel['recorded'] == 60 and attempts == 1 and queue.stats()['depth'] == 0 and
+                      written == sentences + sum(w['sentences_written'] for w in parallel['workers']))
+    
+            return exclusive and drained and shared
+    
+    except Exception as e:
+        print(f"❌ Validation queue error: {e}")
+        return False
+
+def test_scholar_review():
+    """Test review sessions: priority batches, reservations, prefetching and batched verdicts"""
+    print("\n🧪 Testing Scholar Review...")
+    
+    import tempfile
+    from scholar_review import ScholarReview
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'review.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                CREATE TABLE somali_sentences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT UNIQUE NOT NULL, translation TEXT, dialect TEXT,
+                    quality_score REAL, source TEXT, validated BOOLEAN DEFAULT FALSE,
+                    scholar_approved BOOLEAN DEFAULT FALSE, metadata TEXT
+                )
+            ''')
+            # Scores 40..99; one sentence was approved through the old endpoint
+            conn.executemany("INSERT INTO somali_sentences (text, quality_score) VALUES (?, ?)",
+                             [(f"Jumlad tijaabo ah {n}", 40 + n) for n in range(60)])
+            conn.execute("UPDATE somali_sentences SET scholar_approved = 1 WHERE quality_score = 70")
+            conn.commit()
+    
+            # The second scholar is served by another API process, without prefetching
+            review = ScholarReview(db_path)
+            elsewhere = ScholarReview(db_path, prefetch=False)
+            first = review.start_session('first@scholar.so', user_id=1, batch_size=4)
+            second = elsewhere.start_session('second@scholar.so', user_id=2, batch_size=4)
+            batch = review.next_batch(first['id'])
+            other = elsewhere.next_batch(second['id'])
+            scores = [sentence['quality_score'] for sentence in batch['sentences']]
+            priorities = [sentence['priority'] for sentence in batch['sentences']]
+            print(f"   First batch scores: {scores}, prefetched: {batch['prefetched']}")
+            ordered = (batch['prefetched'] and not other['prefetched'] and len(scores) == 4 and 70 not in scores and
+                       priorities == sorted(priorities, reverse=True) and
+                       min(priorities) >= max(sentence['priority'] for sentence in other['sentences']) and
+                       not {s['id'] for s in batch['sentences']} & {s['id'] for s in other['sentences']})
+    
+            # One transaction records verdicts; other sessions' sentences are skipped
+            verdicts = [{'sentence_id': s['id'], 'approved': s['quality_score'] >= 72, 'cultural_score': 90}
+                        for s in batch['sentences']]
+            verdicts += [{'sentence_id': other['sentences'][0]['id'], 'approved': True},
+                         {'sentence_id': 10 ** 6, 'approved': True}]
+            result = review.submit(first['id'], verdicts)
+            stored = conn.execute("SELECT COUNT(*), SUM(approved), MIN(scholar_email) FROM scholar_validations").fetchone()
+            marked = conn.execute("SELECT COUNT(*) FROM somali_sentences WHERE validated = 1").fetchone()[0]
+            print(f"   Submit: {result}, stored: {stored}")
+            recorded = (result['recorded'] == 4 and result['not_found'] == [10 ** 6] and
+                        result['reserved_by_other_session'] == [other['sentences'][0]['id']] and
+                        stored == (4, sum(v['approved'] for v in verdicts[:4]), 'first@scholar.so') and marked == 4)
+    
+            # Expired reservations go back to the pool; ending a session releases the rest
+            conn.execute("UPDATE review_reservations SET expires_at = '2000-01-01 00:00:00' WHERE session_id = ?",
+                         (second['id'],))
+            conn.commit()
+            # The batch after an already prefetched one
+            later = review.next_batch(first['id'])['sentences'] + review.next_batch(first['id'])['sentences']
+            reclaimed = other['sentences'][0]['id'] in [s['id'] for s in later]
+            ended = review.end_session(first['id'])
+            stats = review.stats()
+            conn.close()
+            print(f"   Reclaimed: {reclaimed}, released on end: {ended['released']}, stats: {stats}")
+    
+            return (ordered and recorded and reclaimed and ended['released'] == 12 and
+                    stats['unreviewed'] == 55 and stats['reserved'] == 0 and stats['reviewed_24h'] == 4)
+    
+    except Exception as e:
+        print(f"❌ Scholar review error: {e}")
+        return False
+
+def test_template_engine():
+    """Test mixed-radix template indexing and weighted sampling without replacement"""
+    print("\n🧪 Testing Template Engine...")
+    
+    import itertools
+    import random
+    from template_engine import SAMPLE_VARIATIONS, Template, TemplateSpace
+    from data_collection_system import SAMPLE_TEMPLATES, SAMPLE_WORD_BANKS
+    
+    banks = {'city': ['Muqdisho', 'Hargeysa', 'Burco'], 'group': ['caruurta', 'haweenka']}
+    
+    try:
+        # Every index renders a different sentence, and together they are the full product
+        template = Template("{city} iyo {group}: {city}", banks, SAMPLE_VARIATIONS)
+        rendered = [template.render(index) for index in range(template.size)]
+        expected = set()
+        for city, group, opener, closer in itertools.product(banks['city'], banks['group'], *SAMPLE_VARIATIONS):
+            expected.add(closer(opener(f"{city} iyo {group}: {city}")))
+        indexed = template.size == 24 and set(rendered) == expected and len(set(rendered)) == 24
+    
+        try:
+            Template("Magaalada {town}", banks)
+            checked = False
+        except ValueError:
+            checked = True
+    
+        # Sampling never repeats and stops when the space is used up
+        space = TemplateSpace.from_banks(SAMPLE_TEMPLATES, SAMPLE_WORD_BANKS, SAMPLE_VARIATIONS)
+        drawn = [sentence for _, sentence in space.sample(space.size + 100, random.Random(3))]
+        again = [sentence for _, sentence in space.sample(50, random.Random(3))]
+        exhaustive = len(drawn) == len(set(drawn)) == space.size and again == drawn[:50]
+        print(f"   Space: {space.report()}, drawn: {len(drawn)} unique")
+    
+        # Templates are drawn in proportion to their weights
+        weighted = TemplateSpace([Template("{city} {group} {n}", {**banks, 'n': [str(n) for n in range(100)]}, weight=3.0),
+                                  Template("{group} {city} {n}", {**banks, 'n': [str(n) for n in range(100)]}, weight=1.0),
+                                  Template("{city} {n}", {**banks, 'n': [str(n) for n in range(100)]}, weight=0)])
+        picks = [sample_template.weight for sample_template, _ in weighted.sample(400, random.Random(5))]
+        ratio = picks.count(3.0) / max(picks.count(1.0), 1)
+        print(f"   Weight 3:1 draws: {picks.count(3.0)}:{picks.count(1.0)}, weight 0: {picks.count(0)}")
+        proportional = 2.0 < ratio < 4.5 and picks.count(0) == 0
+    
+        return indexed and checked and exhaustive and proportional
+    
+    except Exception as e:
+        print(f"❌ Template engine error: {e}")
+        return False
+
+def test_sharded_generation():
+    """Test seeded shards give the same sentences for any process count"""
+    print("\n🧪 Testing Sharded Generation...")
+    
+    import template_engine
+    from template_engine import SAMPLE_VARIATIONS, TemplateSpace, sample_sharded, shard_quotas
+    from data_collection_system import SAMPLE_TEMPLATES, SAMPLE_WORD_BANKS
+    
+    space = TemplateSpace.from_banks(SAMPLE_TEMPLATES, SAMPLE_WORD_BANKS, SAMPLE_VARIATIONS)
+    parallel_min_count = template_engine.PARALLEL_MIN_COUNT
+    
+    try:
+        # Full shards pass their share on, and the shards partition the space
+        quotas = shard_quotas([5, 1, 0, 9], 12)
+        split = quotas == [5, 1, 0, 6] and sum(space.shard_size(k, 16) for k in range(16)) == space.size
+    
+        # Force the process pool even for a small count
+        template_engine.PARALLEL_MIN_COUNT = 0
+        inline = [sentence for _, sentence in sample_sharded(space, 300, seed=11, processes=1)]
+        pooled = [sentence for _, sentence in sample_sharded(space, 300, seed=11, processes=3)]
+        other = [sentence for _, sentence in sample_sharded(space, 300, seed=12, processes=1)]
+        print(f"   Seed 11: {len(inline)} sentences, identical with 3 processes: {inline == pooled}")
+        reproducible = len(inline) == len(set(inline)) == 300 and inline == pooled and inline != other
+    
+        # Asking for more than the space yields all of it exactly once
+        everything = [sentence for _, sentence in sample_sharded(space, space.size + 50, seed=11)]
+        exhaustive = len(everything) == len(set(everything)) == space.size
+    
+        return split and reproducible and exhaustive
+    
+    except Exception as e:
+        print(f"❌ Sharded generation error: {e}")
+        return False
+    finally:
+        template_engine.PARALLEL_MIN_COUNT = parallel_min_count
+
 def test_data_collection():
     """Test data collection system"""
     print("\n🧪 Testing Data Collection System...")
@@ -108,6 +1584,7 @@ def test_data_collection():
         
         print(f"✅ Collection Results:")
         print(f"   Total collected: {result['total_collected']}")
+        print(f"   Rejected as non-Somali: {result['rejected_non_somali']}")
         print(f"   High quality: {result['high_quality_count']}")
         print(f"   Average quality: {result['average_quality']:.1f}%")
         
@@ -218,6 +1695,31 @@ def run_full_test_suite():
     
     tests = [
         ("NLP Engine", test_nlp_engine),
+        ("Field Projection", test_field_projection),
+        ("Scoring Fast Path", test_scoring_fast_path),
+        ("Lexicon Hot Reload", test_lexicon_hot_reload),
+        ("Document Streaming", test_document_streaming),
+        ("Dialect Model", test_dialect_model),
+        ("Language ID", test_language_id),
+        ("Scoring Pipeline", test_scoring_pipeline),
+        ("Engine Metrics", test_engine_metrics),
+        ("Analysis Cache", test_analysis_cache),
+        ("Selective Re-scoring", test_selective_rescoring),
+        ("Token Index", test_token_index),
+        ("Vocabulary Statistics", test_vocabulary_stats),
+        ("Word Formation", test_word_formation),
+        ("Feature Store", test_feature_store),
+        ("Collection Cascade", test_collection_cascade),
+        ("Streaming Collection", test_streaming_collection),
+        ("Web Collection", test_web_collection),
+        ("Crawl Frontier", test_crawl_frontier),
+        ("HTML Extraction", test_html_extraction),
+        ("Sentence Writer", test_sentence_writer),
+        ("Job Queue", test_job_queue),
+        ("Validation Queue", test_validation_queue),
+        ("Scholar Review", test_scholar_review),
+        ("Template Engine", test_template_engine),
+        ("Sharded Generation", test_sharded_generation),
         ("Data Collection", test_data_collection),
         ("Database Integration", test_database_integration),
         ("Enterprise API Simulation", test_enterprise_api_simulation)
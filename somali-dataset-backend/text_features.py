@@ -0,0 +1,71 @@
+"""
+Shared Text Features
+One lazily computed tokenization of a text, shared by every scoring stage
+"""
+
+import re
+from typing import List, Optional, Set
+
+from lexicon_bundle import CompiledLexicon
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+WORD_PUNCTUATION = '.,!?;:'
+
+
+class TextFeatures:
+    """Tokens, sentence lengths and lexicon matches of one text
+
+    Every attribute is computed on first access and then reused, so stages
+    that run on the same text never split or scan it twice.
+    """
+
+    __slots__ = ('text', 'lex', '_lower', '_words', '_normalized_words', '_sentence_lengths', '_found')
+
+    def __init__(self, text: str, lex: CompiledLexicon, found: Optional[Set[str]] = None):
+        self.text = text
+        self.lex = lex
+        self._lower = None
+        self._words = None
+        self._normalized_words = None
+        self._sentence_lengths = None
+        self._found = found
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def words(self) -> List[str]:
+        """Whitespace tokens as written"""
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+    @property
+    def normalized_words(self) -> List[str]:
+        """Lowercased tokens without surrounding punctuation"""
+        if self._normalized_words is None:
+            self._normalized_words = [word.strip(WORD_PUNCTUATION) for word in self.lower.split()]
+        return self._normalized_words
+
+    @property
+    def sentence_lengths(self) -> List[int]:
+        """Word count of every non-empty sentence"""
+        if self._sentence_lengths is None:
+            self._sentence_lengths = [
+                len(sentence.split()) for sentence in SENTENCE_SPLIT.split(self.text) if sentence.strip()
+            ]
+        return self._sentence_lengths
+
+    @property
+    def found(self) -> Set[str]:
+        """Lexicon terms occurring in the text"""
+        if self._found is None:
+            self._found = self.lex.scan(self.lower)
+        return self._found
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
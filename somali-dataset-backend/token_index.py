@@ -0,0 +1,543 @@
+"""
+Token Inverted Index
+Compressed token -> sentence id posting lists over somali_sentences, kept up
+to date by triggers, with AND / OR / NOT search
+"""
+
+import re
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from lexicon_bundle import CompiledLexicon
+from text_features import WORD_PUNCTUATION
+from vocabulary_stats import VocabularyCounts, scopes_for
+
+logger = logging.getLogger(__name__)
+
+# Ids per stored block; a block is split once it holds twice as many
+BLOCK_IDS = 1024
+
+# Sentences read per query while building and change rows applied per transaction
+BUILD_BATCH = 5000
+CHANGE_BATCH = 5000
+
+# Below this many ids (or bytes) plain Python beats the NumPy call overhead
+VECTORIZE_MIN = 64
+
+TRIGGERS = ('token_index_insert', 'token_index_delete', 'token_index_update')
+
+EMPTY = np.empty(0, dtype=np.int64)
+
+
+class QueryError(ValueError):
+    """Malformed search query or unknown category"""
+
+
+def index_terms(text: str) -> Set[str]:
+    """Distinct lowercased tokens without surrounding punctuation"""
+    terms = {word.strip(WORD_PUNCTUATION) for word in text.lower().split()}
+    terms.discard('')
+    return terms
+
+
+def encode_postings(ids: Sequence[int]) -> bytes:
+    """Delta + LEB128 varint encoding of sorted ids; the first delta is from 0"""
+
+    if len(ids) < VECTORIZE_MIN:
+        out = bytearray()
+        previous = 0
+        for sentence_id in ids:
+            delta = sentence_id - previous
+            previous = sentence_id
+            while delta >= 0x80:
+                out.append((delta & 0x7f) | 0x80)
+                delta >>= 7
+            out.append(delta)
+        return bytes(out)
+
+    deltas = np.diff(np.asarray(ids, dtype=np.uint64), prepend=np.uint64(0))
+    if not deltas.size:
+        return b''
+
+    # Bytes per value: one per started group of 7 bits
+    lengths = np.ones(deltas.size, dtype=np.int64)
+    for shift in range(7, 64, 7):
+        lengths += deltas >= (np.uint64(1) << np.uint64(shift))
+    offsets = np.cumsum(lengths) - lengths
+
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for position in range(int(lengths.max())):
+        rows = lengths > position
+        group = (deltas[rows] >> np.uint64(7 * position)) & np.uint64(0x7f)
+        more = (lengths[rows] > position + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[rows] + position] = (group | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def decode_deltas(data: bytes) -> np.ndarray:
+    """Varint values of one or more concatenated encodings"""
+
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not raw.size:
+        return EMPTY
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = (np.arange(raw.size) - np.repeat(starts, ends - starts + 1)) * 7
+    values = (raw & 0x7f).astype(np.int64) << shifts
+    return np.add.reduceat(values, starts)
+
+
+def decode_postings(data: bytes) -> np.ndarray:
+    return np.cumsum(decode_deltas(data))
+
+
+def decode_postings_list(data: bytes) -> List[int]:
+    """Python list form, cheaper than the array form for small blocks"""
+
+    if len(data) >= VECTORIZE_MIN:
+        return decode_postings(data).tolist()
+    ids = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            previous += value
+            ids.append(previous)
+            value = shift = 0
+    return ids
+
+
+class TokenIndex:
+    """Posting lists of sentence ids by token, stored in SQLite
+
+    Each token's ids are kept in blocks of about BLOCK_IDS delta + varint
+    encoded ids, so a change rewrites one small blob. Triggers on
+    somali_sentences log every insert, delete and edit of text, dialect or
+    source to token_index_changes, which sync() folds into the affected
+    blocks and the vocabulary counts in one transaction; no writer has to
+    know about the index. The first sync, or one after the triggers were
+    lost, rebuilds both from the table.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db'):
+        self.db_path = db_path
+        self.counts = VocabularyCounts()
+
+    def connect(self) -> sqlite3.Connection:
+        """Autocommit connection with the index tables in place"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_postings (
+                token TEXT NOT NULL,
+                first_id INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                id_count INTEGER NOT NULL,
+                postings BLOB NOT NULL,
+                PRIMARY KEY (token, first_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_index_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                sentence_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                text TEXT NOT NULL,
+                dialect TEXT,
+                source TEXT
+            )
+        ''')
+        self.counts.create_tables(conn)
+        return conn
+
+    @staticmethod
+    def _create_triggers(conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS token_index_insert AFTER INSERT ON somali_sentences
+            BEGIN
+                INSERT INTO token_index_changes (sentence_id, op, text, dialect, source)
+                VALUES (NEW.id, 'insert', NEW.text, NEW.dialect, NEW.source);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS token_index_delete AFTER DELETE ON somali_sentences
+            BEGIN
+                INSERT INTO token_index_changes (sentence_id, op, text, dialect, source)
+                VALUES (OLD.id, 'delete', OLD.text, OLD.dialect, OLD.source);
+            END
+        ''')
+        # Re-scoring rewrites dialects, so only actual changes are logged
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS token_index_update AFTER UPDATE OF text, dialect, source ON somali_sentences
+            WHEN OLD.text IS NOT NEW.text OR OLD.dialect IS NOT NEW.dialect OR OLD.source IS NOT NEW.source
+            BEGIN
+                INSERT INTO token_index_changes (sentence_id, op, text, dialect, source)
+                VALUES (OLD.id, 'delete', OLD.text, OLD.dialect, OLD.source);
+                INSERT INTO token_index_changes (sentence_id, op, text, dialect, source)
+                VALUES (NEW.id, 'insert', NEW.text, NEW.dialect, NEW.source);
+            END
+        ''')
+
+    @staticmethod
+    def _has_triggers(conn: sqlite3.Connection) -> bool:
+        count = conn.execute(
+            f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({','.join('?' * len(TRIGGERS))})",
+            TRIGGERS
+        ).fetchone()[0]
+        return count == len(TRIGGERS)
+
+    def sync(self) -> int:
+        """Apply logged sentence changes (building the index if needed); returns how many"""
+
+        conn = self.connect()
+        try:
+            if not self._has_triggers(conn):
+                return self._rebuild(conn)
+
+            applied = 0
+            while True:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    rows = conn.execute(
+                        'SELECT seq, sentence_id, op, text, dialect, source FROM token_index_changes ORDER BY seq LIMIT ?',
+                        (CHANGE_BATCH,)
+                    ).fetchall()
+                    if rows:
+                        self._apply_changes(conn, rows)
+                        conn.execute('DELETE FROM token_index_changes WHERE seq <= ?', (rows[-1][0],))
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                applied += len(rows)
+                if len(rows) < CHANGE_BATCH:
+                    break
+        finally:
+            conn.close()
+
+        if applied:
+            logger.info(f"Applied {applied} sentence changes to the token index")
+        return applied
+
+    def _rebuild(self, conn: sqlite3.Connection) -> int:
+        """Index the whole table; the triggers are created in the same transaction"""
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._create_triggers(conn)
+            conn.execute('DELETE FROM token_postings')
+            conn.execute('DELETE FROM token_index_changes')
+            self.counts.clear(conn)
+
+            # Ids arrive in ascending order, so full blocks are final once written
+            open_blocks: Dict[str, List[int]] = {}
+            deltas, totals = {}, {}
+            indexed = 0
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    'SELECT id, text, dialect, source FROM somali_sentences WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, BUILD_BATCH)
+                ).fetchall()
+                if not rows:
+                    break
+
+                full = []
+                for sentence_id, text, _, _ in rows:
+                    for term in index_terms(text):
+                        ids = open_blocks.setdefault(term, [])
+                        ids.append(sentence_id)
+                        if len(ids) == BLOCK_IDS:
+                            full.append((term, ids))
+                            del open_blocks[term]
+                self._write_blocks(conn, full)
+                self.counts.accumulate(((1, text, dialect, source) for _, text, dialect, source in rows),
+                                       deltas, totals)
+                last_id = rows[-1][0]
+                indexed += len(rows)
+
+            self._write_blocks(conn, open_blocks.items())
+            self.counts.write(conn, deltas, totals)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        logger.info(f"Built token index over {indexed} sentences")
+        return indexed
+
+    @staticmethod
+    def _write_blocks(conn: sqlite3.Connection, blocks: Iterable[Tuple[str, List[int]]]) -> None:
+        conn.executemany(
+            'INSERT INTO token_postings (token, first_id, last_id, id_count, postings) VALUES (?, ?, ?, ?, ?)',
+            [(term, ids[0], ids[-1], len(ids), encode_postings(ids)) for term, ids in blocks]
+        )
+
+    def _apply_changes(self, conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+        # The log alternates deletes and inserts per sentence, so a (token,
+        # sentence) pair was indexed before the batch if its first change is a
+        # delete and belongs there after if its last is an insert; pairs whose
+        # state is unchanged, such as tokens kept by an edit, are skipped
+        first_last: Dict[Tuple[str, int], List[str]] = {}
+        for _, sentence_id, op, text, _, _ in rows:
+            for term in index_terms(text):
+                ops = first_last.setdefault((term, sentence_id), [op, op])
+                ops[1] = op
+
+        states: Dict[str, Dict[int, bool]] = {}
+        for (term, sentence_id), (first, last) in first_last.items():
+            if (first == 'delete') != (last == 'insert'):
+                states.setdefault(term, {})[sentence_id] = last == 'insert'
+        for term, term_states in states.items():
+            self._update_token(conn, term, term_states)
+
+        self.counts.apply(conn, (
+            (1 if op == 'insert' else -1, text, dialect, source) for _, _, op, text, dialect, source in rows
+        ))
+
+    def _update_token(self, conn: sqlite3.Connection, term: str, states: Dict[int, bool]) -> None:
+        """Merge id additions and removals into the blocks whose ranges hold them"""
+
+        pending = sorted(states)
+        position = 0
+        while position < len(pending):
+            sentence_id = pending[position]
+            block = conn.execute(
+                'SELECT first_id, postings FROM token_postings WHERE token = ? AND first_id <= ? '
+                'ORDER BY first_id DESC LIMIT 1', (term, sentence_id)
+            ).fetchone() or conn.execute(
+                'SELECT first_id, postings FROM token_postings WHERE token = ? ORDER BY first_id LIMIT 1', (term,)
+            ).fetchone()
+
+            if block is None:
+                first_id, ids, upper = None, set(), None
+            else:
+                first_id, ids = block[0], set(decode_postings_list(block[1]))
+                upper = conn.execute(
+                    'SELECT MIN(first_id) FROM token_postings WHERE token = ? AND first_id > ?', (term, first_id)
+                ).fetchone()[0]
+
+            end = position
+            while end < len(pending) and (upper is None or pending[end] < upper):
+                end += 1
+            group = pending[position:end]
+            position = end
+
+            for sentence_id in group:
+                if states[sentence_id]:
+                    ids.add(sentence_id)
+                else:
+                    ids.discard(sentence_id)
+            ids = sorted(ids)
+
+            if first_id is not None:
+                conn.execute('DELETE FROM token_postings WHERE token = ? AND first_id = ?', (term, first_id))
+            if len(ids) > 2 * BLOCK_IDS:
+                chunks = [ids[start:start + BLOCK_IDS] for start in range(0, len(ids), BLOCK_IDS)]
+            else:
+                chunks = [ids] if ids else []
+            self._write_blocks(conn, [(term, chunk) for chunk in chunks])
+
+    def postings(self, conn: sqlite3.Connection, term: str) -> np.ndarray:
+        """Sorted ids of the sentences containing a token"""
+
+        rows = conn.execute(
+            'SELECT first_id, last_id, id_count, postings FROM token_postings WHERE token = ? ORDER BY first_id',
+            (term,)
+        ).fetchall()
+        if not rows:
+            return EMPTY
+        if len(rows) == 1:
+            return decode_postings(rows[0][3])
+
+        # Decode all blocks at once; each block's first delta is made relative
+        # to the previous block's last id so one cumulative sum restores them
+        deltas = decode_deltas(b''.join(row[3] for row in rows))
+        counts = np.array([row[2] for row in rows], dtype=np.int64)
+        block_starts = np.cumsum(counts)[:-1]
+        deltas[block_starts] = [rows[k][0] - rows[k - 1][1] for k in range(1, len(rows))]
+        return np.cumsum(deltas)
+
+    def vocabulary(self, conn: sqlite3.Connection) -> List[str]:
+        return [row[0] for row in conn.execute('SELECT DISTINCT token FROM token_postings')]
+
+    def union(self, conn: sqlite3.Connection, terms: Iterable[str]) -> np.ndarray:
+        lists = [self.postings(conn, term) for term in set(terms)]
+        return np.unique(np.concatenate(lists)) if lists else EMPTY
+
+    def all_ids(self, conn: sqlite3.Connection) -> np.ndarray:
+        return np.fromiter((row[0] for row in conn.execute('SELECT id FROM somali_sentences ORDER BY id')),
+                           dtype=np.int64)
+
+    def search(self, query: str, lexicon: Optional[CompiledLexicon] = None,
+               limit: int = 20, offset: int = 0) -> Tuple[int, List[int]]:
+        """
+        Evaluate a boolean query over the corpus
+
+        Args:
+            query: Words combined with AND, OR, NOT and parentheses (adjacent
+                words are ANDed); category:<name> matches any professional
+                word of that lexicon category
+            lexicon: Lexicon resolving categories
+            limit: Ids to return
+            offset: Matching ids to skip
+
+        Returns:
+            (number of matching sentences, ids of the requested page in id order)
+        """
+
+        tree = parse_query(query)
+        self.sync()
+
+        conn = self.connect()
+        try:
+            ids = _evaluate(tree, self, conn, lexicon)
+        finally:
+            conn.close()
+        return int(ids.size), ids[offset:offset + limit].tolist()
+
+
+    def top_words(self, k: int = 50, dialect: Optional[str] = None, source: Optional[str] = None,
+                  by: str = 'occurrences') -> Dict:
+        """Most frequent tokens of the corpus or of one dialect or source"""
+
+        if dialect and source:
+            raise ValueError("Filter by dialect or by source, not both")
+        scope = scopes_for(dialect, source)[-1]
+        self.sync()
+
+        conn = self.connect()
+        try:
+            totals = self.counts.totals(conn, scope)
+            words = self.counts.top(conn, k, scope, by)
+        finally:
+            conn.close()
+
+        return {
+            **totals,
+            "words": [
+                {
+                    "word": word,
+                    "occurrences": occurrences,
+                    "documents": documents,
+                    "document_frequency": round(documents / totals["sentences"], 4) if totals["sentences"] else 0.0
+                }
+                for word, occurrences, documents in words
+            ]
+        }
+
+    def document_frequencies(self, terms: Iterable[str]) -> Tuple[Dict[str, int], int]:
+        """(sentences containing each token, corpus size) for tf-idf style weighting"""
+
+        self.sync()
+        conn = self.connect()
+        try:
+            return self.counts.document_frequencies(conn, terms), self.counts.totals(conn)["sentences"]
+        finally:
+            conn.close()
+
+
+_QUERY_TOKEN = re.compile(r'\(|\)|[^\s()]+')
+_OPERATORS = ('AND', 'OR', 'NOT')
+
+
+def parse_query(query: str) -> Tuple:
+    """
+    Parse a search query into nested ('and' | 'or', [nodes]), ('not', node),
+    ('term', token) and ('category', name) tuples
+    """
+
+    tokens = _QUERY_TOKEN.findall(query)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or() -> Tuple:
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            take()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and() -> Tuple:
+        nodes = [parse_unary()]
+        while peek() is not None and peek() not in ('OR', ')'):
+            if peek() == 'AND':
+                take()
+            nodes.append(parse_unary())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_unary() -> Tuple:
+        token = peek()
+        if token is None:
+            raise QueryError("Query ends where a term was expected")
+        take()
+        if token == 'NOT':
+            return ('not', parse_unary())
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise QueryError("Missing closing parenthesis")
+            take()
+            return node
+        if token == ')' or token in _OPERATORS:
+            raise QueryError(f"Unexpected '{token}'")
+        if token.lower().startswith('category:'):
+            return ('category', token.split(':', 1)[1].lower())
+
+        term = token.lower().strip(WORD_PUNCTUATION)
+        if not term:
+            raise QueryError(f"'{token}' contains no searchable characters")
+        return ('term', term)
+
+    if not tokens:
+        raise QueryError("Empty query")
+    tree = parse_or()
+    if peek() is not None:
+        raise QueryError(f"Unexpected '{peek()}'")
+    return tree
+
+
+def _evaluate(node: Tuple, index: TokenIndex, conn: sqlite3.Connection,
+              lexicon: Optional[CompiledLexicon]) -> np.ndarray:
+    kind, value = node
+    if kind == 'term':
+        return index.postings(conn, value)
+
+    if kind == 'category':
+        words = lexicon.data['professional_words'].get(value) if lexicon is not None else None
+        if words is None:
+            raise QueryError(f"Unknown category '{value}'")
+        return index.union(conn, (word.lower() for word in words))
+
+    if kind == 'not':
+        return np.setdiff1d(index.all_ids(conn), _evaluate(value, index, conn, lexicon), assume_unique=True)
+
+    if kind == 'or':
+        return np.unique(np.concatenate([_evaluate(child, index, conn, lexicon) for child in value]))
+
+    # AND: intersect the positive operands smallest first, then subtract the negated ones
+    positives = [_evaluate(child, index, conn, lexicon) for child in value if child[0] != 'not']
+    negatives = [_evaluate(child[1], index, conn, lexicon) for child in value if child[0] == 'not']
+    if positives:
+        positives.sort(key=len)
+        ids = positives[0]
+        for other in positives[1:]:
+            if not ids.size:
+                break
+            ids = np.intersect1d(ids, other, assume_unique=True)
+    else:
+        ids = index.all_ids(conn)
+    for excluded in negatives:
+        ids = np.setdiff1d(ids, excluded, assume_unique=True)
+    return ids
@@ -0,0 +1,449 @@
+"""
+Validation Queue Workers
+Drains the validation_queue table: workers lease batches of pending texts,
+score them and commit verdicts and sentences batch by batch. Expired leases
+go back to pending, so any number of processes can share one queue
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from analysis_results import EnterpriseScores
+from collection_filters import MAX_WORDS, MIN_WORDS
+from enterprise_nlp import nlp_engine
+from language_id import language_gate
+from sentence_writer import SentenceWriter
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+PROCESSING = 'processing'
+VALIDATED = 'validated'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+# Rows per lease, scored and committed together
+LEASE_BATCH = 100
+# A leased batch not completed within this many seconds is pending again
+LEASE_S = 300
+# Leases of a row that ended without a verdict before it is failed
+MAX_ATTEMPTS = 3
+# Seconds a following worker waits when the queue is empty
+IDLE_POLL_S = 1.0
+# Seconds of history behind the throughput figure of stats()
+THROUGHPUT_WINDOW_S = 300
+
+VALID_SCORE = 70
+SENTENCE_SOURCE = 'validation_queue'
+
+# Millisecond timestamps, so short leases compare correctly
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+_LEASE_COLUMNS = (
+    ('leased_by', 'TEXT'),
+    ('lease_id', 'TEXT'),
+    ('lease_expires_at', 'TIMESTAMP'),
+    ('attempts', 'INTEGER NOT NULL DEFAULT 0'),
+)
+
+
+class QueuedText(NamedTuple):
+    id: int
+    text: str
+    raw_data_id: Optional[int]
+
+
+class Lease(NamedTuple):
+    """A claimed batch; only its holder can complete or release it"""
+    id: str
+    rows: List[QueuedText]
+
+
+class ValidationQueue:
+    """
+    The validation_queue table
+
+    Rows go pending -> processing (leased) -> validated, rejected or failed.
+    A claim moves the oldest pending rows to processing under a fresh lease
+    id and expiry in one write transaction, so two workers never hold the
+    same row; completing or releasing a lease only touches rows still held
+    under its id.
+    """
+
+    def __init__(self, db_path: str = 'somali_dataset.db', lease_s: float = LEASE_S,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        self.create_tables(conn)
+        return conn
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS validation_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                raw_data_id INTEGER,
+                text TEXT NOT NULL,
+                validation_status TEXT DEFAULT 'pending',
+                validator_id INTEGER,
+                validation_notes TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                validated_at TIMESTAMP,
+                leased_by TEXT,
+                lease_id TEXT,
+                lease_expires_at TIMESTAMP,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (raw_data_id) REFERENCES raw_data (id)
+            )
+        ''')
+        # Queues created before leasing existed
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(validation_queue)')}
+        for column, definition in _LEASE_COLUMNS:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE validation_queue ADD COLUMN {column} {definition}')
+        conn.execute('CREATE INDEX IF NOT EXISTS validation_queue_status ON validation_queue (validation_status, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS validation_queue_lease ON validation_queue (lease_id)')
+
+    def enqueue(self, texts: Sequence[str], raw_data_ids: Optional[Sequence[Optional[int]]] = None) -> int:
+        """Queue texts for validation; returns how many were queued"""
+
+        ids = raw_data_ids if raw_data_ids is not None else [None] * len(texts)
+        conn = self.connect()
+        try:
+            before = conn.total_changes
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('INSERT INTO validation_queue (raw_data_id, text) VALUES (?, ?)',
+                             [(raw_id, text) for raw_id, text in zip(ids, texts) if text and text.strip()])
+            conn.execute('COMMIT')
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def enqueue_raw_data(self, limit: Optional[int] = None) -> int:
+        """Queue the unprocessed raw_data rows not queued yet; returns how many were queued"""
+
+        conn = self.connect()
+        try:
+            before = conn.total_changes
+            conn.execute('''
+                INSERT INTO validation_queue (raw_data_id, text)
+                SELECT r.id, r.raw_text FROM raw_data r
+                WHERE NOT r.is_processed
+                  AND NOT EXISTS (SELECT 1 FROM validation_queue q WHERE q.raw_data_id = r.id)
+                ORDER BY r.id LIMIT ?
+            ''', (-1 if limit is None else limit,))
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def claim(self, worker: str, limit: int = LEASE_BATCH) -> Optional[Lease]:
+        """Lease the oldest pending rows, reclaiming expired leases first; None when nothing is pending"""
+
+        lease_id = uuid.uuid4().hex
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._reclaim_expired(conn)
+            conn.execute('''
+                UPDATE validation_queue SET validation_status = ?, leased_by = ?, lease_id = ?,
+                    lease_expires_at = strftime('%Y-%m-%d %H:%M:%f', 'now', ?), attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM validation_queue WHERE validation_status = ? ORDER BY id LIMIT ?
+                )
+            ''', (PROCESSING, worker, lease_id, f'+{self.lease_s} seconds', PENDING, limit))
+            rows = [QueuedText(*row) for row in conn.execute(
+                'SELECT id, text, raw_data_id FROM validation_queue WHERE lease_id = ? ORDER BY id', (lease_id,)
+            )]
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return Lease(lease_id, rows) if rows else None
+
+    def reclaim_expired(self) -> int:
+        """Return expired leases to pending now instead of at the next claim"""
+
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            reclaimed = self._reclaim_expired(conn)
+            conn.execute('COMMIT')
+            return reclaimed
+        finally:
+            conn.close()
+
+    def _reclaim_expired(self, conn: sqlite3.Connection) -> int:
+        before = conn.total_changes
+        conn.execute(f'''
+            UPDATE validation_queue SET
+                validation_status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                validation_notes = CASE WHEN attempts >= ? THEN 'Lease expired ' || attempts || ' times'
+                                        ELSE validation_notes END,
+                validated_at = CASE WHEN attempts >= ? THEN {_NOW} END,
+                leased_by = NULL, lease_id = NULL, lease_expires_at = NULL
+            WHERE validation_status = ? AND lease_expires_at < {_NOW}
+        ''', (self.max_attempts, FAILED, PENDING, self.max_attempts, self.max_attempts, PROCESSING))
+        reclaimed = conn.total_changes - before
+        if reclaimed:
+            logger.warning("Reclaimed %d validation_queue rows with expired leases", reclaimed)
+        return reclaimed
+
+    def complete(self, lease: Lease, verdicts: Dict[int, Dict], validator_id: Optional[int] = None) -> int:
+        """
+        Record verdicts ({'status', 'notes'} by queue row id) of a leased batch
+        in one transaction, marking the raw_data rows behind them processed.
+        Returns how many rows were still held by the lease and so recorded
+        """
+
+        conn = self.connect()
+        try:
+            before = conn.total_changes
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(f'''
+                UPDATE validation_queue SET validation_status = ?, validation_notes = ?, validator_id = ?,
+                    validated_at = {_NOW}, leased_by = NULL, lease_id = NULL, lease_expires_at = NULL
+                WHERE id = ? AND lease_id = ?
+            ''', [(verdict['status'], json.dumps(verdict['notes']), validator_id, row_id, lease.id)
+                  for row_id, verdict in verdicts.items()])
+            recorded = conn.total_changes - before
+            conn.executemany(
+                'UPDATE raw_data SET is_processed = TRUE, is_valid = ? WHERE id = ?',
+                [(verdicts[row.id]['status'] == VALIDATED, row.raw_data_id)
+                 for row in lease.rows if row.raw_data_id is not None and row.id in verdicts]
+            )
+            conn.execute('COMMIT')
+            return recorded
+        finally:
+            conn.close()
+
+    def release(self, lease: Lease, error: str) -> None:
+        """Give a batch back without verdicts; rows out of attempts are failed"""
+
+        conn = self.connect()
+        try:
+            conn.execute(f'''
+                UPDATE validation_queue SET
+                    validation_status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                    validation_notes = ?,
+                    validated_at = CASE WHEN attempts >= ? THEN {_NOW} END,
+                    leased_by = NULL, lease_id = NULL, lease_expires_at = NULL
+                WHERE lease_id = ?
+            ''', (self.max_attempts, FAILED, PENDING, error, self.max_attempts, lease.id))
+        finally:
+            conn.close()
+
+    def stats(self, window_s: int = THROUGHPUT_WINDOW_S) -> Dict:
+        """Queue depth by status, leases and throughput over the last window_s seconds"""
+
+        conn = self.connect()
+        try:
+            counts = dict(conn.execute(
+                'SELECT validation_status, COUNT(*) FROM validation_queue GROUP BY validation_status'
+            ))
+            expired, workers = conn.execute(f'''
+                SELECT COALESCE(SUM(lease_expires_at < {_NOW}), 0), COUNT(DISTINCT leased_by)
+                FROM validation_queue WHERE validation_status = ?
+            ''', (PROCESSING,)).fetchone()
+            oldest = conn.execute(
+                "SELECT CAST(ROUND((julianday('now') - julianday(MIN(created_at))) * 86400) AS INTEGER) "
+                "FROM validation_queue WHERE validation_status = ?", (PENDING,)
+            ).fetchone()[0]
+            finished = conn.execute(
+                "SELECT COUNT(*) FROM validation_queue WHERE validated_at >= strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+                (f'-{window_s} seconds',)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+        depth = {status: counts.get(status, 0) for status in (PENDING, PROCESSING, VALIDATED, REJECTED, FAILED)}
+        return {
+            "depth": depth["pending"] + depth["processing"],
+            "by_status": depth,
+            "expired_leases": expired,
+            "active_workers": workers,
+            "oldest_pending_s": oldest,
+            "throughput_per_s": round(finished / window_s, 2),
+            "throughput_window_s": window_s
+        }
+
+
+class ValidationWorker:
+    """
+    Leases batches from a ValidationQueue, scores them and commits the results
+
+    Texts identified as Somali, of MIN_WORDS to MAX_WORDS words and scoring
+    at least min_score are validated and written to somali_sentences;
+    the rest are rejected with the reason in validation_notes. Sentences are
+    written before the verdicts are recorded, so a batch whose lease is lost
+    midway is scored again by its next holder and its sentences count as
+    duplicates there.
+    """
+
+    def __init__(self, queue: ValidationQueue, worker_id: Optional[str] = None, batch_size: int = LEASE_BATCH,
+                 validator_id: int = 1, scores_only: bool = True, min_score: float = VALID_SCORE):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.batch_size = batch_size
+        self.validator_id = validator_id
+        self.scores_only = scores_only
+        self.min_score = min_score
+        self.writer = SentenceWriter(queue.db_path)
+
+    def process_batch(self) -> Optional[Dict]:
+        """Claim, score and commit one batch; None when nothing was pending"""
+
+        lease = self.queue.claim(self.worker_id, self.batch_size)
+        if lease is None:
+            return None
+
+        try:
+            verdicts, sentences = self._verdicts(lease.rows)
+            written = self.writer.write(sentences)
+            recorded = self.queue.complete(lease, verdicts, self.validator_id)
+        except Exception as e:
+            logger.exception("Validation batch %s failed", lease.id)
+            self.queue.release(lease, f"{type(e).__name__}: {e}")
+            raise
+
+        if recorded < len(lease.rows):
+            logger.warning("Lease %s expired before completion; %d of %d rows recorded",
+                           lease.id, recorded, len(lease.rows))
+        return {
+            "claimed": len(lease.rows),
+            "recorded": recorded,
+            "validated": sum(verdict['status'] == VALIDATED for verdict in verdicts.values()),
+            "rejected": sum(verdict['status'] == REJECTED for verdict in verdicts.values()),
+            "sentences_written": written['written']
+        }
+
+    def drain(self, max_batches: Optional[int] = None, follow: bool = False,
+              stop: Optional[threading.Event] = None) -> Dict:
+        """
+        Process batches until the queue is empty (or, with follow, until stop
+        is set) or max_batches were done; a failing batch is released and
+        draining goes on. Returns totals and throughput
+        """
+
+        totals = {"batches": 0, "failed_batches": 0, "claimed": 0, "recorded": 0, "validated": 0,
+                  "rejected": 0, "sentences_written": 0}
+        started = time.perf_counter()
+        while max_batches is None or totals["batches"] + totals["failed_batches"] < max_batches:
+            if stop is not None and stop.is_set():
+                break
+            try:
+                batch = self.process_batch()
+            except Exception:
+                totals["failed_batches"] += 1
+                continue
+            if batch is None:
+                if not follow:
+                    break
+                if stop is not None:
+                    stop.wait(IDLE_POLL_S)
+                else:
+                    time.sleep(IDLE_POLL_S)
+                continue
+            totals["batches"] += 1
+            for key, value in batch.items():
+                totals[key] += value
+
+        elapsed = time.perf_counter() - started
+        totals["elapsed_s"] = round(elapsed, 3)
+        totals["rows_per_s"] = round(totals["recorded"] / elapsed, 1) if elapsed > 0 else 0.0
+        totals["worker"] = self.worker_id
+        return totals
+
+    def _verdicts(self, rows: List[QueuedText]) -> Tuple[Dict[int, Dict], List[Dict]]:
+        verdicts: Dict[int, Dict] = {}
+        eligible: List[QueuedText] = []
+        languages = language_gate.identifier.identify([row.text for row in rows])
+        for row, (language, confidence) in zip(rows, languages):
+            if language != 'somali':
+                verdicts[row.id] = {'status': REJECTED, 'notes': {'reason': 'language', 'language': language,
+                                                                   'confidence': confidence}}
+            elif not MIN_WORDS <= len(row.text.split()) <= MAX_WORDS:
+                verdicts[row.id] = {'status': REJECTED, 'notes': {'reason': 'length'}}
+            else:
+                eligible.append(row)
+
+        if self.scores_only:
+            scored = [nlp_engine.score_text(row.text) for row in eligible]
+        else:
+            scored = [EnterpriseScores.from_analysis_dict(analysis)
+                      for analysis in nlp_engine.analyze_many([row.text for row in eligible])]
+
+        sentences = []
+        for row, scores in zip(eligible, scored):
+            score = scores.overall_enterprise_score
+            notes = {'quality_score': score, 'dialect': scores.primary_dialect}
+            if score >= self.min_score:
+                verdicts[row.id] = {'status': VALIDATED, 'notes': notes}
+                sentences.append({
+                    'text': row.text,
+                    'dialect': scores.primary_dialect,
+                    'quality_score': score,
+                    'source': SENTENCE_SOURCE,
+                    'validated': True,
+                    'metadata': scores.to_dict()
+                })
+            else:
+                verdicts[row.id] = {'status': REJECTED, 'notes': {'reason': 'quality', **notes}}
+        return verdicts, sentences
+
+
+def _drain_process(db_path: str, batch_size: int, lease_s: float, min_score: float, follow: bool) -> Dict:
+    worker = ValidationWorker(ValidationQueue(db_path, lease_s), batch_size=batch_size, min_score=min_score)
+    return worker.drain(follow=follow)
+
+
+def run_workers(db_path: str = 'somali_dataset.db', processes: int = 2, batch_size: int = LEASE_BATCH,
+                lease_s: float = LEASE_S, min_score: float = VALID_SCORE, follow: bool = False) -> Dict:
+    """Drain the queue with worker processes; returns per-worker totals and overall throughput"""
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        workers = pool.starmap(_drain_process, [(db_path, batch_size, lease_s, min_score, follow)] * processes)
+    elapsed = time.perf_counter() - started
+    recorded = sum(worker["recorded"] for worker in workers)
+    return {
+        "workers": workers,
+        "recorded": recorded,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(recorded / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the validation queue with parallel workers")
+    parser.add_argument('--db', default='somali_dataset.db')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--batch', type=int, default=LEASE_BATCH, help="Rows per lease")
+    parser.add_argument('--lease', type=float, default=LEASE_S, help="Lease length in seconds")
+    parser.add_argument('--min-score', type=float, default=VALID_SCORE, help="Lowest score validated")
+    parser.add_argument('--enqueue-raw', action='store_true', help="Queue unprocessed raw_data rows first")
+    parser.add_argument('--follow', action='store_true', help="Keep waiting for new rows")
+    parser.add_argument('--stats', action='store_true', help="Only print queue statistics")
+    args = parser.parse_args()
+
+    queue = ValidationQueue(args.db, args.lease)
+    if args.enqueue_raw:
+        print(f"   {queue.enqueue_raw_data()} raw_data rows queued")
+    if not args.stats:
+        print(json.dumps(run_workers(args.db, args.workers, args.batch, args.lease, args.min_score, args.follow), indent=2))
+    print(json.dumps(queue.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Corpus Vocabulary Statistics
+Token occurrence and document frequencies over somali_sentences, overall and
+per dialect and source
+"""
+
+import math
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from text_features import WORD_PUNCTUATION
+
+ORDERINGS = ('occurrences', 'documents')
+
+# (+1 or -1, text, dialect, source) for a sentence entering or leaving the corpus
+SentenceChange = Tuple[int, str, Optional[str], Optional[str]]
+
+
+def term_counts(text: str) -> Counter:
+    """Occurrences of each lowercased token without surrounding punctuation"""
+    counts = Counter(word.strip(WORD_PUNCTUATION) for word in text.lower().split())
+    counts.pop('', None)
+    return counts
+
+
+def scopes_for(dialect: Optional[str], source: Optional[str]) -> List[str]:
+    """Every scope a sentence counts towards; '' is the whole corpus"""
+    scopes = ['']
+    if dialect:
+        scopes.append(f"dialect:{dialect}")
+    if source:
+        scopes.append(f"source:{source}")
+    return scopes
+
+
+class VocabularyCounts:
+    """Frequency tables kept in step with the corpus by the token index
+
+    vocabulary_counts holds per-scope occurrence and document counts by token;
+    its (scope, count) indexes keep every scope ordered, so a top-k query
+    reads k index entries instead of ranking the vocabulary.
+    vocabulary_totals holds per-scope sentence and token totals for
+    normalizing them.
+    """
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS vocabulary_counts (
+                scope TEXT NOT NULL,
+                token TEXT NOT NULL,
+                occurrences INTEGER NOT NULL,
+                documents INTEGER NOT NULL,
+                PRIMARY KEY (scope, token)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS vocabulary_by_occurrences ON vocabulary_counts (scope, occurrences)')
+        conn.execute('CREATE INDEX IF NOT EXISTS vocabulary_by_documents ON vocabulary_counts (scope, documents)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS vocabulary_totals (
+                scope TEXT PRIMARY KEY,
+                documents INTEGER NOT NULL,
+                occurrences INTEGER NOT NULL
+            )
+        ''')
+
+    @staticmethod
+    def clear(conn: sqlite3.Connection) -> None:
+        conn.execute('DELETE FROM vocabulary_counts')
+        conn.execute('DELETE FROM vocabulary_totals')
+
+    def apply(self, conn: sqlite3.Connection, changes: Iterable[SentenceChange]) -> None:
+        """Add or subtract sentences; runs inside the caller's transaction"""
+        self.write(conn, *self.accumulate(changes))
+
+    @staticmethod
+    def accumulate(changes: Iterable[SentenceChange], deltas: Optional[Dict] = None,
+                   totals: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+        """Fold changes into per-(scope, token) and per-scope count deltas"""
+
+        deltas = {} if deltas is None else deltas
+        totals = {} if totals is None else totals
+        for sign, text, dialect, source in changes:
+            counts = term_counts(text)
+            tokens = sum(counts.values())
+            for scope in scopes_for(dialect, source):
+                total = totals.setdefault(scope, [0, 0])
+                total[0] += sign
+                total[1] += sign * tokens
+                for term, count in counts.items():
+                    delta = deltas.setdefault((scope, term), [0, 0])
+                    delta[0] += sign * count
+                    delta[1] += sign
+        return deltas, totals
+
+    @staticmethod
+    def write(conn: sqlite3.Connection, deltas: Dict[Tuple[str, str], List[int]],
+              totals: Dict[str, List[int]]) -> None:
+        changed = [(scope, term, occurrences, documents)
+                   for (scope, term), (occurrences, documents) in deltas.items() if documents or occurrences]
+        conn.executemany('''
+            INSERT INTO vocabulary_counts (scope, token, occurrences, documents) VALUES (?, ?, ?, ?)
+            ON CONFLICT (scope, token) DO UPDATE SET
+                occurrences = occurrences + excluded.occurrences,
+                documents = documents + excluded.documents
+        ''', changed)
+        conn.executemany(
+            'DELETE FROM vocabulary_counts WHERE scope = ? AND token = ? AND documents <= 0',
+            [(scope, term) for scope, term, _, documents in changed if documents < 0]
+        )
+
+        conn.executemany('''
+            INSERT INTO vocabulary_totals (scope, documents, occurrences) VALUES (?, ?, ?)
+            ON CONFLICT (scope) DO UPDATE SET
+                documents = documents + excluded.documents,
+                occurrences = occurrences + excluded.occurrences
+        ''', [(scope, documents, occurrences) for scope, (documents, occurrences) in totals.items()])
+        conn.execute('DELETE FROM vocabulary_totals WHERE documents <= 0')
+
+    @staticmethod
+    def totals(conn: sqlite3.Connection, scope: str = '') -> Dict:
+        row = conn.execute(
+            'SELECT documents, occurrences FROM vocabulary_totals WHERE scope = ?', (scope,)
+        ).fetchone() or (0, 0)
+        vocabulary_size = conn.execute('SELECT COUNT(*) FROM vocabulary_counts WHERE scope = ?', (scope,)).fetchone()[0]
+        return {"sentences": row[0], "tokens": row[1], "vocabulary_size": vocabulary_size}
+
+    @staticmethod
+    def top(conn: sqlite3.Connection, k: int, scope: str = '', by: str = 'occurrences') -> List[Tuple[str, int, int]]:
+        """(token, occurrences, documents) of the k most frequent tokens in a scope"""
+
+        if by not in ORDERINGS:
+            raise ValueError(f"Unknown ordering '{by}', expected one of {', '.join(ORDERINGS)}")
+        return conn.execute(f'''
+            SELECT token, occurrences, documents FROM vocabulary_counts INDEXED BY vocabulary_by_{by}
+            WHERE scope = ? ORDER BY {by} DESC, token LIMIT ?
+        ''', (scope, k)).fetchall()
+
+    @staticmethod
+    def document_frequencies(conn: sqlite3.Connection, terms: Iterable[str], scope: str = '') -> Dict[str, int]:
+        """Sentences containing each token; absent tokens are omitted"""
+
+        terms = list(set(terms))
+        found = {}
+        for start in range(0, len(terms), 500):
+            batch = terms[start:start + 500]
+            found.update(conn.execute(
+                f"SELECT token, documents FROM vocabulary_counts WHERE scope = ? AND token IN ({','.join('?' * len(batch))})",
+                (scope, *batch)
+            ))
+        return found
+
+
+def inverse_document_frequency(documents: int, total_documents: int) -> float:
+    """Smoothed idf, log((1 + N) / (1 + df)) + 1, as used by tf-idf weighting"""
+    return math.log((1 + total_documents) / (1 + documents)) + 1
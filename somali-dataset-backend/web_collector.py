@@ -0,0 +1,297 @@
+"""
+Web Source Fetcher
+Concurrent page fetching for data collection: one pooled aiohttp session,
+global and per-host concurrency limits, retries with backoff and size caps,
+conditional requests, with page text streamed out as it downloads
+"""
+
+import asyncio
+import codecs
+import hashlib
+import logging
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from document_analyzer import SEGMENT_BOUNDARY
+from html_extractor import HTMLTextExtractor
+
+MAX_CONCURRENCY = 16
+PER_HOST_CONCURRENCY = 4
+TIMEOUT_S = 20.0
+MAX_RETRIES = 3
+# Retry n waits BACKOFF_S * 2**n seconds
+BACKOFF_S = 0.5
+MAX_RESPONSE_BYTES = 5 * 1024 * 1024
+READ_CHUNK = 64 * 1024
+
+# Page texts waiting for the collection pipeline
+TEXT_QUEUE_SIZE = 64
+# Seconds between checks of a full text queue
+QUEUE_POLL_S = 0.01
+
+# Rate limiting and server errors are worth another attempt
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+USER_AGENT = 'SomaliDatasetCollector/1.0'
+
+logger = logging.getLogger(__name__)
+
+class _PlainText:
+    """Cuts plain text after its last sentence boundary, so no sentence spans two pieces"""
+
+    def __init__(self):
+        self._pending = ''
+
+    def feed(self, data: str) -> List[str]:
+        self._pending += data
+        last = None
+        for last in SEGMENT_BOUNDARY.finditer(self._pending):
+            pass
+        if last is None:
+            return []
+        text, self._pending = self._pending[:last.end()], self._pending[last.end():]
+        return [text] if text.strip() else []
+
+    def close(self) -> List[str]:
+        text, self._pending = self._pending, ''
+        return [text] if text.strip() else []
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class PageValidators(NamedTuple):
+    """What is known about a page from its last fetch"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+
+
+class PageResult:
+    """Outcome of one URL
+
+    not_modified: the server answered a conditional request with 304
+    unchanged: the page text hashed the same as last time, so none was emitted
+    """
+
+    __slots__ = ('url', 'done', 'ok', 'status', 'attempts', 'bytes', 'truncated', 'error',
+                 'etag', 'last_modified', 'content_hash', 'not_modified', 'unchanged')
+
+    def __init__(self, url: str):
+        self.url = url
+        self.done = False
+        self.ok = False
+        self.status: Optional[int] = None
+        self.attempts = 0
+        self.bytes = 0
+        self.truncated = False
+        self.error: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.not_modified = False
+        self.unchanged = False
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class WebFetcher:
+    """
+    Fetches pages concurrently and streams their text
+
+    Runs its own event loop in a background thread, so it works the same
+    from synchronous code and from inside a running event loop.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, per_host: int = PER_HOST_CONCURRENCY,
+                 timeout: float = TIMEOUT_S, retries: int = MAX_RETRIES, backoff: float = BACKOFF_S,
+                 max_bytes: int = MAX_RESPONSE_BYTES):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_bytes = max_bytes
+
+    def stream(self, urls: Sequence[str], results: Optional[Dict[str, PageResult]] = None,
+               validators: Optional[Dict[str, PageValidators]] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Yield (url, text) pieces as pages download
+
+        HTML pages yield their content paragraphs, with navigation, scripts
+        and other boilerplate dropped; plain text pieces end at sentence
+        boundaries. A page can yield several pieces, and a page retried
+        after a partial download repeats its first ones. Every page ends
+        with a (url, None) marker, after its outcome in results is final.
+
+        Pages with validators are requested conditionally; a page with a
+        known content hash is held back until its text is complete and only
+        emitted if the hash changed.
+        """
+
+        results = {} if results is None else results
+        texts: queue.Queue = queue.Queue(TEXT_QUEUE_SIZE)
+        stop = threading.Event()
+        done = object()
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                asyncio.run(self._fetch_all(list(urls), results, validators or {}, texts, stop))
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                while not stop.is_set():
+                    try:
+                        texts.put(done, timeout=QUEUE_POLL_S)
+                        break
+                    except queue.Full:
+                        continue
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = texts.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+        if failure:
+            raise failure[0]
+
+    async def _fetch_all(self, urls: List[str], results: Dict[str, PageResult],
+                         validators: Dict[str, PageValidators], texts: queue.Queue, stop: threading.Event) -> None:
+        overall = asyncio.Semaphore(self.max_concurrency)
+        hosts: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async def emit(url: str, text: Optional[str]) -> None:
+            # Waits without blocking the loop while the pipeline catches up
+            while not stop.is_set():
+                try:
+                    texts.put_nowait((url, text))
+                    return
+                except queue.Full:
+                    await asyncio.sleep(QUEUE_POLL_S)
+            raise asyncio.CancelledError()
+
+        async def fetch(url: str) -> None:
+            result = results[url] = PageResult(url)
+            async with overall, hosts[urlsplit(url).hostname or '']:
+                try:
+                    await self._fetch(session, url, result, validators.get(url), emit)
+                except Exception as e:
+                    # One bad page fails alone instead of ending the batch
+                    logger.exception("Unexpected error fetching %s", url)
+                    result.ok = False
+                    result.error = f"{type(e).__name__}: {e}"
+                finally:
+                    result.done = True
+            await emit(url, None)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={'User-Agent': USER_AGENT}) as session:
+            await asyncio.gather(*(fetch(url) for url in urls))
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str, result: PageResult,
+                     known: Optional[PageValidators], emit) -> None:
+        headers = {}
+        if known is not None and known.etag:
+            headers['If-None-Match'] = known.etag
+        if known is not None and known.last_modified:
+            headers['If-Modified-Since'] = known.last_modified
+
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            try:
+                async with session.get(url, headers=headers) as response:
+                    result.status = response.status
+                    if response.status == 304 and known is not None:
+                        result.etag, result.last_modified, result.content_hash = known
+                        result.ok = result.not_modified = True
+                        result.error = None
+                        return
+                    if response.status in RETRY_STATUSES:
+                        raise _RetryableStatus(response.status)
+                    if response.status >= 400:
+                        result.error = f"HTTP {response.status}"
+                        return
+                    if response.content_length is not None and response.content_length > self.max_bytes:
+                        result.error = f"Response of {response.content_length} bytes exceeds {self.max_bytes}"
+                        return
+                    result.etag = response.headers.get('ETag')
+                    result.last_modified = response.headers.get('Last-Modified')
+                    await self._read_text(url, response, result, known.content_hash if known else None, emit)
+                    result.ok = True
+                    result.error = None
+                    return
+            except aiohttp.InvalidURL as e:
+                result.error = f"Invalid URL: {e}"
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
+                result.error = str(e) or type(e).__name__
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def _read_text(self, url: str, response: aiohttp.ClientResponse, result: PageResult,
+                         known_hash: Optional[str], emit) -> None:
+        """Decode, strip and emit the body chunk by chunk, stopping at the size cap
+
+        The hash covers the extracted paragraphs, so markup and boilerplate
+        changes (rotating tokens in scripts, ad slots, menus) do not count as
+        new content.
+        """
+
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+        except LookupError:
+            # A charset Python doesn't know; utf-8 with replacements beats losing the page
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        extractor = HTMLTextExtractor() if 'html' in response.content_type else _PlainText()
+        digest = hashlib.sha256()
+        held: List[str] = []
+        result.bytes = 0
+        result.truncated = False
+
+        async def take(pieces: List[str]) -> None:
+            for piece in pieces:
+                digest.update(piece.encode('utf-8') + b'\n')
+                if known_hash is None:
+                    await emit(url, piece)
+                else:
+                    held.append(piece)
+
+        async for chunk in response.content.iter_chunked(READ_CHUNK):
+            room = self.max_bytes - result.bytes
+            if len(chunk) > room:
+                chunk = chunk[:room]
+                result.truncated = True
+            result.bytes += len(chunk)
+            await take(extractor.feed(decoder.decode(chunk)))
+            if result.truncated:
+                break
+
+        # After a cut the open paragraph or sentence is unfinished
+        if not result.truncated:
+            await take(extractor.feed(decoder.decode(b'', final=True)) + extractor.close())
+
+        result.content_hash = digest.hexdigest()
+        if known_hash is not None:
+            if result.content_hash == known_hash:
+                result.unchanged = True
+                return
+            for piece in held:
+                await emit(url, piece)